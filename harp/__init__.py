@@ -76,27 +76,42 @@ if not os.environ.get("CI", False) and os.path.exists(os.path.join(ROOT_DIR, ".g
 from ._logging import get_logger  # noqa: E402, isort: skip
 
 
-async def arun(builder: "_ConfigurationBuilder"):
+async def arun(builder: "_ConfigurationBuilder", *, workers: int = 1, shutdown_event=None):
     from harp.config.adapters.hypercorn import HypercornAdapter
 
     system = await builder.abuild_system()
-    server = HypercornAdapter(system)
+    server = HypercornAdapter(system, workers=workers, shutdown_event=shutdown_event)
     try:
         return await server.serve()
     finally:
         await system.dispose()
 
 
-def run(builder: "_ConfigurationBuilder"):
+def run(builder: "_ConfigurationBuilder", *, workers: int = 1):
     """
     Run the default server using provided configuration.
 
     :param builder: Config
+    :param workers: Number of worker processes, sharing the listening ports (a supervisor process restarts crashed
+        workers). Runs the server in the current process if 1. Storage migrations, if enabled, then run once in the
+        supervisor before the workers are started.
     :return:
     """
     import asyncio
 
-    return asyncio.run(arun(builder))
+    if workers == 1:
+        return asyncio.run(arun(builder))
+
+    from harp.utils.processes import WorkerSupervisor
+    from harp_apps.storage.utils.migrations import migrate_before_workers
+
+    # migrations run once, before forking, instead of concurrently in each worker
+    migrate_before_workers(builder)
+
+    def _run_worker(shutdown_event):
+        asyncio.run(arun(builder, workers=workers, shutdown_event=shutdown_event))
+
+    return WorkerSupervisor(_run_worker, workers).run()
 
 
 __all__ = [
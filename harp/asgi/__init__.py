@@ -1,7 +1,9 @@
+from .deferred import defer
 from .kernel import ASGIKernel
 
 __title__ = "ASGI"
 
 __all__ = [
     "ASGIKernel",
+    "defer",
 ]
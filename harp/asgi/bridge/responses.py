@@ -10,8 +10,8 @@ if TYPE_CHECKING:
 
 
 class HttpResponseAsgiBridge:  # todo protocol HttpResponseBridge
-    """Implements the ability of sending our HttpResponse object over the asgi protocol. This is still early impl. and
-    it will need to support streaming responses in the future."""
+    """Implements the ability of sending our HttpResponse object over the asgi protocol. Responses with a body already
+    read are sent in one message, otherwise the underlying stream is relayed chunk by chunk."""
 
     def __init__(self, response: "HttpResponse", send: ASGISendCallable):
         self.response = response
@@ -34,9 +34,25 @@ class HttpResponseAsgiBridge:  # todo protocol HttpResponseBridge
         )
 
         # send the body
+        try:
+            body = self.response.body
+        except RuntimeError:
+            return await self._send_stream()
+
         await self.asgi_send(
             {
                 "type": "http.response.body",
-                "body": ensure_bytes(self.response.body),
+                "body": ensure_bytes(body),
             }
         )
+
+    async def _send_stream(self):
+        stream = self.response.stream
+        try:
+            async for chunk in stream:
+                if chunk:
+                    await self.asgi_send({"type": "http.response.body", "body": chunk, "more_body": True})
+        finally:
+            await stream.aclose()
+
+        await self.asgi_send({"type": "http.response.body", "body": b"", "more_body": False})
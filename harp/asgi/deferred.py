@@ -0,0 +1,28 @@
+"""
+Deferred callbacks, executed once the current http response has been sent to the client.
+
+The :class:`ASGIKernel <harp.asgi.ASGIKernel>` opens a deferral scope for each http request it handles, and runs the
+callbacks registered using :func:`defer` in background tasks after the response went through.
+
+"""
+
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Optional
+
+DeferredCallback = Callable[[], Awaitable]
+
+_deferred: ContextVar[Optional[list[DeferredCallback]]] = ContextVar("deferred", default=None)
+
+
+def defer(callback: DeferredCallback) -> bool:
+    """Registers a coroutine function to be called after the current response has been sent.
+
+    Returns False if there is no deferral scope (for example, when a controller is called outside of a kernel), in
+    which case nothing is registered and the caller is responsible for calling it.
+
+    """
+    deferred = _deferred.get()
+    if deferred is None:
+        return False
+    deferred.append(callback)
+    return True
@@ -1,3 +1,4 @@
+import asyncio
 import traceback
 from inspect import signature
 
@@ -12,6 +13,7 @@ from ..utils.performances import performances_observer
 from ..utils.types import typeof
 from .bridge.requests import HttpRequestAsgiBridge
 from .bridge.responses import HttpResponseAsgiBridge
+from .deferred import DeferredCallback, _deferred
 from .events import (
     EVENT_CORE_CONTROLLER,
     EVENT_CORE_REQUEST,
@@ -39,16 +41,25 @@ class ASGIKernel:
         self.started = False
         self.debug = debug
         self.handle_errors = handle_errors
+        self._background_tasks: set[asyncio.Task] = set()
 
     async def __call__(self, scope: Scope, receive: ASGIReceiveCallable, send: ASGISendCallable):
         asgi_type = scope.get("type", None)
 
         with performances_observer("kernel", labels={"type": asgi_type}):
             if asgi_type == "http":
-                response = await self.handle_http(scope, receive, send)
-                if isinstance(response, AlreadyHandledHttpResponse):
-                    return
-                return await HttpResponseAsgiBridge(response, send).send()
+                # callbacks deferred while handling the request will run once the response has been sent
+                deferred_token = _deferred.set([])
+                try:
+                    response = await self.handle_http(scope, receive, send)
+                    if isinstance(response, AlreadyHandledHttpResponse):
+                        return
+                    return await HttpResponseAsgiBridge(response, send).send()
+                finally:
+                    deferred = _deferred.get()
+                    _deferred.reset(deferred_token)
+                    if deferred:
+                        self._run_in_background(deferred)
 
             if asgi_type == "lifespan":
                 await receive()
@@ -70,6 +81,23 @@ class ASGIKernel:
 
             raise RuntimeError(f'Unable to handle request, invalid type "{asgi_type}".')
 
+    async def drain(self):
+        """Waits for the deferred callbacks still running in the background (to be called before shutdown)."""
+        while self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+
+    def _run_in_background(self, callbacks: list[DeferredCallback]):
+        async def _run():
+            for callback in callbacks:
+                try:
+                    await callback()
+                except Exception as exc:
+                    logger.exception(f"Error while executing deferred callback: {exc}")
+
+        task = asyncio.create_task(_run())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
     def _resolve_arguments(self, subject, **candidates):
         """
         Dynamicaly resolve arguments by names in prototype, looking at a "candidates" dictionary that
@@ -0,0 +1,32 @@
+from unittest.mock import AsyncMock, call
+
+from harp.asgi.bridge.responses import HttpResponseAsgiBridge
+from harp.http import HttpResponse
+from harp.http.tests.stubs import AsyncByteStreamFromBody
+
+
+async def test_send_buffered_response():
+    send = AsyncMock()
+    response = HttpResponse(b"Hello, world!", status=201, content_type="text/plain")
+
+    await HttpResponseAsgiBridge(response, send).send()
+
+    assert send.call_args_list == [
+        call({"type": "http.response.start", "status": 201, "headers": ((b"content-type", b"text/plain"),)}),
+        call({"type": "http.response.body", "body": b"Hello, world!"}),
+    ]
+
+
+async def test_send_streaming_response():
+    send = AsyncMock()
+    response = HttpResponse(b"", content_type="text/plain")
+    response.stream = AsyncByteStreamFromBody([b"Hello, ", b"", b"world!"])
+
+    await HttpResponseAsgiBridge(response, send).send()
+
+    assert send.call_args_list == [
+        call({"type": "http.response.start", "status": 200, "headers": ((b"content-type", b"text/plain"),)}),
+        call({"type": "http.response.body", "body": b"Hello, ", "more_body": True}),
+        call({"type": "http.response.body", "body": b"world!", "more_body": True}),
+        call({"type": "http.response.body", "body": b"", "more_body": False}),
+    ]
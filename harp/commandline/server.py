@@ -15,7 +15,13 @@ from harp.utils.commandline import click
     you need on a live server, it will serve both the proxy ports and the compiled frontend assets (dashboard).""",
 )
 @add_harp_server_click_options
-def server(**kwargs):
+@click.option(
+    "--workers",
+    default=1,
+    type=click.IntRange(min=1),
+    help="""Number of worker processes, sharing the listening ports (SO_REUSEPORT). Crashed workers are restarted.""",
+)
+def server(workers=1, **kwargs):
     _info = None
     if USE_PROMETHEUS:
         from prometheus_client import Enum
@@ -33,7 +39,7 @@ def server(**kwargs):
         _info.state("up")
 
     try:
-        return run(builder)
+        return run(builder, workers=workers)
     finally:
         if _info:
             _info.state("down")
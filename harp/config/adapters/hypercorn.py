@@ -1,5 +1,7 @@
+import asyncio
 import logging
 import sys
+from functools import partial
 from typing import cast
 
 from asgi_tools.types import TASGIApp
@@ -13,8 +15,19 @@ logger = get_logger(__name__)
 
 
 class HypercornAdapter:
-    def __init__(self, system: System):
+    """
+    Serves the system's kernel using hypercorn.
+
+    When running as one of several worker processes (``workers > 1``), the listening sockets are bound using
+    ``SO_REUSEPORT``, so that all workers can listen on the same ports, and the server shuts down once the supervisor's
+    ``shutdown_event`` is set.
+
+    """
+
+    def __init__(self, system: System, *, workers: int = 1, shutdown_event=None):
         self.system = system
+        self.workers = workers
+        self.shutdown_event = shutdown_event
 
     def _create_hypercorn_config(self, binds):
         """
@@ -26,6 +39,8 @@ class HypercornAdapter:
 
         config = Config()
         config.bind = [*map(str, binds)]
+        # hypercorn binds sockets using SO_REUSEPORT when there is more than one worker
+        config.workers = self.workers
         config.accesslog = logging.getLogger("hypercorn.access")
         config.errorlog = logging.getLogger("hypercorn.error")
         return config
@@ -34,9 +49,9 @@ class HypercornAdapter:
         """
         Creates and serves the proxy using hypercorn.
         """
-        from hypercorn.asyncio import serve
+        from hypercorn.asyncio.run import worker_serve
         from hypercorn.typing import Framework
-        from hypercorn.utils import LifespanFailureError
+        from hypercorn.utils import LifespanFailureError, check_multiprocess_shutdown_event, wrap_app
 
         asgi_app = cast(TASGIApp, self.system.kernel)
         if USE_PROMETHEUS:
@@ -50,8 +65,16 @@ class HypercornAdapter:
         hypercorn_config = self._create_hypercorn_config(self.system.binds)
         logger.debug(f"🌎 {type(self).__name__}::serve({', '.join(hypercorn_config.bind)})")
 
+        shutdown_trigger = None
+        if self.shutdown_event is not None:
+            shutdown_trigger = partial(check_multiprocess_shutdown_event, self.shutdown_event, asyncio.sleep)
+
         try:
-            return await serve(cast(Framework, asgi_app), hypercorn_config, mode="asgi")
+            return await worker_serve(
+                wrap_app(cast(Framework, asgi_app), hypercorn_config.wsgi_max_body_size, "asgi"),
+                hypercorn_config,
+                shutdown_trigger=shutdown_trigger,
+            )
         except LifespanFailureError as exc:
             logger.exception(
                 f"Server initiliation failed: {repr(exc.__cause__)}",
@@ -90,6 +90,8 @@ class System:
         """
         if self.kernel:
             try:
+                # let callbacks deferred after responses (transaction events, for example) finish first
+                await self.kernel.drain()
                 event = OnShutdownEvent(self.kernel, self.provider)
                 await self.dispatcher.adispatch(EVENT_SHUTDOWN, event)
             except Exception as exc:
@@ -63,6 +63,8 @@ REQUIRED_SETTINGS["harp_apps.proxy.settings.endpoint.EndpointSettings"] = REQUIR
     "harp_apps.proxy.settings.endpoint.BaseEndpointSettings"
 ]
 IGNORE_TYPES = {
+    "harp_apps.proxy.settings.balancer.base.BaseBalancer",
+    "harp_apps.proxy.settings.limiter.base.BaseLimiter",
     "harp_apps.proxy.settings.liveness.base.BaseLiveness",
 }
 
@@ -61,6 +61,10 @@ class ProxyControllerResolver(DefaultControllerResolver):
             dispatcher=dispatcher,
             http_client=http_client,
             name=endpoint.settings.name,
+            stream=endpoint.settings.stream,
+            stream_capture_size=endpoint.settings.stream_capture_size,
+            defer_events=endpoint.settings.defer_events,
+            retries=endpoint.settings.retries,
         )
         self._ports[endpoint.settings.port] = controller
         logger.info(f"🏭 Map: *:{endpoint.settings.port} -> {controller}")
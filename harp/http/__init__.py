@@ -2,12 +2,14 @@ from .errors import HttpError
 from .requests import HttpRequest
 from .responses import AlreadyHandledHttpResponse, HttpResponse, JsonHttpResponse
 from .serializers import HttpRequestSerializer, get_serializer_for
+from .streams import AsyncTeeStream
 from .typing import BaseHttpMessage, BaseMessage, HttpRequestBridge, HttpResponseBridge
 
 __title__ = "HTTP"
 
 __all__ = [
     "AlreadyHandledHttpResponse",
+    "AsyncTeeStream",
     "BaseHttpMessage",
     "BaseMessage",
     "HttpError",
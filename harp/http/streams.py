@@ -0,0 +1,58 @@
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Optional
+
+from httpx import AsyncByteStream
+
+
+class AsyncTeeStream(AsyncByteStream):
+    """Relays an async byte stream chunk by chunk, while keeping a copy of its first ``max_size`` bytes.
+
+    It allows to forward a body without buffering it in memory, but still have a bounded prefix of it available once
+    the transfer is over (for example, to store it). The optional ``on_complete`` coroutine function is awaited once,
+    either when the wrapped stream is exhausted or when the tee is closed, whichever comes first.
+
+    """
+
+    def __init__(
+        self,
+        stream: AsyncIterable[bytes],
+        /,
+        *,
+        max_size: int,
+        on_complete: Optional[Callable[[], Awaitable[None]]] = None,
+    ):
+        self._stream = stream
+        self._prefix = bytearray()
+        self.max_size = max_size
+        self.on_complete = on_complete
+        self.size = 0
+        self.completed = False
+
+    @property
+    def prefix(self) -> bytes:
+        """The captured beginning of the stream (at most ``max_size`` bytes)."""
+        return bytes(self._prefix)
+
+    @property
+    def truncated(self) -> bool:
+        """Whether more bytes went through the stream than what was captured."""
+        return self.size > len(self._prefix)
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            self.size += len(chunk)
+            if len(self._prefix) < self.max_size:
+                self._prefix += chunk[: self.max_size - len(self._prefix)]
+            yield chunk
+        await self._complete()
+
+    async def aclose(self) -> None:
+        if hasattr(self._stream, "aclose"):
+            await self._stream.aclose()
+        await self._complete()
+
+    async def _complete(self):
+        if self.completed:
+            return
+        self.completed = True
+        if self.on_complete is not None:
+            await self.on_complete()
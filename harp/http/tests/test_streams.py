@@ -0,0 +1,40 @@
+from unittest.mock import AsyncMock
+
+from harp.http import AsyncTeeStream
+from harp.http.tests.stubs import AsyncByteStreamFromBody
+
+
+async def test_relays_chunks_and_captures_prefix():
+    on_complete = AsyncMock()
+    stream = AsyncTeeStream(
+        AsyncByteStreamFromBody([b"foo", b"bar", b"baz"]),
+        max_size=5,
+        on_complete=on_complete,
+    )
+
+    assert [chunk async for chunk in stream] == [b"foo", b"bar", b"baz"]
+    assert stream.prefix == b"fooba"
+    assert stream.size == 9
+    assert stream.truncated
+    on_complete.assert_awaited_once()
+
+
+async def test_not_truncated_when_smaller_than_max_size():
+    stream = AsyncTeeStream(AsyncByteStreamFromBody([b"foo", b"bar"]), max_size=1024)
+
+    assert [chunk async for chunk in stream] == [b"foo", b"bar"]
+    assert stream.prefix == b"foobar"
+    assert not stream.truncated
+
+
+async def test_on_complete_is_called_once_when_closed_early():
+    on_complete = AsyncMock()
+    stream = AsyncTeeStream(AsyncByteStreamFromBody([b"foo", b"bar"]), max_size=1024, on_complete=on_complete)
+
+    async for chunk in stream:
+        break
+    await stream.aclose()
+    await stream.aclose()
+
+    assert stream.prefix == b"foo"
+    on_complete.assert_awaited_once()
@@ -123,8 +123,10 @@ class ServiceResolver:
 
         if self.signature:
             for _name, _value in self.signature.parameters.items():
-                if _value.annotation in self.container._map:
-                    kwargs.setdefault(_name, self._get_resolver(_value.annotation, context))
+                # explicit defaults win, and annotations are not even resolved for them (a decorator service would
+                # otherwise resolve itself as its own dependency, as it usually is annotated with its own base type)
+                if _name not in kwargs and _value.annotation in self.container._map:
+                    kwargs[_name] = self._get_resolver(_value.annotation, context)
 
         for _name, _value in self.arguments.items():
             if isinstance(_value, LazyServiceReference):
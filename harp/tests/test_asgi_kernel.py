@@ -2,6 +2,7 @@ from unittest.mock import AsyncMock
 
 import pytest
 
+from harp.asgi import defer
 from harp.asgi.bridge.requests import HttpRequestAsgiBridge
 from harp.asgi.kernel import ASGIKernel
 from harp.controllers import DefaultControllerResolver
@@ -49,3 +50,31 @@ class TestAsgiKernel:
         assert response.status == 200
         assert response.body == b"Hello, world!"
         assert response.headers == {"content-type": "text/plain"}
+
+    async def test_deferred_callbacks_run_after_response_is_sent(self):
+        events = []
+
+        async def deferred_callback():
+            events.append("deferred")
+
+        async def controller(request):
+            assert defer(deferred_callback)
+            return HttpResponse("Hello, world!", content_type="text/plain")
+
+        async def send(message):
+            events.append(message["type"])
+
+        kernel = ASGIKernel(resolver=DefaultControllerResolver(default_controller=controller))
+        kernel.started = True  # we do not need to test startup here.
+
+        await kernel(
+            {"type": "http", "method": "GET", "path": "/", "query_string": b"", "headers": [], "server": ()},
+            AsyncMock(),
+            send,
+        )
+        await kernel.drain()
+
+        assert events == ["http.response.start", "http.response.body", "deferred"]
+
+        # outside of a kernel http cycle, nothing can be deferred
+        assert not defer(deferred_callback)
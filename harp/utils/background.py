@@ -1,5 +1,7 @@
 import asyncio
+from collections import deque
 from inspect import iscoroutinefunction
+from typing import Hashable, Optional
 
 from harp import get_logger
 from harp.settings import USE_PROMETHEUS
@@ -19,10 +21,23 @@ if USE_PROMETHEUS:
 
 
 class AsyncWorkerQueue:
-    def __init__(self):
+    """Executes queued coroutine functions in the background, using ``concurrency`` consumer tasks.
+
+    Items pushed with the same ``key`` are executed in order, one after the other, while items with different (or no)
+    keys may run in parallel. If ``maxsize`` is set, the queue is bounded and pushing to a full queue waits for a free
+    slot. Every pushed item holds a slot until it has been executed, including items waiting for another item with the
+    same key.
+
+    """
+
+    def __init__(self, *, concurrency: int = 1, maxsize: int = 0):
         self._queue = asyncio.Queue()
+        # items waiting behind a running item with the same key leave the queue, so slots are counted separately.
+        self._slots = asyncio.Semaphore(maxsize) if maxsize > 0 else None
+        self._keys: dict[Hashable, deque] = {}
+        self.concurrency = max(1, concurrency)
         self.cleanup()
-        self._task = asyncio.create_task(self())
+        self._tasks = [asyncio.create_task(self()) for _ in range(self.concurrency)]
         self._running = True
 
     async def __call__(self):
@@ -31,32 +46,56 @@ class AsyncWorkerQueue:
                 self.cleanup()
 
             try:
-                item, ignore_errors = await self._queue.get()
+                item, ignore_errors, key = await self._queue.get()
             except RuntimeError:
                 # queue is closed
                 break
-            try:
-                await item()
-            except Exception as e:
-                if not ignore_errors:
-                    logger.exception(f"Error while executing queued task: {e}")
-            finally:
-                self._queue.task_done()
+
+            if key is not None:
+                if key in self._keys:
+                    # another consumer is executing an item with the same key, it will take care of this one too.
+                    self._keys[key].append((item, ignore_errors))
+                    continue
+                self._keys[key] = deque()
+
+            await self._execute(item, ignore_errors)
+
+            if key is not None:
+                while self._keys[key]:
+                    await self._execute(*self._keys[key].popleft())
+                del self._keys[key]
+
+    async def _execute(self, item, ignore_errors):
+        try:
+            await item()
+        except Exception as e:
+            if not ignore_errors:
+                logger.exception(f"Error while executing queued task: {e}")
+        finally:
+            self._queue.task_done()
+            if self._slots is not None:
+                self._slots.release()
 
     def cleanup(self):
         self._last_cleanup_at = asyncio.get_event_loop().time()
-        self._pressure = self._queue.qsize()
+        self._pressure = self._backlog()
         if AsyncWorkerQueueBacklog:
             # prom ignore 0 values so we set the minimum as 1
             AsyncWorkerQueueBacklog.labels(id(self)).set(max(self._pressure, 1))
 
-    async def push(self, item, /, *, ignore_errors=False):
+    async def push(self, item, /, *, ignore_errors=False, key: Optional[Hashable] = None):
         if not self._running:
             raise RuntimeError("Queue is closed.")
         if not iscoroutinefunction(item):
             raise ValueError(f"Unknown item type: {type(item)}, expecting coroutine function.")
 
-        await self._queue.put((item, ignore_errors))
+        if self._slots is not None:
+            await self._slots.acquire()
+        await self._queue.put((item, ignore_errors, key))
+        self._pressure = self._backlog()
+
+    def _backlog(self) -> int:
+        return self._queue.qsize() + sum(map(len, self._keys.values()))
 
     async def wait_until_empty(self):
         await self._queue.join()
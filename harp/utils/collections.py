@@ -1,5 +1,7 @@
-from collections import ChainMap
+import hashlib
+from collections import ChainMap, OrderedDict
 from itertools import chain, combinations
+from math import ceil, log
 
 from multidict import CIMultiDict
 
@@ -65,3 +67,138 @@ class MultiChainMap(ChainMap):
 
 def all_combinations(iterable):
     return set(chain(*(combinations(iterable, n + 1) for n in range(len(iterable)))))
+
+
+class LRUSet:
+    """
+    A set with a maximum capacity, forgetting the least recently used items first once full.
+
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.items = OrderedDict()
+
+    def add(self, item):
+        if item in self.items:
+            # Move to the end to mark as recently used
+            self.items.move_to_end(item)
+        else:
+            self.items[item] = True
+            if len(self.items) > self.capacity:
+                # Remove the least recently used item
+                self.items.popitem(last=False)
+
+    def remove(self, item):
+        if item in self.items:
+            del self.items[item]
+
+    def exists(self, item):
+        return item in self.items
+
+    def clear(self):
+        self.items.clear()
+
+    def get_lru(self):
+        if self.items:
+            return next(iter(self.items))
+        return None
+
+    def __contains__(self, item):
+        return item in self.items
+
+    def __len__(self):
+        return len(self.items)
+
+    def __repr__(self):
+        return f"LRUSet({set(self.items.keys())})"
+
+
+class LRUDict:
+    """
+    A mapping with a maximum capacity, forgetting the least recently used items first once full.
+
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.items = OrderedDict()
+
+    def get(self, key, default=None):
+        try:
+            self.items.move_to_end(key)
+        except KeyError:
+            return default
+        return self.items[key]
+
+    def set(self, key, value):
+        self.items[key] = value
+        self.items.move_to_end(key)
+        if len(self.items) > self.capacity:
+            # Remove the least recently used item
+            self.items.popitem(last=False)
+
+    def pop(self, key, default=None):
+        return self.items.pop(key, default)
+
+    def clear(self):
+        self.items.clear()
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def __len__(self):
+        return len(self.items)
+
+    def __repr__(self):
+        return f"LRUDict({dict(self.items)})"
+
+
+class BloomFilter:
+    """
+    Probabilistic set of strings, using a fixed amount of memory computed from the expected number of items
+    (``capacity``) and the acceptable false positive probability (``error_rate``). Membership tests never give false
+    negatives, but may give false positives, and items cannot be removed. Past its capacity, the false positive
+    probability grows quickly, and the filter should be cleared.
+
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        if capacity <= 0:
+            raise ValueError("Bloom filter capacity must be positive.")
+        if not 0 < error_rate < 1:
+            raise ValueError("Bloom filter error rate must be between 0 and 1 (excluded).")
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+
+        #: size of the bit array, and number of hash functions, optimal for the given capacity and error rate
+        self.size = max(8, ceil(-capacity * log(error_rate) / log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * log(2)))
+
+        self.bits = bytearray(ceil(self.size / 8))
+        self.count = 0
+
+    def _positions(self, item: str):
+        # double hashing, see "Less Hashing, Same Performance: Building a Better Bloom Filter" (Kirsch, Mitzenmacher)
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def clear(self):
+        self.bits = bytearray(len(self.bits))
+        self.count = 0
+
+    def __contains__(self, item: str):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        return f"BloomFilter(capacity={self.capacity}, error_rate={self.error_rate}, count={self.count})"
@@ -1,4 +1,29 @@
 import asyncio
+import fcntl
+import os
+import shutil
+import signal
+import tempfile
+import time
+from multiprocessing import get_context
+from multiprocessing.connection import wait
+from multiprocessing.process import BaseProcess
+from typing import Callable
+
+from harp import get_logger
+
+logger = get_logger(__name__)
+
+#: Workers exiting less than this (in seconds) after being started are considered as failing to start, and stop the
+#: whole server instead of being restarted.
+MIN_UPTIME = 5.0
+
+#: Time (in seconds) given to workers to shut down gracefully, before they get terminated.
+SHUTDOWN_TIMEOUT = 30.0
+
+#: Environment variable set to the runtime directory of a multi-process server, for the files its workers share. The
+#: directory is created by the supervisor, and removed when it exits.
+RUNTIME_DIR_ENV = "HARP_RUNTIME_DIR"
 
 
 async def check_output(*args, **kwargs):
@@ -12,3 +37,169 @@ async def check_output(*args, **kwargs):
 
     if p.returncode == 0:
         return stdout_data
+
+
+class RuntimeLock:
+    """
+    Lock shared by the workers of a multi-process server, for tasks that only one of them should run (for example,
+    the janitor). The lock is a file in the runtime directory (see :data:`RUNTIME_DIR_ENV`), locked without waiting
+    by :meth:`acquire`, and held until :meth:`release` is called or the holding process exits (the operating system
+    releases it, even if the worker crashed, so that another worker takes over on its next attempt).
+
+    Outside a multi-process server, there is nobody to share the task with and the lock is always acquired.
+
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._fd = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def acquire(self) -> bool:
+        """Tries to acquire the lock (without blocking), and returns whether this process holds it."""
+        if self._fd is not None:
+            return True
+
+        runtime_dir = os.environ.get(RUNTIME_DIR_ENV)
+        if not runtime_dir:
+            self._fd = -1
+            return True
+
+        fd = os.open(os.path.join(runtime_dir, f"{self.name}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None and self._fd >= 0:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+        self._fd = None
+
+
+class WorkerSupervisor:
+    """
+    Runs a server in ``workers`` forked processes. Used by :func:`harp.run` for multi-process servers, where each
+    worker builds its own system and event loop, goes through its own lifespan, and binds the listening ports using
+    ``SO_REUSEPORT`` (the kernel balancing incoming connections between workers).
+
+    The supervisor restarts workers that crash, unless they crash right after being started (which is most probably a
+    configuration or startup problem, that restarting would not fix), in which case it shuts the other workers down
+    and returns the failing worker's exit code. On SIGINT or SIGTERM, it sets the shared ``shutdown_event`` (from its
+    main loop, within a second), that workers watch to shut down gracefully, and waits for them.
+
+    The ``target`` callable is run in each worker, with the shutdown event as only argument. Files shared by the
+    workers go in a runtime directory (see :data:`RUNTIME_DIR_ENV`), removed once they all exited.
+
+    """
+
+    def __init__(
+        self,
+        target: Callable,
+        workers: int,
+        *,
+        min_uptime: float = MIN_UPTIME,
+        shutdown_timeout: float = SHUTDOWN_TIMEOUT,
+    ):
+        if workers < 1:
+            raise ValueError("At least one worker is required.")
+
+        self.target = target
+        self.workers = workers
+        self.min_uptime = min_uptime
+        self.shutdown_timeout = shutdown_timeout
+
+        # workers are forked, so that they inherit the (not necessarily picklable) configuration.
+        self._context = get_context("fork")
+        self.shutdown_event = self._context.Event()
+        self.processes: dict[BaseProcess, float] = {}
+
+        # signal received by the supervisor, if any. The signal handler only sets this plain attribute, as setting the
+        # shared event takes a (non reentrant) lock that the main loop may be holding when interrupted.
+        self._signal = None
+
+        #: number of restarted workers
+        self.restarts = 0
+
+    def run(self) -> int:
+        previous_handlers = {
+            signum: signal.signal(signum, self._on_signal) for signum in (signal.SIGINT, signal.SIGTERM)
+        }
+        runtime_dir = os.environ[RUNTIME_DIR_ENV] = tempfile.mkdtemp(prefix="harp-")
+        try:
+            return self._run()
+        finally:
+            del os.environ[RUNTIME_DIR_ENV]
+            shutil.rmtree(runtime_dir, ignore_errors=True)
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+
+    def _run(self) -> int:
+        logger.info(f"👷 Starting {self.workers} workers.")
+        for _ in range(self.workers):
+            self._start()
+
+        exitcode = 0
+        while self.processes and not self._should_stop():
+            sentinels = {process.sentinel: process for process in self.processes}
+            for sentinel in wait(list(sentinels), timeout=1.0):
+                process = sentinels[sentinel]
+                started_at = self.processes.pop(process)
+                process.join()
+
+                if self._should_stop():
+                    break
+
+                if time.monotonic() - started_at < self.min_uptime:
+                    logger.error(f"👷 Worker {process.pid} failed to start (exit code {process.exitcode}), stopping.")
+                    exitcode = process.exitcode or 1
+                    self.shutdown_event.set()
+                    break
+
+                logger.warning(f"👷 Worker {process.pid} exited (exit code {process.exitcode}), restarting it.")
+                self.restarts += 1
+                self._start()
+
+        self._stop()
+        return exitcode
+
+    def _should_stop(self) -> bool:
+        if self._signal is not None:
+            logger.info(f"👷 Received {signal.Signals(self._signal).name}, shutting down workers.")
+            self.shutdown_event.set()
+            self._signal = None
+        return self.shutdown_event.is_set()
+
+    def _start(self):
+        process = self._context.Process(target=self._run_worker, daemon=True)
+        process.start()
+        self.processes[process] = time.monotonic()
+
+    def _run_worker(self):
+        # the supervisor handles interruptions (SIGINT is sent to the whole process group, on CTRL+C), and asks the
+        # workers to shut down using the shutdown event.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        self.target(self.shutdown_event)
+
+    def _stop(self):
+        self.shutdown_event.set()
+        deadline = time.monotonic() + self.shutdown_timeout
+        for process in self.processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning(f"👷 Worker {process.pid} did not shut down in time, terminating it.")
+                process.terminate()
+                process.join()
+        self.processes.clear()
+
+    def _on_signal(self, signum, frame):
+        self._signal = signum
@@ -0,0 +1,64 @@
+import asyncio
+
+from harp.utils.background import AsyncWorkerQueue
+
+
+async def test_items_run_in_parallel():
+    queue = AsyncWorkerQueue(concurrency=3)
+    running, max_running = 0, 0
+
+    async def item():
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    for _ in range(6):
+        await queue.push(item)
+    await queue.wait_until_empty()
+
+    assert max_running == 3
+
+
+async def test_items_with_same_key_are_ordered():
+    queue = AsyncWorkerQueue(concurrency=4)
+    executed = []
+
+    def create_item(key, index, delay):
+        async def item():
+            await asyncio.sleep(delay)
+            executed.append((key, index))
+
+        return item
+
+    for index in range(4):
+        await queue.push(create_item("a", index, 0.01 * (4 - index)), key="a")
+        await queue.push(create_item("b", index, 0.001), key="b")
+    await queue.wait_until_empty()
+
+    assert [index for key, index in executed if key == "a"] == [0, 1, 2, 3]
+    assert [index for key, index in executed if key == "b"] == [0, 1, 2, 3]
+    # different keys did not wait for each other
+    assert executed[-1] == ("a", 3)
+
+
+async def test_maxsize_bounds_items_waiting_for_their_key():
+    queue = AsyncWorkerQueue(concurrency=2, maxsize=2)
+    release = asyncio.Event()
+
+    async def item():
+        await release.wait()
+
+    # the first item runs, and the next ones wait for it, out of the underlying queue
+    await queue.push(item, key="a")
+    await queue.push(item, key="a")
+    await asyncio.sleep(0.01)
+
+    push = asyncio.create_task(queue.push(item, key="a"))
+    await asyncio.sleep(0.01)
+    assert not push.done()
+
+    release.set()
+    await push
+    await queue.wait_until_empty()
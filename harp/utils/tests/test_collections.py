@@ -1,7 +1,7 @@
 import pytest
 from multidict import MultiDict
 
-from harp.utils.collections import MultiChainMap
+from harp.utils.collections import BloomFilter, LRUDict, LRUSet, MultiChainMap
 
 
 class TestMultiChainMap:
@@ -82,3 +82,67 @@ class TestMultiChainMap:
 
         # "b" source was not touched
         assert "b" in c.maps[1]
+
+
+class TestLRUSet:
+    def test_least_recently_used_items_are_forgotten(self):
+        s = LRUSet(2)
+        s.add("a")
+        s.add("b")
+        s.add("a")
+        s.add("c")
+
+        assert "a" in s
+        assert "b" not in s
+        assert "c" in s
+        assert len(s) == 2
+
+        s.clear()
+        assert len(s) == 0
+
+
+class TestLRUDict:
+    def test_least_recently_used_items_are_forgotten(self):
+        d = LRUDict(2)
+        d.set("a", 1)
+        d.set("b", 2)
+        assert d.get("a") == 1
+        d.set("c", 3)
+
+        assert (d.get("a"), d.get("b"), d.get("c")) == (1, None, 3)
+        assert len(d) == 2
+
+        assert d.pop("a") == 1
+        assert "a" not in d
+
+
+class TestBloomFilter:
+    def test_no_false_negatives(self):
+        f = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            f.add(str(i))
+
+        assert all(str(i) in f for i in range(1000))
+        assert len(f) == 1000
+
+    def test_false_positive_rate(self):
+        f = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            f.add(str(i))
+
+        false_positives = sum(str(i) in f for i in range(1000, 11000))
+        assert false_positives < 200
+
+    def test_clear(self):
+        f = BloomFilter(10)
+        f.add("foo")
+        f.clear()
+
+        assert "foo" not in f
+        assert len(f) == 0
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            BloomFilter(0)
+        with pytest.raises(ValueError):
+            BloomFilter(10, 1.0)
@@ -0,0 +1,105 @@
+import os
+import signal
+import sys
+import threading
+
+import pytest
+
+from harp.utils.processes import RUNTIME_DIR_ENV, RuntimeLock, WorkerSupervisor
+
+
+def test_crashed_workers_are_restarted(tmp_path):
+    def target(shutdown_event):
+        # each worker leaves a trace, and the first ones crash until three of them ran
+        (tmp_path / str(os.getpid())).touch()
+        if len(os.listdir(tmp_path)) < 3:
+            sys.exit(1)
+        shutdown_event.set()
+
+    supervisor = WorkerSupervisor(target, 1, min_uptime=0)
+    assert supervisor.run() == 0
+    assert supervisor.restarts == 2
+    assert supervisor.processes == {}
+
+
+def test_workers_failing_to_start_stop_the_server():
+    def target(shutdown_event):
+        sys.exit(3)
+
+    supervisor = WorkerSupervisor(target, 2)
+    assert supervisor.run() == 3
+    assert supervisor.restarts == 0
+
+
+def test_signals_shut_workers_down(tmp_path):
+    def target(shutdown_event):
+        shutdown_event.wait()
+        (tmp_path / str(os.getpid())).touch()
+
+    supervisor = WorkerSupervisor(target, 3)
+    threading.Timer(0.5, os.kill, (os.getpid(), signal.SIGTERM)).start()
+    assert supervisor.run() == 0
+    assert len(os.listdir(tmp_path)) == 3
+
+
+def test_runtime_dir_is_shared_then_removed(tmp_path):
+    def target(shutdown_event):
+        (tmp_path / str(os.getpid())).write_text(os.environ[RUNTIME_DIR_ENV])
+        shutdown_event.set()
+
+    supervisor = WorkerSupervisor(target, 2, min_uptime=0)
+    assert supervisor.run() == 0
+
+    runtime_dirs = {path.read_text() for path in tmp_path.iterdir()}
+    assert len(runtime_dirs) == 1
+    assert not os.path.exists(runtime_dirs.pop())
+    assert RUNTIME_DIR_ENV not in os.environ
+
+
+def test_signal_handler_does_not_touch_the_shared_event():
+    supervisor = WorkerSupervisor(lambda shutdown_event: None, 1)
+    supervisor._on_signal(signal.SIGTERM, None)
+    assert not supervisor.shutdown_event.is_set()
+
+    assert supervisor._should_stop() is True
+    assert supervisor.shutdown_event.is_set()
+
+
+def test_invalid_workers():
+    with pytest.raises(ValueError):
+        WorkerSupervisor(lambda shutdown_event: None, 0)
+
+
+def test_runtime_lock_is_held_by_one_process(tmp_path, monkeypatch):
+    monkeypatch.setenv(RUNTIME_DIR_ENV, str(tmp_path))
+    first, second = RuntimeLock("janitor"), RuntimeLock("janitor")
+
+    assert first.acquire()
+    assert first.acquire()
+    assert not second.acquire()
+
+    first.release()
+    assert not first.held
+    assert second.acquire()
+    second.release()
+
+
+def test_runtime_lock_is_released_when_the_holder_exits(tmp_path, monkeypatch):
+    def target(shutdown_event):
+        # the worker exits while holding the lock, without releasing it
+        os.environ[RUNTIME_DIR_ENV] = str(tmp_path)
+        if RuntimeLock("janitor").acquire():
+            shutdown_event.set()
+
+    assert WorkerSupervisor(target, 1, min_uptime=0).run() == 0
+    monkeypatch.setenv(RUNTIME_DIR_ENV, str(tmp_path))
+    assert RuntimeLock("janitor").acquire()
+
+
+def test_runtime_lock_is_always_acquired_outside_multi_process_servers(monkeypatch):
+    monkeypatch.delenv(RUNTIME_DIR_ENV, raising=False)
+    first, second = RuntimeLock("janitor"), RuntimeLock("janitor")
+
+    assert first.acquire() and second.acquire()
+    first.release()
+    assert not first.held
@@ -1,5 +1,3 @@
-import math
-
 from harp import get_logger
 from harp.controllers import GetHandler, RouteHandler, RouterPrefix, RoutingController
 from harp.http import HttpRequest, JsonHttpResponse
@@ -47,26 +45,25 @@ class TransactionsController(RoutingController):
 
     @GetHandler("/")
     async def list(self, request: HttpRequest):
-        page = int(request.query.get("page", 1))
-        if page < 1:
-            page = 1
-
-        cursor = str(request.query.get("cursor", ""))
-
-        results = await self.storage.get_transaction_list(
-            with_messages=True,
-            filters={name: facet.get_filter_from_query(request.query) for name, facet in self.facets.items()},
-            page=page,
-            cursor=cursor,
-            username=request.extensions.get("user") or "anonymous",
-            text_search=request.query.get("search", ""),
-        )
+        try:
+            results = await self.storage.get_transaction_list(
+                with_messages=True,
+                filters={name: facet.get_filter_from_query(request.query) for name, facet in self.facets.items()},
+                cursor=str(request.query.get("cursor", "")),
+                username=request.extensions.get("user") or "anonymous",
+                text_search=request.query.get("search", ""),
+                with_total=request.query.get("total", "") in ("1", "true"),
+            )
+        except ValueError as exc:
+            return JsonHttpResponse({"error": str(exc)}, status=400)
 
         return json(
             {
                 "items": list(map(Transaction.to_dict, results.items)),
-                "pages": math.ceil(results.meta.get("total", 0) / PAGE_SIZE),
-                "total": results.meta.get("total", 0),
+                "prev": results.meta.get("prev"),
+                "next": results.meta.get("next"),
+                "total": results.meta.get("total"),
+                "totalRelation": results.meta.get("total_relation"),
                 "perPage": PAGE_SIZE,
             }
         )
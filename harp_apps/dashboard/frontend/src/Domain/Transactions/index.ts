@@ -1,4 +1,5 @@
 export { useTransactionsListQuery } from "./useTransactionsListQuery.ts"
+export type { TransactionListResponse } from "./useTransactionsListQuery.ts"
 export { useTransactionsDetailQuery } from "./useTransactionsDetailQuery.ts"
 export { useTransactionsFiltersQuery } from "./useTransactionsFiltersQuery.ts"
 export { useSetUserFlagMutation } from "./useSetUserFlagMutation.ts"
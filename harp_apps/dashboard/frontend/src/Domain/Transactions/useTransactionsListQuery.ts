@@ -1,4 +1,4 @@
-import { useQuery } from "react-query"
+import { useQuery, useQueryClient } from "react-query"
 
 import { useApi } from "Domain/Api"
 import { ItemList } from "Domain/Api/Types"
@@ -6,7 +6,7 @@ import { Transaction } from "Models/Transaction"
 import { Filters, FilterValue, MinMaxFilter } from "Types/filters"
 
 function getQueryStringFromRecord(
-  filters: Record<string, FilterValue> | { page: number; cursor?: string | null; search?: string | null },
+  filters: Record<string, FilterValue> | { cursor?: string | null; search?: string | null; total?: boolean },
 ) {
   const searchParams = new URLSearchParams()
 
@@ -30,25 +30,49 @@ function getQueryStringFromRecord(
   return searchParams.toString()
 }
 
+export type TransactionListResponse = ItemList<Transaction> & {
+  prev: string | null
+  next: string | null
+  total: number | null
+  totalRelation: "eq" | "gte" | "approx" | null
+  perPage: number
+}
+
+type TransactionListTotal = Pick<TransactionListResponse, "total" | "totalRelation">
+
 export function useTransactionsListQuery({
-  page = 1,
   cursor = undefined,
   filters = undefined,
   search = undefined,
 }: {
   filters?: Filters
-  page?: number
   cursor?: string | null
   search?: string | null
 }) {
   const api = useApi()
-  const qs = filters
-    ? getQueryStringFromRecord({ ...filters, page, cursor: page == 1 ? undefined : cursor, search })
-    : ""
+  const queryClient = useQueryClient()
 
-  return useQuery<ItemList<Transaction> & { total: number; pages: number; perPage: number }>(
+  // Counting is expensive, the total is only asked for the first page, and reused while paging through the same
+  // filters and search.
+  const withTotal = !cursor
+  const qs = filters ? getQueryStringFromRecord({ ...filters, cursor, search, total: withTotal }) : ""
+  const totalQueryKey = ["transactions-total", filters ? getQueryStringFromRecord({ ...filters, search }) : ""]
+
+  return useQuery<TransactionListResponse>(
     ["transactions", qs],
-    () => api.fetch("/transactions" + (qs ? `?${qs}` : "")).then((r) => r.json()),
+    async () => {
+      const url = "/transactions" + (qs ? `?${qs}` : "")
+      const response: TransactionListResponse = await api.fetch(url).then((r) => r.json())
+      if (withTotal) {
+        queryClient.setQueryData<TransactionListTotal>(totalQueryKey, {
+          total: response.total,
+          totalRelation: response.totalRelation,
+        })
+        return response
+      }
+      const total = queryClient.getQueryData<TransactionListTotal>(totalQueryKey)
+      return total ? { ...response, ...total } : response
+    },
     {
       refetchInterval: 10000,
     },
@@ -0,0 +1,46 @@
+import { ChevronLeftIcon, ChevronRightIcon } from "@heroicons/react/20/solid"
+
+import { classNames } from "ui/Utilities"
+
+const linkClassName =
+  "relative inline-flex items-center px-2 py-2 text-gray-400 ring-1 ring-inset ring-gray-300 hover:bg-gray-50 focus:z-20 focus:outline-offset-0"
+const disabledClassName = "pointer-events-none opacity-50"
+
+export function CursorPaginator({
+  prev,
+  next,
+  setCursor,
+}: {
+  prev: string | null
+  next: string | null
+  setCursor: (cursor: string) => void
+}) {
+  if (!prev && !next) {
+    return null
+  }
+
+  return (
+    <div className="flex items-center justify-end border-gray-200 bg-white px-4 py-3 sm:px-6">
+      <nav className="isolate inline-flex -space-x-px rounded-md shadow-sm" aria-label="Pagination">
+        <a
+          href="#"
+          className={classNames(linkClassName, "rounded-l-md", prev ? "" : disabledClassName)}
+          onClick={prev ? () => setCursor(prev) : undefined}
+          aria-disabled={!prev}
+        >
+          <span className="sr-only">Previous</span>
+          <ChevronLeftIcon className="h-5 w-5" aria-hidden="true" />
+        </a>
+        <a
+          href="#"
+          className={classNames(linkClassName, "rounded-r-md", next ? "" : disabledClassName)}
+          onClick={next ? () => setCursor(next) : undefined}
+          aria-disabled={!next}
+        >
+          <span className="sr-only">Next</span>
+          <ChevronRightIcon className="h-5 w-5" aria-hidden="true" />
+        </a>
+      </nav>
+    </div>
+  )
+}
@@ -3,8 +3,7 @@ import { QueryObserverSuccessResult } from "react-query/types/core/types"
 import { useLocation, useNavigate, useSearchParams } from "react-router-dom"
 
 import { OnQuerySuccess } from "Components/Utilities/OnQuerySuccess.tsx"
-import { ItemList } from "Domain/Api/Types"
-import { useTransactionsDetailQuery } from "Domain/Transactions"
+import { TransactionListResponse, useTransactionsDetailQuery } from "Domain/Transactions"
 import { Transaction } from "Models/Transaction"
 import { Filters } from "Types/filters"
 
@@ -25,7 +24,7 @@ export function TransactionListOnQuerySuccess({
   query,
   filters,
 }: {
-  query: QueryObserverSuccessResult<ItemList<Transaction> & { total: number; pages: number; perPage: number }>
+  query: QueryObserverSuccessResult<TransactionListResponse>
   filters: Filters
 }) {
   const location = useLocation()
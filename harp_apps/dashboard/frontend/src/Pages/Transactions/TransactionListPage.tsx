@@ -1,5 +1,5 @@
 import { isEqual } from "lodash"
-import { useCallback, useEffect, useRef, useState } from "react"
+import { useCallback, useEffect, useRef } from "react"
 import { Helmet } from "react-helmet"
 import { useQueryClient } from "react-query"
 import { useLocation, useNavigate, useSearchParams } from "react-router-dom"
@@ -7,15 +7,28 @@ import { useLocation, useNavigate, useSearchParams } from "react-router-dom"
 import { Page } from "Components/Page"
 import { PageTitle } from "Components/Page/PageTitle.tsx"
 import { OnQuerySuccess } from "Components/Utilities/OnQuerySuccess"
-import { useTransactionsListQuery } from "Domain/Transactions"
+import { TransactionListResponse, useTransactionsListQuery } from "Domain/Transactions"
 import { Filters } from "Types/filters"
 import { SearchBar } from "ui/Components/SearchBar/SearchBar"
 import { H1 } from "ui/Components/Typography"
 
 import { RefreshButton } from "./Components/Buttons.tsx"
-import { OptionalPaginator } from "./Components/OptionalPaginator.tsx"
+import { CursorPaginator } from "./Components/CursorPaginator.tsx"
 import { TransactionListOnQuerySuccess } from "./TransactionListOnQuerySuccess.tsx"
 
+function formatTotal({ total, totalRelation }: TransactionListResponse) {
+  if (total == null) {
+    return "?"
+  }
+  if (totalRelation == "gte") {
+    return `more than ${total.toLocaleString()}`
+  }
+  if (totalRelation == "approx") {
+    return `about ${total.toLocaleString()}`
+  }
+  return total.toLocaleString()
+}
+
 export default function TransactionListPage() {
   const location = useLocation()
 
@@ -47,14 +60,12 @@ export default function TransactionListPage() {
   }
 
   const filters = defaultFilters(searchParams)
-  const cursorFromSearchParams = searchParams.get("cursor")
-  const [cursor, setCursor] = useState<string>(cursorFromSearchParams || "")
+  const cursor = searchParams.get("cursor")
   const search = searchParams.get("search")
-  const page = searchParams.get("page") ? parseInt(searchParams.get("page")!) : 1
 
-  const query = useTransactionsListQuery({ filters, page, cursor, search })
+  const query = useTransactionsListQuery({ filters, cursor, search })
 
-  // Keep refs of filters and search to reset page when a change is detected
+  // Keep refs of filters and search to go back to the first page when a change is detected
   const prevSearchRef = useRef<string | null>(null)
   const prevFiltersRef = useRef<Filters>({})
 
@@ -79,23 +90,17 @@ export default function TransactionListPage() {
     [location.pathname, navigate, searchParams],
   )
 
-  // update cursor
-  useEffect(() => {
-    if (page == 1 && query.isSuccess && query.data.items.length && query.data.items[0].id) {
-      setCursor(query.data.items[0].id)
-    }
-  }, [page, query.data?.items, query.isSuccess])
-
-  // go back to page 1
+  // go back to the first page
   useEffect(() => {
     if (!isEqual(filters, prevFiltersRef.current) || search !== prevSearchRef.current) {
+      const changed = prevSearchRef.current !== null || Object.keys(prevFiltersRef.current).length > 0
       prevFiltersRef.current = filters
       prevSearchRef.current = search
-      if (page !== 1) {
-        updateQueryParams({ page: undefined, cursor: undefined })
+      if (changed && cursor) {
+        updateQueryParams({ cursor: undefined })
       }
     }
-  }, [filters, page, search, updateQueryParams])
+  }, [filters, cursor, search, updateQueryParams])
 
   return (
     <Page
@@ -118,21 +123,13 @@ export default function TransactionListPage() {
             />
             {query.isSuccess ? (
               <div className="flex flex-col items-end">
-                <OptionalPaginator
-                  current={page}
-                  setPage={(page) => {
-                    if (page > 1) {
-                      updateQueryParams({ page: page.toString(), cursor: cursor })
-                    } else {
-                      updateQueryParams({ page: undefined, cursor: undefined })
-                    }
-                  }}
-                  total={query.data.total}
-                  pages={query.data.pages}
-                  perPage={query.data.perPage}
+                <CursorPaginator
+                  prev={query.data.prev}
+                  next={query.data.next}
+                  setCursor={(cursor) => updateQueryParams({ cursor })}
                 />
                 <div className="px-4 sm:px-6 text-sm text-secondary-400">
-                  Showing {query.data.items.length} of {query.data.total} transactions
+                  Showing {query.data.items.length} of {formatTotal(query.data)} transactions
                 </div>
               </div>
             ) : (
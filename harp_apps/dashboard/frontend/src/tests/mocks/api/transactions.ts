@@ -1,5 +1,5 @@
 import { http, HttpResponse, PathParams } from "msw"
-import { ItemList } from "Domain/Api/Types"
+import { TransactionListResponse } from "Domain/Transactions/useTransactionsListQuery.ts"
 import { Message, Transaction } from "Models/Transaction"
 
 const mockTransactionsFilters = {
@@ -94,7 +94,14 @@ const mockTransactions: { [key: string]: Transaction } = {
 
 export default Object.assign(
   http.get("/api/transactions", () => {
-    const transactionsList: ItemList<Transaction> = { items: Object.values(mockTransactions) }
+    const transactionsList: TransactionListResponse = {
+      items: Object.values(mockTransactions),
+      prev: null,
+      next: null,
+      total: Object.keys(mockTransactions).length,
+      totalRelation: "eq",
+      perPage: 40,
+    }
     return HttpResponse.json(transactionsList)
   }),
   {
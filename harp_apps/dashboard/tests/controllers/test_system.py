@@ -24,10 +24,25 @@ class TestSystemController(
         assert response == {
             "applications": ["harp_apps.storage"],
             "storage": {
-                "blobs": {"type": "sql"},
+                "blobs": {
+                    "type": "sql",
+                    "dedup": {
+                        "cache_size": 10000,
+                        "bloom_filter_capacity": 0,
+                        "bloom_filter_error_rate": 0.001,
+                        "ttl": 300.0,
+                    },
+                    "compression": ANY,
+                },
                 "migrate": True,
                 "url": "sqlite+aiosqlite:///:memory:",
                 "redis": None,
+                "worker": {
+                    "drop_policy": "drop_bodies",
+                    "high_watermark": 10000,
+                    "low_watermark": 5000,
+                    "sample_rate": 0.1,
+                },
             },
         }
 
@@ -39,10 +54,11 @@ class TestSystemController(
         assert response == {
             "applications": ["harp_apps.storage"],
             "storage": {
-                "blobs": {"type": "redis"},
+                "blobs": {"type": "redis", "dedup": ANY, "compression": ANY},
                 "migrate": True,
                 "url": "sqlite+aiosqlite:///:memory:",
                 "redis": {"url": "redis://redis.example.com:1234/42"},
+                "worker": ANY,
             },
         }
 
@@ -57,6 +73,7 @@ class TestSystemController(
                 "migrate": True,
                 "url": "sqlite+aiosqlite:///:memory:",
                 "redis": None,
+                "worker": ANY,
             },
         }
 
@@ -71,6 +88,7 @@ class TestSystemController(
                 "url": RE(r".*://test:\*\*\*@.*"),
                 "blobs": ANY,
                 "redis": None,
+                "worker": ANY,
             },
         }
 
@@ -90,7 +108,11 @@ class TestSystemControllerThroughASGI(
         assert response["headers"] == ((b"content-type", b"application/json"),)
         assert response["body"] == (
             b'{"applications":["harp_apps.storage"],"storage":{"url":"sqlite+aiosqlite:///'
-            b':memory:","migrate":true,"blobs":{"type":"sql"},"redis":null}}'
+            b':memory:","migrate":true,"blobs":{"type":"sql","dedup":{"cache_size":10000,"bloom_filter_capacity":0,'
+            b'"bloom_filter_error_rate":0.001,"ttl":300.0},"compression":{"algorithm":null,"level":null,"threshold":1024,'
+            b'"content_types":["text/*","application/json","application/*+json","application/xml","application/*+xml",'
+            b'"application/javascript","application/x-www-form-urlencoded","http/headers"]}},"redis":null,"worker":{"high_watermark":10000,'
+            b'"low_watermark":5000,"drop_policy":"drop_bodies","sample_rate":0.1}}}'
         )
 
     @parametrize_with_settings({})
@@ -103,7 +125,11 @@ class TestSystemControllerThroughASGI(
         assert response["headers"] == ((b"content-type", b"application/json"),)
         assert response["body"] == (
             b'{"applications":["harp_apps.storage"],"storage":{"url":"sqlite+aiosqlite:///'
-            b':memory:","migrate":true,"blobs":{"type":"redis"},"redis":null}}'
+            b':memory:","migrate":true,"blobs":{"type":"redis","dedup":{"cache_size":10000,"bloom_filter_capacity":0,'
+            b'"bloom_filter_error_rate":0.001,"ttl":300.0},"compression":{"algorithm":null,"level":null,"threshold":1024,'
+            b'"content_types":["text/*","application/json","application/*+json","application/xml","application/*+xml",'
+            b'"application/javascript","application/x-www-form-urlencoded","http/headers"]}},"redis":null,"worker":{"high_watermark":10000,'
+            b'"low_watermark":5000,"drop_policy":"drop_bodies","sample_rate":0.1}}}'
         )
 
     @parametrize_with_settings(
@@ -121,7 +147,11 @@ class TestSystemControllerThroughASGI(
         assert response["headers"] == ((b"content-type", b"application/json"),)
         assert response["body"] == (
             b'{"applications":["harp_apps.storage"],"storage":{"url":"sqlite+aiosqlite:///'
-            b':memory:","migrate":true,"blobs":{"type":"sql"},"redis":null}}'
+            b':memory:","migrate":true,"blobs":{"type":"sql","dedup":{"cache_size":10000,"bloom_filter_capacity":0,'
+            b'"bloom_filter_error_rate":0.001,"ttl":300.0},"compression":{"algorithm":null,"level":null,"threshold":1024,'
+            b'"content_types":["text/*","application/json","application/*+json","application/xml","application/*+xml",'
+            b'"application/javascript","application/x-www-form-urlencoded","http/headers"]}},"redis":null,"worker":{"high_watermark":10000,'
+            b'"low_watermark":5000,"drop_policy":"drop_bodies","sample_rate":0.1}}}'
         )
 
     @parametrize_with_settings(
@@ -142,7 +172,11 @@ class TestSystemControllerThroughASGI(
         assert response["headers"] == ((b"content-type", b"application/json"),)
         assert response["body"] == (
             b'{"applications":["harp_apps.storage"],"storage":{"url":"sqlite+aiosqlite:///'
-            b':memory:","migrate":true,"blobs":{"type":"redis"},"redis":null}}'
+            b':memory:","migrate":true,"blobs":{"type":"redis","dedup":{"cache_size":10000,"bloom_filter_capacity":0,'
+            b'"bloom_filter_error_rate":0.001,"ttl":300.0},"compression":{"algorithm":null,"level":null,"threshold":1024,'
+            b'"content_types":["text/*","application/json","application/*+json","application/xml","application/*+xml",'
+            b'"application/javascript","application/x-www-form-urlencoded","http/headers"]}},"redis":null,"worker":{"high_watermark":10000,'
+            b'"low_watermark":5000,"drop_policy":"drop_bodies","sample_rate":0.1}}}'
         )
 
     @parametrize_with_database_urls("postgresql")
@@ -155,10 +189,11 @@ class TestSystemControllerThroughASGI(
         assert orjson.loads(response["body"]) == {
             "applications": ["harp_apps.storage"],
             "storage": {
-                "blobs": {"type": "sql"},
+                "blobs": {"type": "sql", "dedup": ANY, "compression": ANY},
                 "migrate": True,
                 "redis": None,
                 "url": RE(escape("postgresql+asyncpg://test:***@") + r".*"),
+                "worker": ANY,
             },
         }
 
@@ -180,6 +215,10 @@ class TestSystemControllerThroughASGI(
         assert response["headers"] == ((b"content-type", b"application/json"),)
         assert response["body"] == (
             b'{"applications":["harp_apps.storage"],"storage":{"url":"sqlite+aiosqlite:///'
-            b':memory:","migrate":true,"blobs":{"type":"redis"},"redis":{"url":"redis://us'
-            b'er:***@localhost:6379/0"}}}'
+            b':memory:","migrate":true,"blobs":{"type":"redis","dedup":{"cache_size":10000,"bloom_filter_capacity":0,'
+            b'"bloom_filter_error_rate":0.001,"ttl":300.0},"compression":{"algorithm":null,"level":null,"threshold":1024,'
+            b'"content_types":["text/*","application/json","application/*+json","application/xml","application/*+xml",'
+            b'"application/javascript","application/x-www-form-urlencoded","http/headers"]}},"redis":{"url":"redis://us'
+            b'er:***@localhost:6379/0"},"worker":{"high_watermark":10000,"low_watermark":5000,"drop_policy":"drop_bodies",'
+            b'"sample_rate":0.1}}}'
         )
@@ -41,6 +41,7 @@ class TestSystemControllerProxy(SystemControllerTestFixtureMixin):
                                     "liveness": {"type": "inherit"},
                                     "pools": ["default"],
                                     "url": "http://example.com/",
+                                    "weight": 1,
                                 },
                                 "status": 0,
                             }
@@ -52,7 +53,14 @@ class TestSystemControllerProxy(SystemControllerTestFixtureMixin):
                             "min_pool_size": 1,
                         },
                     },
-                    "settings": {"description": None, "name": "api", "port": 4000},
+                    "settings": {
+                        "description": None,
+                        "name": "api",
+                        "port": 4000,
+                        "stream": False,
+                        "stream_capture_size": 65536,
+                        "defer_events": False,
+                    },
                 }
             ]
         }
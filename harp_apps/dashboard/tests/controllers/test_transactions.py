@@ -6,6 +6,7 @@ from freezegun import freeze_time
 from multidict import MultiDict
 
 from harp.http import HttpRequest
+from harp.settings import PAGE_SIZE
 from harp.utils.testing.communicators import ASGICommunicator
 from harp.utils.testing.mixins import ControllerThroughASGIFixtureMixin
 from harp_apps.dashboard.controllers.transactions import TransactionsController
@@ -57,6 +58,25 @@ class TestTransactionsController(TransactionsControllerTestFixtureMixin, Storage
             response = await controller.filters(request)
             assert response["endpoint"]["values"] == [{"count": 3, "name": "foo"}]
 
+    async def test_list_using_cursors(self, controller: TransactionsController):
+        for _ in range(PAGE_SIZE + 1):
+            await self.create_transaction(controller.storage)
+
+        request = Mock(spec=HttpRequest, query=MultiDict({"total": "1"}), extensions={})
+        response = await controller.list(request)
+        assert len(response["items"]) == PAGE_SIZE
+        assert (response["total"], response["totalRelation"], response["prev"]) == (PAGE_SIZE + 1, "eq", None)
+
+        request = Mock(spec=HttpRequest, query=MultiDict({"cursor": response["next"]}), extensions={})
+        response = await controller.list(request)
+        assert len(response["items"]) == 1
+        assert (response["total"], response["prev"], response["next"]) == (None, ANY, None)
+
+    async def test_list_with_invalid_cursor(self, controller: TransactionsController):
+        request = Mock(spec=HttpRequest, query=MultiDict({"cursor": "foo"}), extensions={})
+        response = await controller.list(request)
+        assert response.status == 400
+
 
 class TestTransactionsControllerThroughASGI(
     TransactionsControllerTestFixtureMixin,
@@ -3,19 +3,31 @@ from datetime import datetime
 
 import yaml
 from hishel._async._storages import StoredResponse
-from hishel._serializers import KNOWN_REQUEST_EXTENSIONS, KNOWN_RESPONSE_EXTENSIONS, Metadata
-from hishel._utils import normalized_url
+from hishel._serializers import Metadata
 from httpcore import Request, Response
 
 from harp.models import Blob
-from harp_apps.http_client.contrib.hishel.utils import (
-    prepare_headers_for_deserialization,
-    prepare_headers_for_serialization,
+from harp_apps.http_client.contrib.hishel.index import CacheIndex, CacheIndexEntry
+from harp_apps.http_client.contrib.hishel.serializers import (
+    DATE_FORMAT,
+    INLINE_BODY_THRESHOLD,
+    decode_entry,
+    encode_entry,
+    get_timestamp,
+    is_binary_entry,
+    replace_metadata,
 )
+from harp_apps.http_client.contrib.hishel.utils import prepare_headers_for_deserialization
 from harp_apps.storage.types import IBlobStorage
 
+#: Content type of the blobs holding large cached bodies. It is part of the blob id, so that cache bodies never share
+#: their id (and lifetime) with transaction bodies.
+CACHE_BODY_CONTENT_TYPE = "cache/body"
+
 
 class SerializedRequest(tp.TypedDict):
+    """Request of a legacy (yaml) cache entry."""
+
     method: str
     url: str
     headers: str
@@ -24,6 +36,8 @@ class SerializedRequest(tp.TypedDict):
 
 
 class SerializedResponse(tp.TypedDict):
+    """Response of a legacy (yaml) cache entry."""
+
     status: int
     headers: str
     varying: dict[str, str]
@@ -31,34 +45,95 @@ class SerializedResponse(tp.TypedDict):
     extensions: dict[str, str]
 
 
-def _ensure_datestring(date: datetime | str):
-    if isinstance(date, datetime):
-        date = date.strftime("%a, %d %b %Y %H:%M:%S GMT")
-    return date
+class AsyncStorageAdapter:
+    """
+    Stores http client cache entries in a blob storage, using the binary format defined in
+    :mod:`harp_apps.http_client.contrib.hishel.serializers`. Each entry is one blob, that also contains the response
+    body if it is small enough, so that a cache hit costs one blob read. Larger bodies are stored as separate blobs, content
+    addressed within a cache-only namespace (see :data:`CACHE_BODY_CONTENT_TYPE`).
 
+    Entries are ``cache/meta`` blobs identified by their cache key, that blob storages overwrite when they are stored
+    again (unlike content addressed blobs). Entries stored using the legacy yaml format (with headers and bodies in
+    separate blobs) can still be read, and are rewritten using the binary format the next time their metadata is
+    updated.
 
-class AsyncStorageAdapter:
-    def __init__(self, storage: IBlobStorage):
+    Stored and retrieved entries are recorded in the given :class:`CacheIndex`, if any.
+
+    """
+
+    def __init__(self, storage: IBlobStorage, index: tp.Optional[CacheIndex] = None):
         self.storage = storage
+        self.index = index
 
     async def store(self, key, /, *, response: Response, request: Request, metadata: Metadata) -> Blob:
-        serialized_request = await self._serialize_request(request)
-        serialized_response = await self._serialize_response(response)
-
-        return await self._store_cache_meta(
-            key,
-            metadata=metadata,
-            request=serialized_request,
-            response=serialized_response,
-        )
+        content, body_id = await response.aread(), None
+        if len(content) >= INLINE_BODY_THRESHOLD:
+            # "cache/body" keeps the body id apart from transaction bodies with the same content, so that evicting
+            # the cache entry never deletes a blob still referenced by a message.
+            body = await self.storage.put(Blob.from_data(content, content_type=CACHE_BODY_CONTENT_TYPE))
+            body_id = body.id
+
+        blob = await self._put(key, encode_entry(metadata, request, response, body_id=body_id))
+        if self.index is not None:
+            size = len(blob.data) + (len(content) if body_id else 0)
+            self.index.add(key, CacheIndexEntry(get_timestamp(metadata["created_at"]), size, body_id))
+        return blob
 
     async def retrieve(self, key: str) -> tp.Optional[StoredResponse]:
-        # todo remove expired cache ?
-
         cached = await self.storage.get(key)
         if not cached:
             return None
 
+        if not is_binary_entry(cached.data):
+            stored = await self._retrieve_legacy(cached)
+            self._record(key, stored[2], len(cached.data))
+            return stored
+
+        entry = decode_entry(cached.data)
+        if entry.body is not None:
+            body = entry.body
+        else:
+            body = await self.storage.get(entry.body_id)
+            if not body:
+                return None
+            body = body.data
+
+        self._record(key, entry.metadata, len(cached.data) + (len(body) if entry.body_id else 0), entry.body_id)
+
+        return Response(**entry.response, content=body), entry.request, entry.metadata
+
+    async def update_metadata_or_save(
+        self, key: str, /, *, response: Response, request: Request, metadata: Metadata
+    ) -> Blob:
+        cached = await self.storage.get(key)
+        if not cached:
+            return await self.store(key, response=response, request=request, metadata=metadata)
+
+        if is_binary_entry(cached.data):
+            return await self._put(key, replace_metadata(cached.data, metadata))
+
+        # legacy entry, rewritten using the binary format
+        stored_response, stored_request, _ = await self._retrieve_legacy(cached)
+        return await self.store(key, response=stored_response, request=stored_request, metadata=metadata)
+
+    def _record(self, key, metadata: Metadata, size: int, body_id: tp.Optional[str] = None):
+        """Records an entry read from the storage in the index, unless it is already known (written by this process,
+        or read before)."""
+        if self.index is None:
+            return
+        if key in self.index:
+            self.index.touch(key)
+        else:
+            self.index.add(key, CacheIndexEntry(get_timestamp(metadata["created_at"]), size, body_id))
+
+    async def _put(self, key, data: bytes):
+        # This is a special case where we don't want this to be content adressable. This is probably not very good, but
+        # with hishel's current design, it's the only decent way to make it work that we found. Maybe we want to change
+        # the key-value store in the future to be able to contain content addressable and unadressable data, even maybe
+        # namespaced/typed data (although we hack "content-type to do it, for now).
+        return await self.storage.put(Blob(id=key, data=data, content_type="cache/meta"))
+
+    async def _retrieve_legacy(self, cached: Blob) -> StoredResponse:
         _metadata, _request, _response = await self._decode(cached)
 
         response = await self._unserialize_response(_response)
@@ -69,21 +144,11 @@ class AsyncStorageAdapter:
             request,
             Metadata(
                 cache_key=_metadata["cache_key"],
-                created_at=datetime.strptime(_metadata["created_at"], "%a, %d %b %Y %H:%M:%S GMT"),
+                created_at=datetime.strptime(_metadata["created_at"], DATE_FORMAT),
                 number_of_uses=_metadata["number_of_uses"],
             ),
         )
 
-    async def update_metadata_or_save(
-        self, key: str, /, *, response: Response, request: Request, metadata: Metadata
-    ) -> Blob:
-        cached = await self.storage.get(key)
-        if not cached:
-            return await self.store(key, response=response, request=request, metadata=metadata)
-
-        old_metadata, request_data, response_data = await self._decode(cached)
-        await self._store_cache_meta(key, request=request_data, response=response_data, metadata=metadata)
-
     async def _decode(self, cached):
         cached = yaml.safe_load(cached.data.decode())
         request_data, response_data, raw_metadata = (
@@ -93,49 +158,6 @@ class AsyncStorageAdapter:
         )
         return raw_metadata, request_data, response_data
 
-    async def _store_cache_meta(
-        self,
-        key,
-        /,
-        *,
-        metadata: Metadata,
-        request: SerializedRequest,
-        response: SerializedResponse,
-    ):
-        # This is a special case where we don't want this to be content adressable. This is probably not very good, but
-        # with hishel's current design, it's the only decent way to make it work that we found. Maybe we want to change
-        # the key-value store in the future to be able to contain content addressable and unadressable data, even maybe
-        # namespaced/typed data (although we hack "content-type to do it, for now).
-        return await self.storage.put(
-            Blob(
-                id=key,
-                data=yaml.safe_dump(
-                    {
-                        "request": request,
-                        "response": response,
-                        "metadata": {
-                            "cache_key": metadata["cache_key"],
-                            "number_of_uses": metadata["number_of_uses"],
-                            "created_at": _ensure_datestring(metadata["created_at"]),
-                        },
-                    },
-                    sort_keys=False,
-                ).encode(),
-                content_type="cache/meta",
-            )
-        )
-
-    async def _serialize_request(self, request: Request) -> SerializedRequest:
-        headers, varying_headers, metadata = prepare_headers_for_serialization(request.headers)
-        headers = await self.storage.put(Blob.from_data(headers, content_type="http/headers"))
-        return {
-            "method": request.method.decode("ascii"),
-            "url": normalized_url(request.url),
-            "headers": headers.id,
-            "varying": varying_headers,
-            "extensions": {key: value for key, value in request.extensions.items() if key in KNOWN_REQUEST_EXTENSIONS},
-        }
-
     async def _unserialize_request(self, data: SerializedRequest) -> Request:
         headers = await self.storage.get(data["headers"])
 
@@ -146,33 +168,6 @@ class AsyncStorageAdapter:
             extensions=data.get("extensions") or {},
         )
 
-    async def _serialize_response(self, response: Response) -> SerializedResponse:
-        headers, varying_headers, metadata = prepare_headers_for_serialization(
-            response.headers,
-            varying=(
-                b"date",
-                b"content-length",
-            ),
-        )
-        headers = await self.storage.put(Blob.from_data(headers, content_type="http/headers"))
-        body = await self.storage.put(
-            Blob.from_data(
-                response.content,
-                content_type=metadata.get("content-type") or "application/octet-stream",
-            )
-        )
-        return {
-            "status": response.status,
-            "headers": headers.id,
-            "varying": varying_headers,
-            "body": body.id,
-            "extensions": {
-                key: value.decode("ascii")
-                for key, value in response.extensions.items()
-                if key in KNOWN_RESPONSE_EXTENSIONS
-            },
-        }
-
     async def _unserialize_response(self, data: SerializedResponse) -> Response:
         headers = await self.storage.get(data["headers"])
         body = await self.storage.get(data["body"])
@@ -0,0 +1,103 @@
+import heapq
+import typing as tp
+from collections import Counter, OrderedDict
+
+
+class CacheIndexEntry(tp.NamedTuple):
+    #: creation timestamp (as in :func:`time.time`)
+    created_at: float
+    #: stored size, in bytes (entry blob, and body blob if not inlined)
+    size: int
+    #: id of the body blob, if not inlined in the entry
+    body_id: tp.Optional[str] = None
+
+
+class CacheIndex:
+    """
+    In-process index of the stored http client cache entries, used to find the ones to remove from the blob storage:
+    expired entries (using a heap of creation times, as all entries share the same ttl), and least recently used
+    entries once the total size is over budget.
+
+    Body blobs stored outside their entry are content addressed, and may be shared by several entries. They are
+    reference counted, and only returned for removal with the last entry using them (blobs not used anymore by replaced
+    entries are collected in ``garbage``).
+
+    """
+
+    def __init__(self):
+        self.entries: dict[str, CacheIndexEntry] = {}
+        #: entry keys, in use order (least recently used first)
+        self.recent: OrderedDict[str, None] = OrderedDict()
+        #: (created_at, key) heap, that may contain outdated items (checked against entries when popped)
+        self.expiries: list[tuple[float, str]] = []
+        self.body_refs = Counter()
+        self.size = 0
+        #: ids of blobs not used anymore, to delete from the storage
+        self.garbage: list[str] = []
+
+    def add(self, key: str, entry: CacheIndexEntry):
+        """Adds (or replaces) an entry."""
+        self.size += entry.size
+        if entry.body_id:
+            self.body_refs[entry.body_id] += 1
+
+        previous = self.entries.get(key)
+        self.entries[key] = entry
+        self.recent[key] = None
+        self.recent.move_to_end(key)
+        if previous is None or previous.created_at != entry.created_at:
+            heapq.heappush(self.expiries, (entry.created_at, key))
+
+        if previous is not None:
+            self.garbage.extend(self._forget(previous))
+
+    def touch(self, key: str):
+        if key in self.recent:
+            self.recent.move_to_end(key)
+
+    def remove(self, key: str) -> list[str]:
+        """Removes an entry from the index, and returns the ids of the blobs to delete from the storage."""
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return []
+
+        del self.recent[key]
+        return [key, *self._forget(entry)]
+
+    def expired(self, before: float) -> list[str]:
+        """Returns the keys of entries created before the given timestamp."""
+        keys = []
+        while self.expiries and self.expiries[0][0] < before:
+            created_at, key = heapq.heappop(self.expiries)
+            entry = self.entries.get(key)
+            if entry is not None and entry.created_at == created_at:
+                keys.append(key)
+        return keys
+
+    def over(self, max_size: int) -> list[str]:
+        """Returns the keys of the least recently used entries to remove for the total size to fit in max_size."""
+        keys, size = [], self.size
+        for key in self.recent:
+            if size <= max_size:
+                break
+            keys.append(key)
+            size -= self.entries[key].size
+        return keys
+
+    def _forget(self, entry: CacheIndexEntry) -> list[str]:
+        self.size -= entry.size
+        if not entry.body_id:
+            return []
+
+        self.body_refs[entry.body_id] -= 1
+        if self.body_refs[entry.body_id] > 0:
+            return []
+
+        del self.body_refs[entry.body_id]
+        return [entry.body_id]
+
+    def __contains__(self, key: str):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,120 @@
+import time
+import typing as tp
+from collections import OrderedDict
+
+from hishel._async._storages import StoredResponse
+from hishel._serializers import KNOWN_RESPONSE_EXTENSIONS, Metadata
+from httpcore import Request, Response
+
+from harp_apps.http_client.contrib.hishel.serializers import get_timestamp
+
+#: Estimated memory overhead (in bytes) of an entry, on top of its body and headers.
+ENTRY_OVERHEAD = 512
+
+
+class MemoryCacheEntry(tp.NamedTuple):
+    status: int
+    headers: list[tuple[bytes, bytes]]
+    content: bytes
+    extensions: dict
+    request: Request
+    metadata: Metadata
+    size: int
+    expires_at: float | None
+
+
+def _get_headers_size(headers: tp.Iterable[tuple[bytes, bytes]]) -> int:
+    return sum(len(k) + len(v) for k, v in headers)
+
+
+class MemoryCache:
+    """
+    In-process, byte size bounded, least recently used set of http client cache entries, kept decoded in front of the
+    cache storage.
+
+    Entries are copied in and out, as hishel mutates the responses (and metadata) it gets from the storage. Entries
+    larger than ``max_entry_size`` are not kept, and entries older than ``ttl`` seconds (from their creation) are
+    discarded on lookup.
+
+    """
+
+    def __init__(self, max_size: int, max_entry_size: int, ttl: tp.Optional[float] = None):
+        self.max_size = max_size
+        self.max_entry_size = max_entry_size
+        self.ttl = ttl
+
+        self.entries: OrderedDict[str, MemoryCacheEntry] = OrderedDict()
+        self.size = 0
+
+    def get(self, key: str) -> tp.Optional[StoredResponse]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        if entry.expires_at is not None and entry.expires_at <= time.time():
+            self.pop(key)
+            return None
+
+        self.entries.move_to_end(key)
+        response = Response(
+            status=entry.status,
+            headers=list(entry.headers),
+            content=entry.content,
+            extensions=dict(entry.extensions),
+        )
+        return response, entry.request, Metadata(**entry.metadata)
+
+    def set(self, key: str, response: Response, request: Request, metadata: Metadata):
+        self.pop(key)
+
+        content = response.content
+        size = len(content) + _get_headers_size(response.headers) + _get_headers_size(request.headers) + ENTRY_OVERHEAD
+        if size > self.max_entry_size or size > self.max_size:
+            return
+
+        expires_at = None
+        if self.ttl is not None:
+            expires_at = get_timestamp(metadata["created_at"]) + self.ttl
+            if expires_at <= time.time():
+                return
+
+        self.entries[key] = MemoryCacheEntry(
+            status=response.status,
+            headers=list(response.headers),
+            content=content,
+            extensions={
+                name: value for name, value in response.extensions.items() if name in KNOWN_RESPONSE_EXTENSIONS
+            },
+            request=request,
+            metadata=Metadata(**metadata),
+            size=size,
+            expires_at=expires_at,
+        )
+        self.size += size
+
+        while self.size > self.max_size:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= evicted.size
+
+    def update_metadata(self, key: str, metadata: Metadata) -> bool:
+        """Updates the metadata of an entry, if in memory, and returns whether it was."""
+        entry = self.entries.get(key)
+        if entry is None:
+            return False
+        self.entries[key] = entry._replace(metadata=Metadata(**metadata))
+        return True
+
+    def pop(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry.size
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    def __contains__(self, key: str):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,197 @@
+"""
+Binary format of the http client cache entries.
+
+An entry is one record, starting with a magic prefix and a format version, followed by length-prefixed sections:
+
+- metadata (json)
+- request (json: method, url and extensions)
+- request headers
+- response (json: status, extensions and the id of the body blob, if not inlined)
+- response headers
+- response body, if inlined (smaller than :data:`INLINE_BODY_THRESHOLD`)
+
+Metadata comes first, so that it can be replaced without decoding the rest of the entry (see :func:`replace_metadata`),
+which happens on each cache hit. Headers are stored raw, one ``name: value`` pair per line.
+
+"""
+
+import struct
+import typing as tp
+from datetime import UTC, datetime
+
+import orjson
+from hishel._serializers import KNOWN_REQUEST_EXTENSIONS, KNOWN_RESPONSE_EXTENSIONS, Metadata
+from hishel._utils import normalized_url
+from httpcore import Request, Response
+
+#: Prefix of binary entries. It cannot start a yaml document, which tells them apart from legacy entries.
+MAGIC = b"\x00HCE"
+
+#: Current version of the binary format, to be increased on any incompatible change.
+VERSION = 1
+
+#: Response bodies smaller than this (in bytes) are stored within the entry, larger ones in a separate blob.
+INLINE_BODY_THRESHOLD = 64 * 1024
+
+#: Format of the metadata creation date.
+DATE_FORMAT = "%a, %d %b %Y %H:%M:%S GMT"
+
+_PREFIX = struct.Struct(">4sB")
+_LENGTH = struct.Struct(">I")
+_SECTIONS = 6
+
+
+class CacheEntry(tp.NamedTuple):
+    metadata: Metadata
+    request: Request
+    #: Response status, headers and extensions (keyword arguments of :class:`httpcore.Response`).
+    response: dict
+    #: Inlined response body, or None if stored in a separate blob.
+    body: bytes | None
+    #: Id of the response body blob, if not inlined.
+    body_id: str | None
+
+
+def ensure_datestring(date: datetime | str) -> str:
+    if isinstance(date, datetime):
+        date = date.strftime(DATE_FORMAT)
+    return date
+
+
+def get_timestamp(date: datetime) -> float:
+    """Returns the timestamp of a metadata creation date, naive dates being in UTC."""
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=UTC)
+    return date.timestamp()
+
+
+def is_binary_entry(data: bytes) -> bool:
+    return data[: len(MAGIC)] == MAGIC
+
+
+def encode_headers(headers: tp.Iterable[tuple[bytes, bytes]]) -> bytes:
+    return b"\n".join(b": ".join((k, v)) for k, v in headers)
+
+
+def decode_headers(data: bytes) -> list[tuple[bytes, bytes]]:
+    if not data:
+        return []
+    return [tuple(header.split(b": ", 1)) for header in data.split(b"\n")]
+
+
+def encode_metadata(metadata: Metadata) -> bytes:
+    return orjson.dumps(
+        {
+            "cache_key": metadata["cache_key"],
+            "number_of_uses": metadata["number_of_uses"],
+            "created_at": ensure_datestring(metadata["created_at"]),
+        }
+    )
+
+
+def decode_metadata(data: bytes) -> Metadata:
+    metadata = orjson.loads(data)
+    return Metadata(
+        cache_key=metadata["cache_key"],
+        created_at=datetime.strptime(metadata["created_at"], DATE_FORMAT),
+        number_of_uses=metadata["number_of_uses"],
+    )
+
+
+def _pack(*sections: bytes) -> bytes:
+    chunks = [_PREFIX.pack(MAGIC, VERSION)]
+    for section in sections:
+        chunks.append(_LENGTH.pack(len(section)))
+        chunks.append(section)
+    return b"".join(chunks)
+
+
+def _check_prefix(data: bytes):
+    magic, version = _PREFIX.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Unsupported cache entry format (version {version}).")
+
+
+def _unpack(data: bytes) -> list[bytes]:
+    _check_prefix(data)
+    sections, offset = [], _PREFIX.size
+    for _ in range(_SECTIONS):
+        (length,) = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        sections.append(data[offset : offset + length])
+        offset += length
+    return sections
+
+
+def encode_entry(metadata: Metadata, request: Request, response: Response, *, body_id: str | None = None) -> bytes:
+    """
+    Encodes a cache entry. If a body blob id is given, the body is not inlined.
+
+    """
+    return _pack(
+        encode_metadata(metadata),
+        orjson.dumps(
+            {
+                "method": request.method.decode("ascii"),
+                "url": normalized_url(request.url),
+                "extensions": {
+                    key: value for key, value in request.extensions.items() if key in KNOWN_REQUEST_EXTENSIONS
+                },
+            }
+        ),
+        encode_headers(request.headers),
+        orjson.dumps(
+            {
+                "status": response.status,
+                "body": body_id,
+                "extensions": {
+                    key: value.decode("ascii")
+                    for key, value in response.extensions.items()
+                    if key in KNOWN_RESPONSE_EXTENSIONS
+                },
+            }
+        ),
+        encode_headers(response.headers),
+        b"" if body_id else response.content,
+    )
+
+
+def decode_entry(data: bytes) -> CacheEntry:
+    metadata, request, request_headers, response, response_headers, body = _unpack(data)
+
+    request, response = orjson.loads(request), orjson.loads(response)
+
+    return CacheEntry(
+        metadata=decode_metadata(metadata),
+        request=Request(
+            method=request["method"],
+            url=request["url"],
+            headers=decode_headers(request_headers),
+            extensions=request["extensions"],
+        ),
+        response={
+            "status": response["status"],
+            "headers": decode_headers(response_headers),
+            "extensions": {key: value.encode() for key, value in response["extensions"].items()},
+        },
+        body=None if response["body"] else body,
+        body_id=response["body"],
+    )
+
+
+def replace_metadata(data: bytes, metadata: Metadata) -> bytes:
+    """
+    Returns a copy of an encoded entry with new metadata, leaving the other sections untouched.
+
+    """
+    _check_prefix(data)
+    (length,) = _LENGTH.unpack_from(data, _PREFIX.size)
+    metadata = encode_metadata(metadata)
+    return b"".join(
+        (
+            data[: _PREFIX.size],
+            _LENGTH.pack(len(metadata)),
+            metadata,
+            data[_PREFIX.size + _LENGTH.size + length :],
+        )
+    )
@@ -1,5 +1,7 @@
+import asyncio
 import time
 import typing as tp
+from collections import Counter
 from datetime import datetime, timezone
 
 from hishel import AsyncBaseStorage
@@ -7,26 +9,81 @@ from hishel._async._storages import StoredResponse
 from hishel._serializers import Metadata
 from httpcore import Request, Response
 
+from harp import get_logger
+from harp.settings import USE_PROMETHEUS
+from harp_apps.http_client.settings.cache import CacheMemorySettings
 from harp_apps.storage.types import IBlobStorage
 
 from .adapters import AsyncStorageAdapter
+from .index import CacheIndex
+from .memory import MemoryCache
+from .serializers import get_timestamp
+
+logger = get_logger(__name__)
 
 HEADERS_ENCODING = "iso-8859-1"
 
+#: Number of blobs deleted concurrently by the sweeper.
+SWEEP_BATCH_SIZE = 100
+
+CacheLookups = None
+if USE_PROMETHEUS:
+    from prometheus_client import Counter as PrometheusCounter
+
+    CacheLookups = PrometheusCounter(
+        "http_client_cache_lookups",
+        "Http client cache lookups, by cache tier (memory or storage) and result (hit or miss).",
+        ["tier", "result"],
+    )
+
 
 class AsyncStorage(AsyncBaseStorage):
+    """
+    Two tiers hishel storage: a memory tier (see :class:`MemoryCache`) of recently used entries, in front of a blob
+    storage (see :class:`AsyncStorageAdapter`).
+
+    Writes go to both tiers. Metadata updates of entries found in memory are only applied in memory, as they only
+    happen on cache hits, that should not cost a storage write.
+
+    Lookups are counted by tier and result, in ``hits`` and ``misses``.
+
+    If ``ttl`` or ``max_size`` is set, stored entries are indexed (see :class:`CacheIndex`), and a sweeper runs in the
+    background (at most every ``check_ttl_every`` seconds, on storage operations) to delete the entries older than
+    ``ttl`` seconds, then the least recently used ones while their total size is over ``max_size`` bytes, along with
+    their body blobs. Entries stored by other processes (or before a restart) are only known once read, and are deleted
+    as soon as read if older than ``ttl`` seconds, so that expired entries are never served.
+
+    """
+
     def __init__(
         self,
         storage: IBlobStorage,
         ttl: tp.Optional[tp.Union[int, float]] = None,
         check_ttl_every: tp.Union[int, float] = 60,
+        max_size: tp.Optional[int] = None,
+        memory: tp.Optional[CacheMemorySettings] = None,
     ):
         super().__init__(serializer=None, ttl=ttl)
 
         self._check_ttl_every = check_ttl_every
         self._last_cleaned = time.monotonic()
-        self._impl = AsyncStorageAdapter(storage)
+        self._max_size = max_size
+        # the index is only needed (and only bounded) by the sweeper, that runs if a ttl or a max size is set
+        self._index = CacheIndex() if ttl is not None or max_size is not None else None
+        self._impl = AsyncStorageAdapter(storage, self._index)
         self._storage = storage
+        self._sweeper: tp.Optional[asyncio.Task] = None
+
+        memory = memory or CacheMemorySettings()
+        self._memory = MemoryCache(memory.max_size, memory.max_entry_size, ttl=ttl) if memory.max_size else None
+
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def _count(self, tier: str, hit: bool):
+        (self.hits if hit else self.misses)[tier] += 1
+        if CacheLookups is not None:
+            CacheLookups.labels(tier=tier, result="hit" if hit else "miss").inc()
 
     async def store(
         self,
@@ -46,7 +103,15 @@ class AsyncStorage(AsyncBaseStorage):
             metadata=metadata,
         )
 
+        if self._memory is not None:
+            self._memory.set(key, response, request, metadata)
+
+        self._schedule_sweep()
+
     async def update_metadata(self, key: str, response: Response, request: Request, metadata: Metadata) -> None:
+        if self._memory is not None and self._memory.update_metadata(key, metadata):
+            return
+
         await self._impl.update_metadata_or_save(
             key,
             request=request,
@@ -55,7 +120,80 @@ class AsyncStorage(AsyncBaseStorage):
         )
 
     async def retrieve(self, key: str) -> tp.Optional[StoredResponse]:
-        return await self._impl.retrieve(key)
+        self._schedule_sweep()
+
+        if self._memory is not None:
+            stored = self._memory.get(key)
+            self._count("memory", stored is not None)
+            if stored is not None:
+                if self._index is not None:
+                    self._index.touch(key)
+                return stored
+
+        stored = await self._impl.retrieve(key)
+        if stored is not None and self._is_expired(stored[2]):
+            # the entry may not have been indexed before (stored by another process), but it is now
+            await self._delete_blobs(self._index.remove(key))
+            stored = None
+        self._count("storage", stored is not None)
+
+        if stored is not None and self._memory is not None:
+            response, request, metadata = stored
+            response.read()
+            self._memory.set(key, response, request, metadata)
+
+        return stored
+
+    def _is_expired(self, metadata: Metadata) -> bool:
+        return self._ttl is not None and get_timestamp(metadata["created_at"]) < time.time() - self._ttl
+
+    def _schedule_sweep(self):
+        if self._ttl is None and self._max_size is None:
+            return
+        if self._sweeper is not None or time.monotonic() - self._last_cleaned < self._check_ttl_every:
+            return
+
+        self._last_cleaned = time.monotonic()
+        self._sweeper = asyncio.create_task(self.sweep())
+        self._sweeper.add_done_callback(lambda _: setattr(self, "_sweeper", None))
+
+    async def sweep(self) -> int:
+        """
+        Deletes expired entries, then least recently used entries while over the maximum size, from both tiers.
+
+        :return: number of deleted entries
+        """
+        if self._index is None:
+            return 0
+
+        keys = self._index.expired(time.time() - self._ttl) if self._ttl is not None else []
+        blob_ids, self._index.garbage = self._index.garbage, []
+        for key in keys:
+            blob_ids += self._index.remove(key)
+
+        evicted = self._index.over(self._max_size) if self._max_size is not None else []
+        for key in evicted:
+            blob_ids += self._index.remove(key)
+
+        if self._memory is not None:
+            for key in keys + evicted:
+                self._memory.pop(key)
+
+        await self._delete_blobs(blob_ids)
+
+        if keys or evicted:
+            logger.debug(f"🧹 Removed {len(keys)} expired and {len(evicted)} evicted http client cache entries.")
+        return len(keys) + len(evicted)
+
+    async def _delete_blobs(self, blob_ids: list[str]):
+        for offset in range(0, len(blob_ids), SWEEP_BATCH_SIZE):
+            results = await asyncio.gather(
+                *(self._storage.delete(blob_id) for blob_id in blob_ids[offset : offset + SWEEP_BATCH_SIZE]),
+                return_exceptions=True,
+            )
+            for exc in filter(None, results):
+                logger.warning(f"Could not delete cache blob ({type(exc).__name__}: {exc}).")
 
     async def aclose(self) -> None:
-        return
+        if self._sweeper is not None:
+            self._sweeper.cancel()
@@ -0,0 +1,379 @@
+import asyncio
+import typing as tp
+from contextvars import ContextVar
+from types import TracebackType
+
+import httpcore
+from hishel import AsyncBaseStorage, AsyncCacheTransport, Controller
+from hishel._async._storages import StoredResponse
+from hishel._controller import allowed_stale, get_age, get_freshness_lifetime
+from hishel._headers import parse_cache_control
+from hishel._serializers import Metadata
+from httpx import AsyncBaseTransport, Request, Response, TransportError
+
+from harp import get_logger
+from harp.utils.collections import LRUSet
+from harp_apps.http_client.settings.cache import CacheCoalescingSettings, CacheStaleSettings
+
+logger = get_logger(__name__)
+
+#: Methods for which requests are coalesced or served stale (their cache key does not depend on the request body).
+COALESCED_METHODS = frozenset({"GET", "HEAD"})
+
+
+def to_httpcore_request(request: Request) -> httpcore.Request:
+    """Converts an httpx request to the httpcore request hishel's controller and storages work with."""
+    return httpcore.Request(
+        method=request.method,
+        url=httpcore.URL(
+            scheme=request.url.raw_scheme,
+            host=request.url.raw_host,
+            port=request.url.port,
+            target=request.url.raw_path,
+        ),
+        headers=request.headers.raw,
+        extensions=request.extensions,
+    )
+
+
+def get_cache_key(controller: Controller, request: Request) -> tp.Optional[str]:
+    """Returns the cache key of a bodyless request, or None if the request is not eligible for coalescing or stale
+    responses (other methods, or asking to bypass the cache using ``no-cache`` or ``no-store``)."""
+    if request.method not in COALESCED_METHODS or request.extensions.get("cache_disabled", False):
+        return None
+
+    cache_control = parse_cache_control(request.headers.get_list("cache-control"))
+    if cache_control.no_cache or cache_control.no_store:
+        return None
+
+    return controller._key_generator(to_httpcore_request(request), b"")
+
+
+class AsyncCoalescingTransport(AsyncBaseTransport):
+    """
+    Transport decorator, in front of the cache transport, letting only one request per cache key through at a time
+    (single flight). Concurrent requests for the same key wait for the first one to complete, then go through the
+    cache transport, that will most probably serve them from the cache it just filled. This protects upstreams from
+    cache stampedes, when a popular entry expires.
+
+    Only keys whose last response was cacheable are coalesced (the ``max_keys`` most recently used ones are
+    remembered), as waiting for a response that will not be stored would only delay the waiters, that would reach the
+    upstream anyway. The first requests for a key are therefore never coalesced.
+
+    Waiting for the cache (instead of sharing the first response as is) keeps the cache semantics (vary headers, non
+    cacheable responses) untouched. Requests asking to bypass the cache (``no-cache`` or ``no-store``) are never
+    coalesced, and waiters give up waiting after ``timeout`` seconds (see :class:`CacheCoalescingSettings
+    <harp_apps.http_client.settings.cache.CacheCoalescingSettings>`).
+
+    """
+
+    def __init__(
+        self,
+        transport: AsyncBaseTransport,
+        controller: Controller,
+        settings: tp.Optional[CacheCoalescingSettings] = None,
+    ):
+        self._transport = transport
+        self._controller = controller
+        self.settings = settings or CacheCoalescingSettings()
+
+        #: in flight requests, by cache key
+        self._flights: dict[str, asyncio.Event] = {}
+
+        #: cache keys whose last response was cacheable, the only ones worth waiting for
+        self._cacheable = LRUSet(self.settings.max_keys)
+
+        #: number of requests that waited for a concurrent one
+        self.coalesced = 0
+
+    async def handle_async_request(self, request: Request) -> Response:
+        key = get_cache_key(self._controller, request)
+        if key is None:
+            return await self._transport.handle_async_request(request)
+
+        flight = self._flights.get(key)
+        if flight is not None and key in self._cacheable:
+            self.coalesced += 1
+            try:
+                await asyncio.wait_for(flight.wait(), self.settings.timeout)
+            except TimeoutError:
+                logger.warning(
+                    f"Gave up waiting for a concurrent request to {request.url}, after {self.settings.timeout}s."
+                )
+            return await self._transport.handle_async_request(request)
+
+        if flight is not None:
+            return await self._transport.handle_async_request(request)
+
+        flight = self._flights[key] = asyncio.Event()
+        try:
+            response = await self._transport.handle_async_request(request)
+            if self.is_cacheable(request, response):
+                self._cacheable.add(key)
+            else:
+                self._cacheable.remove(key)
+            return response
+        finally:
+            del self._flights[key]
+            flight.set()
+
+    def is_cacheable(self, request: Request, response: Response) -> bool:
+        """Returns whether a response (as returned by the cache transport) was, or could have been, stored."""
+        if response.extensions.get("from_cache", False):
+            return True
+        return self._controller.is_cachable(
+            request=to_httpcore_request(request),
+            response=httpcore.Response(status=response.status_code, headers=response.headers.raw),
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+    async def __aenter__(self) -> tp.Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: tp.Optional[tp.Type[BaseException]] = None,
+        exc_value: tp.Optional[BaseException] = None,
+        traceback: tp.Optional[TracebackType] = None,
+    ) -> None:
+        await self.aclose()
+
+
+#: Stale cache control directives, and the matching :class:`StaleDirectives` fields.
+STALE_DIRECTIVES = {"stale-while-revalidate": "while_revalidate", "stale-if-error": "if_error"}
+
+
+class StaleDirectives(tp.NamedTuple):
+    while_revalidate: int
+    if_error: int
+
+
+def get_stale_directives(headers: tp.Iterable[tuple[bytes, bytes]], *, defaults: StaleDirectives) -> StaleDirectives:
+    """Parses the ``stale-while-revalidate`` and ``stale-if-error`` directives (RFC 5861) of response headers, which
+    hishel does not know about."""
+    values = defaults._asdict()
+    for name, value in headers:
+        if name.lower() != b"cache-control":
+            continue
+        for directive in value.decode("latin-1").split(","):
+            directive, _, seconds = directive.strip().lower().partition("=")
+            seconds = seconds.strip('"')
+            if directive in STALE_DIRECTIVES and seconds.isdigit():
+                values[STALE_DIRECTIVES[directive]] = int(seconds)
+    return StaleDirectives(**values)
+
+
+#: Cache entry (or miss) already looked up by the stale transport for the current request, as a ``(key, stored)``
+#: tuple, so that the cache transport behind it does not look it up again.
+prefetched_entry: ContextVar[tp.Optional[tuple[str, tp.Optional[StoredResponse]]]] = ContextVar(
+    "prefetched_entry", default=None
+)
+
+
+class PrefetchedStorage:
+    """
+    Storage decorator, answering the lookup of the entry prefetched for the current request (see
+    :data:`prefetched_entry`) without reading the decorated storage again. Everything else is delegated.
+
+    """
+
+    def __init__(self, storage: AsyncBaseStorage):
+        self._storage = storage
+
+    async def retrieve(self, key: str) -> tp.Optional[StoredResponse]:
+        prefetched = prefetched_entry.get()
+        if prefetched is not None and prefetched[0] == key:
+            return prefetched[1]
+        return await self._storage.retrieve(key)
+
+    def __getattr__(self, name):
+        return getattr(self._storage, name)
+
+
+class AsyncStaleTransport(AsyncBaseTransport):
+    """
+    Transport decorator, in front of the cache transport, implementing the ``stale-while-revalidate`` and
+    ``stale-if-error`` cache control extensions (RFC 5861).
+
+    A stale cache entry, within its ``stale-while-revalidate`` window, is served right away, while a background task
+    fetches a fresh response from the upstream (through the same transport chain as regular requests, but bypassing
+    the cache transport) and stores it. Refreshes are deduplicated by cache key, and at most ``max_refreshes`` of them
+    run at once. A stale entry within its ``stale-if-error`` window is served if revalidating it fails with a
+    transport error or a 5xx response.
+
+    The entry looked up to decide is handed over to the cache transport (see :class:`PrefetchedStorage`), so that each
+    request costs a single storage lookup.
+
+    Entries that must be revalidated (``no-cache`` or ``must-revalidate``) are never served stale. Windows can be
+    given defaults, for responses without directives (see :class:`CacheStaleSettings
+    <harp_apps.http_client.settings.cache.CacheStaleSettings>`).
+
+    """
+
+    def __init__(
+        self,
+        transport: AsyncBaseTransport,
+        storage: AsyncBaseStorage,
+        controller: Controller,
+        upstream: AsyncBaseTransport,
+        settings: tp.Optional[CacheStaleSettings] = None,
+    ):
+        self._transport = transport
+        self._storage = storage
+        self._controller = controller
+        self._upstream = upstream
+        self.settings = settings or CacheStaleSettings()
+        self._defaults = StaleDirectives(self.settings.while_revalidate, self.settings.if_error)
+
+        if isinstance(transport, AsyncCacheTransport) and transport._storage is storage:
+            transport._storage = PrefetchedStorage(storage)
+
+        #: background refreshes, by cache key
+        self._refreshes: dict[str, asyncio.Task] = {}
+
+    async def handle_async_request(self, request: Request) -> Response:
+        key = get_cache_key(self._controller, request) if self.settings.enabled else None
+        stored = await self._storage.retrieve(key) if key is not None else None
+        if stored is None:
+            return await self._forward(request, key, stored)
+
+        stored_response, stored_request, metadata = stored
+        stored_response.read()
+        staleness = self.get_staleness(request, stored_response, stored_request)
+        if staleness is None:
+            return await self._forward(request, key, stored)
+
+        directives = get_stale_directives(stored_response.headers, defaults=self._defaults)
+        if staleness <= directives.while_revalidate and self.refresh(key, request):
+            # the entry is being replaced, writing its metadata back could overwrite the refreshed one.
+            return await self._create_stale_response(
+                key, stored_response, stored_request, metadata, update_metadata=False
+            )
+
+        if staleness > directives.if_error:
+            return await self._forward(request, key, stored)
+
+        try:
+            response = await self._forward(request, key, stored)
+        except TransportError as exc:
+            logger.warning(f"Serving stale response for {request.url} ({type(exc).__name__}: {exc}).")
+            return await self._create_stale_response(key, stored_response, stored_request, metadata)
+
+        if response.status_code >= 500:
+            logger.warning(f"Serving stale response for {request.url} (upstream status {response.status_code}).")
+            await response.aclose()
+            return await self._create_stale_response(key, stored_response, stored_request, metadata)
+
+        return response
+
+    async def _forward(self, request: Request, key: tp.Optional[str], stored: tp.Optional[StoredResponse]) -> Response:
+        """Forwards a request to the cache transport, along with the entry (or miss) already looked up for it."""
+        if key is None:
+            return await self._transport.handle_async_request(request)
+
+        token = prefetched_entry.set((key, stored))
+        try:
+            return await self._transport.handle_async_request(request)
+        finally:
+            prefetched_entry.reset(token)
+
+    def get_staleness(
+        self, request: Request, response: httpcore.Response, original_request: httpcore.Request
+    ) -> tp.Optional[int]:
+        """Returns for how long (in seconds) a stored response usable for the given request has been stale, or None if
+        it is fresh, unusable, or not allowed to be served stale."""
+        if not allowed_stale(response):
+            return None
+
+        freshness_lifetime = get_freshness_lifetime(response)
+        if freshness_lifetime is None:
+            return None
+
+        staleness = get_age(response, self._controller._clock) - freshness_lifetime
+        if staleness < 0:
+            return None
+
+        # let the controller decide whether the stored response is usable at all (vary headers, ...)
+        result = self._controller.construct_response_from_cache(
+            request=to_httpcore_request(request), response=response, original_request=original_request
+        )
+        return staleness if isinstance(result, httpcore.Request) else None
+
+    def refresh(self, key: str, request: Request) -> bool:
+        """Schedules a background refresh of a cache entry, unless already scheduled, and returns whether it is (or
+        False, if too many refreshes are running already)."""
+        if key in self._refreshes:
+            return True
+        if len(self._refreshes) >= self.settings.max_refreshes:
+            return False
+
+        task = asyncio.create_task(self._refresh(key, request))
+        self._refreshes[key] = task
+        task.add_done_callback(lambda _: self._refreshes.pop(key, None))
+        return True
+
+    async def _refresh(self, key: str, request: Request):
+        try:
+            response = await self._upstream.handle_async_request(
+                Request(request.method, request.url, headers=request.headers, extensions=request.extensions)
+            )
+            try:
+                content = await response.aread()
+            finally:
+                await response.aclose()
+
+            httpcore_request = to_httpcore_request(request)
+            httpcore_response = httpcore.Response(
+                status=response.status_code,
+                headers=response.headers.raw,
+                content=content,
+                extensions=response.extensions,
+            )
+            httpcore_response.read()
+            if self._controller.is_cachable(request=httpcore_request, response=httpcore_response):
+                await self._storage.store(key, response=httpcore_response, request=httpcore_request)
+        except Exception as exc:
+            logger.warning(f"Background refresh of {request.url} failed ({type(exc).__name__}: {exc}).")
+
+    async def _create_stale_response(
+        self,
+        key: str,
+        response: httpcore.Response,
+        request: httpcore.Request,
+        metadata: Metadata,
+        *,
+        update_metadata: bool = True,
+    ) -> Response:
+        metadata["number_of_uses"] += 1
+        if update_metadata:
+            await self._storage.update_metadata(key=key, request=request, response=response, metadata=metadata)
+        return Response(
+            status_code=response.status,
+            headers=response.headers,
+            content=response.content,
+            extensions={
+                **response.extensions,
+                "from_cache": True,
+                "revalidated": False,
+                "stale": True,
+                "cache_metadata": metadata,
+            },
+        )
+
+    async def aclose(self) -> None:
+        for task in list(self._refreshes.values()):
+            task.cancel()
+        await self._transport.aclose()
+
+    async def __aenter__(self) -> tp.Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: tp.Optional[tp.Type[BaseException]] = None,
+        exc_value: tp.Optional[BaseException] = None,
+        traceback: tp.Optional[TracebackType] = None,
+    ) -> None:
+        await self.aclose()
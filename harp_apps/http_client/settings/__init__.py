@@ -17,9 +17,10 @@ class HttpClientSettings(Service):
 
     cache: CacheSettings = CacheSettings()
 
-    #: HTTP transport to use for the client. This is usually a httpx.AsyncHTTPTransport (or subclass) instance.
+    #: HTTP transport to use for the client. This is usually a httpx.AsyncHTTPTransport (or subclass) instance. The
+    #: default one supports dedicated connection pools per proxy endpoint (see ``proxy.endpoints[].pool``).
     transport: Service = Service(
-        type="httpx.AsyncHTTPTransport",
+        type="harp_apps.http_client.transport.AsyncPooledTransport",
         arguments={
             "verify": True,
             "retries": 0,
@@ -1,6 +1,46 @@
 from hishel import HEURISTICALLY_CACHEABLE_STATUS_CODES
 
 from harp.config import Configurable, Service
+from harp_apps.storage.settings import MemoryBlobStorageSettings
+
+
+class CacheMemorySettings(Configurable):
+    #: Maximum size (in bytes) of the cache entries kept in memory, in front of the cache storage. Use 0 to disable.
+    max_size: int = 16 * 1024 * 1024
+
+    #: Cache entries larger than this (in bytes) are only kept in the cache storage.
+    max_entry_size: int = 1024 * 1024
+
+
+class CacheCoalescingSettings(Configurable):
+    #: Set to true to let only one of concurrent requests for the same cache key reach the cache transport (and the
+    #: upstream, on cache misses) at a time, the others waiting for it (up to ``timeout`` seconds).
+    enabled: bool = False
+
+    #: Maximum time (in seconds) a request waits for a concurrent request with the same cache key, before going on by
+    #: itself.
+    timeout: float = 10.0
+
+    #: Number of cache keys whose last response was cacheable to remember. Only requests for those keys are coalesced,
+    #: requests for other keys (first requests, or non cacheable responses) always go through right away.
+    max_keys: int = 10000
+
+
+class CacheStaleSettings(Configurable):
+    #: Set to false to ignore the ``stale-while-revalidate`` and ``stale-if-error`` cache control directives.
+    enabled: bool = True
+
+    #: Time (in seconds) a stale entry can be served while being refreshed in the background, for responses without a
+    #: ``stale-while-revalidate`` directive.
+    while_revalidate: int = 0
+
+    #: Time (in seconds) a stale entry can be served if the upstream fails (transport error or 5xx status), for
+    #: responses without a ``stale-if-error`` directive.
+    if_error: int = 0
+
+    #: Maximum number of background refreshes running at once. Stale entries are revalidated before being served
+    #: while this limit is reached.
+    max_refreshes: int = 10
 
 
 class CacheSettings(Configurable):
@@ -20,11 +60,33 @@ class CacheSettings(Configurable):
         },
     )
 
+    #: Cache storage, where entries older than ``ttl`` seconds (if set) are removed, as well as the least recently used
+    #: entries while the total size of stored entries is over ``max_size`` bytes (if set). Checked every
+    #: ``check_ttl_every`` seconds.
+    #:
+    #: Limits only apply to the entries known by the current process: stored or read since it started. Entries left by
+    #: previous runs or stored by other processes are deleted when read after their ``ttl``, and counted in
+    #: ``max_size`` once read, but entries that are never read again stay in the blob storage. With the sql or
+    #: filesystem blob storages, the janitor removes them anyway (as orphan blobs), but a redis blob storage is not
+    #: bounded by these settings.
     storage: Service = Service(
         base="hishel.AsyncBaseStorage",
         type="harp_apps.http_client.contrib.hishel.storages.AsyncStorage",
         arguments={
             "ttl": None,
             "check_ttl_every": 60.0,
+            "max_size": None,
         },
     )
+
+    #: Coalescing of concurrent requests with the same cache key, so that only one of them reaches the upstream.
+    coalescing: CacheCoalescingSettings = CacheCoalescingSettings()
+
+    #: Serving of stale cache entries, while they are refreshed in the background or if the upstream fails.
+    stale: CacheStaleSettings = CacheStaleSettings()
+
+    #: In-process memory tier, serving hot cache entries without querying the cache storage.
+    memory: CacheMemorySettings = CacheMemorySettings()
+
+    #: In-memory blob storage used by the cache storage when no storage application is enabled.
+    fallback_storage: MemoryBlobStorageSettings = MemoryBlobStorageSettings()
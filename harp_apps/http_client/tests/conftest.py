@@ -0,0 +1,17 @@
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from harp_apps.storage.models import Base
+from harp_apps.storage.services.blob_storages.sql import SqlBlobStorage
+
+
+@pytest.fixture
+async def sql_blob_storage(tmp_path):
+    """Sql blob storage (the default one), in a sqlite database file."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'harp.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        yield SqlBlobStorage(engine)
+    finally:
+        await engine.dispose()
@@ -0,0 +1,155 @@
+from datetime import UTC, datetime
+
+import pytest
+import yaml
+from hishel._serializers import Metadata
+from httpcore import Request, Response
+
+from harp.models import Blob
+from harp_apps.http_client.contrib.hishel.adapters import CACHE_BODY_CONTENT_TYPE, AsyncStorageAdapter
+from harp_apps.http_client.contrib.hishel.serializers import INLINE_BODY_THRESHOLD, is_binary_entry
+from harp_apps.storage.services.blob_storages.memory import MemoryBlobStorage
+
+KEY = "cache-key"
+
+
+def create_request():
+    return Request(
+        b"GET",
+        "http://example.com/foo",
+        headers=[(b"Host", b"example.com"), (b"Accept", b"*/*")],
+        extensions={"timeout": {"connect": 5.0}, "unknown": "ignored"},
+    )
+
+
+def create_response(content=b"Hello."):
+    response = Response(
+        200,
+        headers=[(b"Content-Type", b"text/plain"), (b"Content-Length", str(len(content)).encode())],
+        content=content,
+        extensions={"http_version": b"HTTP/1.1", "reason_phrase": b"OK"},
+    )
+    response.read()
+    return response
+
+
+async def retrieve(adapter: AsyncStorageAdapter, key: str):
+    response, request, metadata = await adapter.retrieve(key)
+    response.read()
+    return response, request, metadata
+
+
+def create_metadata(number_of_uses=0):
+    return Metadata(cache_key=KEY, created_at=datetime(2024, 6, 21, 12, 30, tzinfo=UTC), number_of_uses=number_of_uses)
+
+
+@pytest.fixture(params=["memory", "sql"])
+def blob_storage(request):
+    # sql blob storage does not overwrite content addressed blobs, entries must still be updated in place
+    if request.param == "sql":
+        return request.getfixturevalue("sql_blob_storage")
+    return MemoryBlobStorage()
+
+
+class TestAsyncStorageAdapter:
+    async def test_small_responses_are_stored_in_one_blob(self):
+        storage = MemoryBlobStorage()
+        adapter = AsyncStorageAdapter(storage)
+
+        await adapter.store(KEY, request=create_request(), response=create_response(), metadata=create_metadata())
+        assert list(storage._blobs) == [KEY]
+        assert is_binary_entry(storage._blobs[KEY].data)
+
+        response, request, metadata = await retrieve(adapter, KEY)
+        assert (response.status, response.headers, response.content) == (200, create_response().headers, b"Hello.")
+        assert response.extensions == {"http_version": b"HTTP/1.1", "reason_phrase": b"OK"}
+        assert (request.method, request.url, request.headers) == (
+            b"GET",
+            create_request().url,
+            create_request().headers,
+        )
+        assert request.extensions == {"timeout": {"connect": 5.0}}
+        assert metadata == Metadata(cache_key=KEY, created_at=datetime(2024, 6, 21, 12, 30), number_of_uses=0)
+
+    async def test_large_bodies_are_stored_separately(self):
+        storage = MemoryBlobStorage()
+        adapter = AsyncStorageAdapter(storage)
+        content = b"x" * INLINE_BODY_THRESHOLD
+
+        await adapter.store(
+            KEY, request=create_request(), response=create_response(content), metadata=create_metadata()
+        )
+        body = Blob.from_data(content, content_type=CACHE_BODY_CONTENT_TYPE)
+        assert set(storage._blobs) == {KEY, body.id}
+        assert body.id != Blob.from_data(content, content_type="text/plain").id
+
+        response, _, _ = await retrieve(adapter, KEY)
+        assert response.content == content
+
+    async def test_update_metadata(self, blob_storage):
+        storage = blob_storage
+        adapter = AsyncStorageAdapter(storage)
+
+        await adapter.update_metadata_or_save(
+            KEY, request=create_request(), response=create_response(), metadata=create_metadata()
+        )
+        await adapter.update_metadata_or_save(
+            KEY, request=create_request(), response=create_response(b"Other."), metadata=create_metadata(3)
+        )
+
+        response, _, metadata = await retrieve(adapter, KEY)
+        assert response.content == b"Hello."
+        assert metadata["number_of_uses"] == 3
+
+    async def test_legacy_entries_are_read_and_migrated(self, blob_storage):
+        storage = blob_storage
+        adapter = AsyncStorageAdapter(storage)
+
+        request_headers = await storage.put(Blob.from_data(b"host: example.com", content_type="http/headers"))
+        response_headers = await storage.put(Blob.from_data(b"content-type: text/plain", content_type="http/headers"))
+        body = await storage.put(Blob.from_data(b"Hello.", content_type="text/plain"))
+        await storage.put(
+            Blob(
+                id=KEY,
+                data=yaml.safe_dump(
+                    {
+                        "request": {
+                            "method": "GET",
+                            "url": "http://example.com/foo",
+                            "headers": request_headers.id,
+                            "varying": {},
+                            "extensions": {},
+                        },
+                        "response": {
+                            "status": 200,
+                            "headers": response_headers.id,
+                            "varying": {"content-length": "6"},
+                            "body": body.id,
+                            "extensions": {"http_version": "HTTP/1.1"},
+                        },
+                        "metadata": {
+                            "cache_key": KEY,
+                            "number_of_uses": 1,
+                            "created_at": "Fri, 21 Jun 2024 12:30:00 GMT",
+                        },
+                    }
+                ).encode(),
+                content_type="cache/meta",
+            )
+        )
+
+        response, request, metadata = await retrieve(adapter, KEY)
+        assert response.headers == [(b"content-type", b"text/plain"), (b"content-length", b"6")]
+        assert response.content == b"Hello."
+        assert request.headers == [(b"host", b"example.com")]
+        assert metadata["number_of_uses"] == 1
+
+        await adapter.update_metadata_or_save(
+            KEY, request=create_request(), response=create_response(b"Other."), metadata=create_metadata(2)
+        )
+        assert is_binary_entry((await storage.get(KEY)).data)
+
+        response, request, metadata = await retrieve(adapter, KEY)
+        assert response.content == b"Hello."
+        assert request.headers == [(b"host", b"example.com")]
+        assert metadata["number_of_uses"] == 2
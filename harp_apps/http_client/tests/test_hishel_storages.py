@@ -0,0 +1,209 @@
+from datetime import UTC, datetime, timedelta
+
+from hishel._serializers import Metadata
+from httpcore import Request, Response
+
+from harp.models import Blob
+from harp_apps.http_client.contrib.hishel.index import CacheIndex, CacheIndexEntry
+from harp_apps.http_client.contrib.hishel.memory import ENTRY_OVERHEAD
+from harp_apps.http_client.contrib.hishel.serializers import INLINE_BODY_THRESHOLD
+from harp_apps.http_client.contrib.hishel.storages import AsyncStorage
+from harp_apps.http_client.settings.cache import CacheMemorySettings
+from harp_apps.storage.services.blob_storages.memory import MemoryBlobStorage
+
+
+def create_request():
+    return Request(b"GET", "http://example.com/foo")
+
+
+def create_response(content=b"Hello."):
+    response = Response(200, headers=[(b"Content-Type", b"text/plain")], content=content)
+    response.read()
+    return response
+
+
+async def retrieve(storage: AsyncStorage, key: str):
+    stored = await storage.retrieve(key)
+    if stored is not None:
+        stored[0].read()
+    return stored
+
+
+class TestAsyncStorage:
+    async def test_hits_are_served_from_memory(self):
+        blobs = MemoryBlobStorage()
+        storage = AsyncStorage(blobs)
+
+        assert await retrieve(storage, "foo") is None
+        await storage.store("foo", create_response(), create_request())
+        blobs._blobs.clear()
+
+        response, request, metadata = await retrieve(storage, "foo")
+        assert response.content == b"Hello."
+        assert request.url == create_request().url
+
+        # hishel mutates what it gets from the storage, which must not leak into the next hits
+        response.extensions["from_cache"] = True
+        metadata["number_of_uses"] += 1
+        await storage.update_metadata("foo", response, request, metadata)
+
+        response, _, metadata = await retrieve(storage, "foo")
+        assert "from_cache" not in response.extensions
+        assert metadata["number_of_uses"] == 1
+
+        assert storage.hits == {"memory": 2}
+        assert storage.misses == {"memory": 1, "storage": 1}
+
+    async def test_storage_hits_are_kept_in_memory(self):
+        blobs = MemoryBlobStorage()
+        await AsyncStorage(blobs).store("foo", create_response(), create_request())
+
+        storage = AsyncStorage(blobs)
+        assert (await retrieve(storage, "foo"))[0].content == b"Hello."
+        assert (await retrieve(storage, "foo"))[0].content == b"Hello."
+        assert storage.hits == {"memory": 1, "storage": 1}
+
+    async def test_memory_is_bounded_in_bytes(self):
+        size = 1000 + len(b"content-typetext/plain") + ENTRY_OVERHEAD
+        storage = AsyncStorage(MemoryBlobStorage(), memory=CacheMemorySettings(max_size=2 * size, max_entry_size=size))
+
+        for key in ("foo", "bar", "baz"):
+            await storage.store(key, create_response(b"x" * 1000), create_request())
+        await storage.store("large", create_response(b"x" * 1001), create_request())
+
+        assert list(storage._memory.entries) == ["bar", "baz"]
+        assert storage._memory.size == 2 * size
+
+    async def test_expired_entries_are_not_served_from_memory(self):
+        storage = AsyncStorage(MemoryBlobStorage(), ttl=60)
+
+        metadata = Metadata(cache_key="foo", created_at=datetime.now(UTC) - timedelta(seconds=61), number_of_uses=0)
+        await storage.store("foo", create_response(), create_request(), metadata)
+        assert "foo" not in storage._memory
+
+        await storage.store("bar", create_response(), create_request())
+        storage._memory.entries["bar"] = storage._memory.entries["bar"]._replace(expires_at=0.0)
+        assert (await retrieve(storage, "bar"))[0].content == b"Hello."
+        assert storage.hits == {"storage": 1}
+
+    async def test_disabled(self):
+        storage = AsyncStorage(MemoryBlobStorage(), memory=CacheMemorySettings(max_size=0))
+        await storage.store("foo", create_response(), create_request())
+
+        assert (await retrieve(storage, "foo"))[0].content == b"Hello."
+        assert storage._memory is None
+        assert storage.hits == {"storage": 1}
+
+
+class TestCacheIndex:
+    def test_expired(self):
+        index = CacheIndex()
+        index.add("foo", CacheIndexEntry(30.0, 10))
+        index.add("bar", CacheIndexEntry(10.0, 10))
+        index.add("baz", CacheIndexEntry(20.0, 10))
+        index.add("bar", CacheIndexEntry(40.0, 10))
+
+        assert index.expired(35.0) == ["baz", "foo"]
+        assert index.expired(35.0) == []
+        assert index.expired(50.0) == ["bar"]
+
+    def test_over(self):
+        index = CacheIndex()
+        for key in ("foo", "bar", "baz"):
+            index.add(key, CacheIndexEntry(0.0, 10))
+        index.touch("foo")
+
+        assert index.size == 30
+        assert index.over(30) == []
+        assert index.over(15) == ["bar", "baz"]
+
+    def test_shared_bodies(self):
+        index = CacheIndex()
+        index.add("foo", CacheIndexEntry(0.0, 10, "body"))
+        index.add("bar", CacheIndexEntry(0.0, 10, "body"))
+
+        assert index.remove("foo") == ["foo"]
+        assert index.remove("foo") == []
+
+        index.add("bar", CacheIndexEntry(0.0, 10, "other"))
+        assert index.garbage == ["body"]
+        assert index.remove("bar") == ["bar", "other"]
+        assert (len(index), index.size) == (0, 0)
+
+
+class TestAsyncStorageSweeper:
+    async def test_expired_entries_are_removed(self):
+        blobs = MemoryBlobStorage()
+        storage = AsyncStorage(blobs, ttl=60)
+
+        old = Metadata(cache_key="foo", created_at=datetime.now(UTC) - timedelta(seconds=61), number_of_uses=0)
+        await storage.store("foo", create_response(b"x" * INLINE_BODY_THRESHOLD), create_request(), old)
+        await storage.store("bar", create_response(), create_request())
+        assert len(blobs._blobs) == 3
+
+        assert await storage.sweep() == 1
+        assert list(blobs._blobs) == ["bar"]
+        assert await retrieve(storage, "foo") is None
+
+    async def test_expired_entries_from_other_processes_are_removed_when_read(self):
+        blobs = MemoryBlobStorage()
+        old = Metadata(cache_key="foo", created_at=datetime.now(UTC) - timedelta(seconds=61), number_of_uses=0)
+        await AsyncStorage(blobs).store("foo", create_response(b"x" * INLINE_BODY_THRESHOLD), create_request(), old)
+        assert len(blobs._blobs) == 2
+
+        storage = AsyncStorage(blobs, ttl=60)
+        assert await retrieve(storage, "foo") is None
+        assert storage.misses["storage"] == 1
+        assert list(blobs._blobs) == []
+        assert "foo" not in storage._index
+
+    async def test_bodies_shared_with_messages_are_kept(self):
+        blobs = MemoryBlobStorage()
+        storage = AsyncStorage(blobs, ttl=60)
+        content = b"x" * INLINE_BODY_THRESHOLD
+
+        # a transaction message body, with the same content type and bytes as the cached response below
+        message_body = await blobs.put(Blob.from_data(content, content_type="text/plain"))
+
+        old = Metadata(cache_key="foo", created_at=datetime.now(UTC) - timedelta(seconds=61), number_of_uses=0)
+        await storage.store("foo", create_response(content), create_request(), old)
+        assert len(blobs._blobs) == 3
+
+        assert await storage.sweep() == 1
+        assert list(blobs._blobs) == [message_body.id]
+
+    async def test_least_recently_used_entries_are_evicted(self):
+        blobs = MemoryBlobStorage()
+        await AsyncStorage(blobs).store("foo", create_response(), create_request())
+
+        storage = AsyncStorage(blobs, max_size=2 * len(blobs._blobs["foo"].data))
+        for key in ("bar", "baz"):
+            await storage.store(key, create_response(), create_request())
+
+        # entries written by another process are indexed once read
+        assert await retrieve(storage, "foo") is not None
+        await retrieve(storage, "bar")
+
+        assert await storage.sweep() == 1
+        assert set(blobs._blobs) == {"foo", "bar"}
+        assert "baz" not in storage._memory
+
+    async def test_sweeper_runs_periodically(self):
+        storage = AsyncStorage(MemoryBlobStorage(), ttl=60, check_ttl_every=0)
+
+        await storage.store("foo", create_response(), create_request())
+        assert storage._sweeper is not None
+        await storage._sweeper
+
+        storage = AsyncStorage(MemoryBlobStorage(), check_ttl_every=0)
+        await storage.store("foo", create_response(), create_request())
+        assert storage._sweeper is None
+
+    async def test_entries_are_not_indexed_without_ttl_or_max_size(self):
+        storage = AsyncStorage(MemoryBlobStorage())
+        assert storage._index is None and storage._impl.index is None
+
+        await storage.store("foo", create_response(b"x" * INLINE_BODY_THRESHOLD), create_request())
+        assert await retrieve(storage, "foo") is not None
+        assert await retrieve(storage, "foo") is not None
+        assert await storage.sweep() == 0
@@ -0,0 +1,284 @@
+import asyncio
+import time
+from email.utils import formatdate
+
+import hishel
+import httpx
+import pytest
+from hishel._utils import BaseClock
+
+from harp_apps.http_client.contrib.hishel.storages import AsyncStorage
+from harp_apps.http_client.contrib.hishel.transports import (
+    AsyncCoalescingTransport,
+    AsyncStaleTransport,
+    StaleDirectives,
+    get_stale_directives,
+)
+from harp_apps.http_client.settings.cache import CacheCoalescingSettings, CacheMemorySettings, CacheStaleSettings
+from harp_apps.storage.services.blob_storages.dedup import DeduplicatingBlobStorage
+from harp_apps.storage.services.blob_storages.memory import MemoryBlobStorage
+
+
+class FakeClock(BaseClock):
+    def __init__(self):
+        self.value = int(time.time())
+
+    def now(self) -> int:
+        return self.value
+
+
+class SlowUpstreamTransport(httpx.AsyncBaseTransport):
+    def __init__(self, cache_control="max-age=60", delay=0.05):
+        self.cache_control = cache_control
+        self.delay = delay
+        self.clock = FakeClock()
+        self.calls = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return httpx.Response(
+            200,
+            headers={"cache-control": self.cache_control, "date": formatdate(self.clock.now(), usegmt=True)},
+            content=b"Hello.",
+        )
+
+
+def create_client(upstream: httpx.AsyncBaseTransport, **settings):
+    controller = hishel.Controller(clock=upstream.clock)
+    cache = hishel.AsyncCacheTransport(upstream, storage=AsyncStorage(MemoryBlobStorage()), controller=controller)
+    transport = AsyncCoalescingTransport(cache, controller, CacheCoalescingSettings(**settings))
+    return httpx.AsyncClient(transport=transport, base_url="http://example.com"), transport
+
+
+class TestAsyncCoalescingTransport:
+    async def test_concurrent_requests_are_coalesced(self):
+        upstream = SlowUpstreamTransport()
+        client, transport = create_client(upstream)
+
+        await client.get("/foo")
+        upstream.clock.value += 120
+
+        responses = await asyncio.gather(*(client.get("/foo") for _ in range(5)))
+
+        assert [response.content for response in responses] == [b"Hello."] * 5
+        assert [response.extensions["from_cache"] for response in responses] == [False] + [True] * 4
+        assert upstream.calls == 2
+        assert transport.coalesced == 4
+        assert transport._flights == {}
+
+    async def test_unknown_keys_are_not_coalesced(self):
+        upstream = SlowUpstreamTransport()
+        client, transport = create_client(upstream)
+
+        await asyncio.gather(client.get("/foo"), client.get("/foo"))
+
+        assert upstream.calls == 2
+        assert transport.coalesced == 0
+        assert len(transport._cacheable) == 1
+
+    async def test_different_keys_are_not_coalesced(self):
+        upstream = SlowUpstreamTransport()
+        client, transport = create_client(upstream)
+        await asyncio.gather(client.get("/foo"), client.get("/bar"))
+        upstream.clock.value += 120
+
+        await asyncio.gather(client.get("/foo"), client.get("/bar"), client.post("/foo"))
+
+        assert upstream.calls == 5
+        assert transport.coalesced == 0
+
+    async def test_no_cache_requests_are_not_coalesced(self):
+        upstream = SlowUpstreamTransport()
+        client, transport = create_client(upstream)
+        await client.get("/foo")
+        upstream.clock.value += 120
+
+        await asyncio.gather(client.get("/foo"), client.get("/foo", headers={"cache-control": "no-cache"}))
+
+        assert upstream.calls == 3
+        assert transport.coalesced == 0
+
+    async def test_non_cacheable_requests_are_not_serialized(self):
+        upstream = SlowUpstreamTransport(cache_control="no-store", delay=0.2)
+        client, transport = create_client(upstream)
+        await client.get("/foo")
+
+        started_at = time.monotonic()
+        await asyncio.gather(*(client.get("/foo") for _ in range(5)))
+
+        assert time.monotonic() - started_at < 0.35
+        assert upstream.calls == 6
+        assert transport.coalesced == 0
+
+    async def test_keys_are_forgotten_once_not_cacheable(self):
+        upstream = SlowUpstreamTransport()
+        client, transport = create_client(upstream)
+        await client.get("/foo")
+        assert len(transport._cacheable) == 1
+
+        upstream.cache_control = "no-store"
+        upstream.clock.value += 120
+        await client.get("/foo")
+        assert len(transport._cacheable) == 0
+
+    async def test_timeout(self):
+        upstream = SlowUpstreamTransport(delay=0.2)
+        client, transport = create_client(upstream, timeout=0.01)
+        await client.get("/foo")
+        upstream.clock.value += 120
+
+        await asyncio.gather(client.get("/foo"), client.get("/foo"))
+
+        assert upstream.calls == 3
+        assert transport.coalesced == 1
+
+
+class FakeUpstreamTransport(httpx.AsyncBaseTransport):
+    def __init__(self, clock: FakeClock, cache_control: str):
+        self.clock = clock
+        self.cache_control = cache_control
+        self.calls = 0
+        self.error = None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        if isinstance(self.error, Exception):
+            raise self.error
+        return httpx.Response(
+            self.error or 200,
+            headers={"cache-control": self.cache_control, "date": formatdate(self.clock.now(), usegmt=True)},
+            content=f"Hello {self.calls}.".encode(),
+        )
+
+
+def create_stale_client(cache_control: str, *, storage=None, **settings):
+    clock = FakeClock()
+    upstream = FakeUpstreamTransport(clock, cache_control)
+    storage = storage or AsyncStorage(MemoryBlobStorage())
+    controller = hishel.Controller(clock=clock)
+    cache = hishel.AsyncCacheTransport(upstream, storage=storage, controller=controller)
+    transport = AsyncStaleTransport(cache, storage, controller, upstream, CacheStaleSettings(**settings))
+    return httpx.AsyncClient(transport=transport, base_url="http://example.com"), transport, upstream, clock
+
+
+async def wait_for_refreshes(transport: AsyncStaleTransport):
+    await asyncio.gather(*transport._refreshes.values())
+
+
+class TestAsyncStaleTransport:
+    def test_get_stale_directives(self):
+        defaults = StaleDirectives(1, 2)
+        assert get_stale_directives([], defaults=defaults) == (1, 2)
+        assert get_stale_directives(
+            [(b"Cache-Control", b'max-age=60, stale-while-revalidate=30, stale-if-error="600"')], defaults=defaults
+        ) == (30, 600)
+        assert get_stale_directives([(b"cache-control", b"stale-while-revalidate")], defaults=defaults) == (1, 2)
+
+    async def test_stale_while_revalidate(self):
+        client, transport, upstream, clock = create_stale_client("max-age=10, stale-while-revalidate=60")
+
+        assert (await client.get("/foo")).content == b"Hello 1."
+        clock.value += 30
+
+        # stale responses are served right away, and refreshed once in the background
+        responses = await asyncio.gather(client.get("/foo"), client.get("/foo"))
+        assert [response.content for response in responses] == [b"Hello 1."] * 2
+        assert all(response.extensions["stale"] for response in responses)
+
+        await wait_for_refreshes(transport)
+        assert upstream.calls == 2
+
+        response = await client.get("/foo")
+        assert response.content == b"Hello 2."
+        assert response.extensions["from_cache"] is True
+        assert "stale" not in response.extensions
+
+    async def test_stale_while_revalidate_on_sql_blob_storage(self, sql_blob_storage):
+        # without the memory tier, entries are only read from the (content addressed) sql blobs
+        storage = AsyncStorage(DeduplicatingBlobStorage(sql_blob_storage), memory=CacheMemorySettings(max_size=0))
+        client, transport, upstream, clock = create_stale_client(
+            "max-age=10, stale-while-revalidate=60", storage=storage
+        )
+
+        assert (await client.get("/foo")).content == b"Hello 1."
+        clock.value += 30
+
+        assert (await client.get("/foo")).extensions["stale"]
+        await wait_for_refreshes(transport)
+
+        response = await client.get("/foo")
+        assert response.content == b"Hello 2."
+        assert "stale" not in response.extensions
+        assert upstream.calls == 2
+
+    async def test_single_lookup_per_request(self):
+        client, transport, upstream, clock = create_stale_client("max-age=10, stale-while-revalidate=60")
+        storage = transport._storage
+
+        await client.get("/foo")
+        assert (storage.hits, storage.misses) == ({}, {"memory": 1, "storage": 1})
+
+        await client.get("/foo")
+        assert (storage.hits, storage.misses) == ({"memory": 1}, {"memory": 1, "storage": 1})
+
+    async def test_stale_while_revalidate_window(self):
+        client, transport, upstream, clock = create_stale_client("max-age=10, stale-while-revalidate=60")
+
+        await client.get("/foo")
+        clock.value += 100
+
+        response = await client.get("/foo")
+        assert response.content == b"Hello 2."
+        assert transport._refreshes == {}
+
+    async def test_default_window(self):
+        client, transport, upstream, clock = create_stale_client("max-age=10", while_revalidate=60)
+
+        await client.get("/foo")
+        clock.value += 30
+
+        assert (await client.get("/foo")).extensions["stale"] is True
+        await wait_for_refreshes(transport)
+        assert upstream.calls == 2
+
+    async def test_max_refreshes(self):
+        client, transport, upstream, clock = create_stale_client(
+            "max-age=10, stale-while-revalidate=60", max_refreshes=0
+        )
+
+        await client.get("/foo")
+        clock.value += 30
+
+        assert (await client.get("/foo")).content == b"Hello 2."
+
+    async def test_must_revalidate(self):
+        client, transport, upstream, clock = create_stale_client(
+            "max-age=10, stale-while-revalidate=60, must-revalidate"
+        )
+
+        await client.get("/foo")
+        clock.value += 30
+
+        assert (await client.get("/foo")).content == b"Hello 2."
+
+    async def test_stale_if_error(self):
+        client, transport, upstream, clock = create_stale_client("max-age=10, stale-if-error=60")
+
+        await client.get("/foo")
+        clock.value += 30
+
+        upstream.error = httpx.ConnectError("Connection refused.")
+        response = await client.get("/foo")
+        assert (response.content, response.extensions["stale"]) == (b"Hello 1.", True)
+
+        upstream.error = 503
+        response = await client.get("/foo")
+        assert (response.status_code, response.content) == (200, b"Hello 1.")
+
+        clock.value += 60
+        assert (await client.get("/foo")).status_code == 503
+
+        upstream.error = httpx.ConnectError("Connection refused.")
+        with pytest.raises(httpx.ConnectError):
+            await client.get("/foo")
@@ -26,6 +26,7 @@ class BaseHttpClientSettingsTest(BaseConfigurableTest):
 class TestHttpClientSettings(BaseHttpClientSettingsTest):
     expected_verbose = {
         "cache": {
+            "coalescing": {"enabled": False, "max_keys": 10000, "timeout": 10.0},
             "controller": {
                 "allow_heuristics": False,
                 "allow_stale": False,
@@ -47,9 +48,13 @@ class TestHttpClientSettings(BaseHttpClientSettingsTest):
                 "type": "hishel.Controller",
             },
             "enabled": True,
+            "fallback_storage": {"max_items": None, "max_size": 67108864, "ttl": None},
+            "memory": {"max_entry_size": 1048576, "max_size": 16777216},
+            "stale": {"enabled": True, "if_error": 0, "max_refreshes": 10, "while_revalidate": 0},
             "storage": {
                 "base": "hishel.AsyncBaseStorage",
                 "check_ttl_every": 60.0,
+                "max_size": None,
                 "ttl": None,
                 "type": "harp_apps.http_client.contrib.hishel.storages.AsyncStorage",
             },
@@ -57,7 +62,7 @@ class TestHttpClientSettings(BaseHttpClientSettingsTest):
         },
         "proxy_transport": {"type": "harp_apps.http_client.transport.AsyncFilterableTransport"},
         "timeout": 30.0,
-        "transport": {"retries": 0, "type": "httpx.AsyncHTTPTransport", "verify": True},
+        "transport": {"retries": 0, "type": "harp_apps.http_client.transport.AsyncPooledTransport", "verify": True},
         "type": "httpx.AsyncClient",
     }
 
@@ -94,13 +99,33 @@ class TestHttpClientSettings(BaseHttpClientSettingsTest):
         system = await self.create_system(settings)
         http_client = system.provider.get("http_client")
 
+        assert type(http_client._transport).__name__ == "AsyncStaleTransport"
+        cache = http_client._transport._transport
+        assert type(cache).__name__ == "AsyncCacheTransport"
+        assert http_client._transport._controller is cache._controller
+        assert type(cache._storage).__name__ == "PrefetchedStorage"
+        assert http_client._transport._storage is cache._storage._storage
+        assert cache._controller._allow_heuristics is False
+        assert cache._controller._allow_stale is False
+        assert cache._controller._cacheable_methods == ["GET", "HEAD"]
+        assert cache._controller._cacheable_status_codes == list(hishel.HEURISTICALLY_CACHEABLE_STATUS_CODES)
+
+    async def test_with_cache_and_coalescing(self):
+        settings = self.create(cache={"coalescing": {"enabled": True}})
+
+        system = await self.create_system(settings)
+        http_client = system.provider.get("http_client")
+
+        assert type(http_client._transport).__name__ == "AsyncCoalescingTransport"
+        assert type(http_client._transport._transport).__name__ == "AsyncStaleTransport"
+
+    async def test_with_cache_without_stale(self):
+        settings = self.create(cache={"stale": {"enabled": False}})
+
+        system = await self.create_system(settings)
+        http_client = system.provider.get("http_client")
+
         assert type(http_client._transport).__name__ == "AsyncCacheTransport"
-        assert http_client._transport._controller._allow_heuristics is False
-        assert http_client._transport._controller._allow_stale is False
-        assert http_client._transport._controller._cacheable_methods == ["GET", "HEAD"]
-        assert http_client._transport._controller._cacheable_status_codes == list(
-            hishel.HEURISTICALLY_CACHEABLE_STATUS_CODES
-        )
 
     async def test_with_custom_cache(self):
         settings = HttpClientSettings(
@@ -120,10 +145,11 @@ class TestHttpClientSettings(BaseHttpClientSettingsTest):
         system = await self.create_system(settings)
         http_client = system.provider.get("http_client")
 
-        assert type(http_client._transport).__name__ == "AsyncCacheTransport"
+        cache = http_client._transport._transport
+        assert type(cache).__name__ == "AsyncCacheTransport"
 
-        assert isinstance(http_client._transport._controller, hishel.Controller)
-        assert http_client._transport._controller._allow_heuristics is False
-        assert http_client._transport._controller._allow_stale is True
-        assert http_client._transport._controller._cacheable_methods == ["GET"]
-        assert http_client._transport._controller._cacheable_status_codes == [200]
+        assert isinstance(cache._controller, hishel.Controller)
+        assert cache._controller._allow_heuristics is False
+        assert cache._controller._allow_stale is True
+        assert cache._controller._cacheable_methods == ["GET"]
+        assert cache._controller._cacheable_status_codes == [200]
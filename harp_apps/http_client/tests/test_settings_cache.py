@@ -18,6 +18,7 @@ class MyCustomTransport(AsyncCacheTransport):
 class TestCacheSettings(BaseConfigurableTest):
     type = CacheSettings
     expected_verbose = {
+        "coalescing": {"enabled": False, "max_keys": 10000, "timeout": 10.0},
         "controller": {
             "allow_heuristics": False,
             "allow_stale": False,
@@ -39,9 +40,13 @@ class TestCacheSettings(BaseConfigurableTest):
             "type": "hishel.Controller",
         },
         "enabled": True,
+        "fallback_storage": {"max_items": None, "max_size": 67108864, "ttl": None},
+        "memory": {"max_entry_size": 1048576, "max_size": 16777216},
+        "stale": {"enabled": True, "if_error": 0, "max_refreshes": 10, "while_revalidate": 0},
         "storage": {
             "base": "hishel.AsyncBaseStorage",
             "check_ttl_every": 60.0,
+            "max_size": None,
             "ttl": None,
             "type": "harp_apps.http_client.contrib.hishel.storages.AsyncStorage",
         },
@@ -0,0 +1,44 @@
+import httpx
+import pytest
+import respx
+
+from harp_apps.http_client.transport import AsyncPooledTransport, ConnectionPoolStats
+
+
+def create_request(endpoint=None):
+    return httpx.Request("GET", "http://example.com/", extensions={"harp": {"endpoint": endpoint}} if endpoint else {})
+
+
+class TestAsyncPooledTransport:
+    async def test_pools(self):
+        transport = AsyncPooledTransport(retries=0)
+        pool = transport.add_pool("api", limits=httpx.Limits(max_connections=5), http2=True)
+
+        assert pool._pool._max_connections == 5
+        assert pool._pool._http2 is True
+        assert transport.get_pool(create_request("api")) is pool
+        assert transport.get_pool(create_request("other")) is transport
+        assert transport.get_pool(create_request()) is transport
+
+        with pytest.raises(ValueError):
+            transport.add_pool("api", limits=httpx.Limits())
+
+        await transport.aclose()
+
+    @respx.mock
+    async def test_requests(self):
+        respx.get("http://example.com/").mock(return_value=httpx.Response(200))
+        transport = AsyncPooledTransport()
+        transport.add_pool("api", limits=httpx.Limits(max_connections=5))
+
+        async with httpx.AsyncClient(transport=transport) as client:
+            for endpoint in ("api", None):
+                request = client.build_request(
+                    "GET", "http://example.com/", extensions={"harp": {"endpoint": endpoint}}
+                )
+                assert (await client.send(request)).status_code == 200
+
+        assert transport.get_stats() == {
+            "default": ConnectionPoolStats(active=0, idle=0, waiting=0),
+            "api": ConnectionPoolStats(active=0, idle=0, waiting=0),
+        }
@@ -4,6 +4,8 @@ import pytest
 
 from harp.config.asdict import asdict
 from harp_apps.http_client.tests._base import BaseTestDefaultsWith
+from harp_apps.storage.services.blob_storages import find_blob_storage
+from harp_apps.storage.services.blob_storages.sql import SqlBlobStorage
 from harp_apps.storage.types import IBlobStorage
 
 
@@ -24,6 +26,7 @@ class TestDefaultsWithStorage(BaseTestDefaultsWith):
         assert asdict(system.config["http_client"]) == {}
         assert asdict(system.config["http_client"], verbose=True) == {
             "cache": {
+                "coalescing": {"enabled": False, "max_keys": 10000, "timeout": 10.0},
                 "controller": {
                     "allow_heuristics": False,
                     "allow_stale": False,
@@ -45,9 +48,13 @@ class TestDefaultsWithStorage(BaseTestDefaultsWith):
                     "type": "hishel.Controller",
                 },
                 "enabled": True,
+                "fallback_storage": {"max_items": None, "max_size": 67108864, "ttl": None},
+                "memory": {"max_entry_size": 1048576, "max_size": 16777216},
+                "stale": {"enabled": True, "if_error": 0, "max_refreshes": 10, "while_revalidate": 0},
                 "storage": {
                     "base": "hishel.AsyncBaseStorage",
                     "check_ttl_every": 60.0,
+                    "max_size": None,
                     "ttl": None,
                     "type": "harp_apps.http_client.contrib.hishel.storages.AsyncStorage",
                 },
@@ -57,16 +64,18 @@ class TestDefaultsWithStorage(BaseTestDefaultsWith):
             "timeout": 30.0,
             "transport": {
                 "retries": 0,
-                "type": "httpx.AsyncHTTPTransport",
+                "type": "harp_apps.http_client.transport.AsyncPooledTransport",
                 "verify": True,
             },
             "type": "httpx.AsyncClient",
         }
         assert asdict(system.config["storage"], verbose=True) == {
-            "blobs": {"type": "sql"},
+            "blobs": {"type": "sql", "dedup": ANY, "compression": ANY},
             "migrate": ANY,
             "url": ANY,
             "redis": None,
+            "worker": ANY,
         }
 
-        assert type(system.provider.get(IBlobStorage)).__name__ == "SqlBlobStorage"
+        assert type(system.provider.get(IBlobStorage)).__name__ == "DeduplicatingBlobStorage"
+        assert find_blob_storage(system.provider.get(IBlobStorage), SqlBlobStorage)
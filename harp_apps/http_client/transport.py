@@ -1,10 +1,11 @@
 from types import TracebackType
-from typing import Optional, Self, Type
+from typing import NamedTuple, Optional, Self, Type
 
-from httpx import AsyncBaseTransport, Request, Response
+from httpx import AsyncBaseTransport, AsyncHTTPTransport, Limits, Request, Response
 from whistle import IAsyncEventDispatcher
 
 from harp import get_logger
+from harp.settings import USE_PROMETHEUS
 from harp_apps.http_client.events import (
     EVENT_FILTER_HTTP_CLIENT_REQUEST,
     EVENT_FILTER_HTTP_CLIENT_RESPONSE,
@@ -13,6 +14,21 @@ from harp_apps.http_client.events import (
 
 logger = get_logger(__name__)
 
+#: Name of the connection pool used by requests without a dedicated one.
+DEFAULT_POOL = "default"
+
+_prometheus = None
+if USE_PROMETHEUS:
+    from prometheus_client import Gauge
+
+    _prometheus = {
+        "pool": Gauge(
+            "http_client_pool",
+            "Connections (active or idle) and requests waiting for a connection, per connection pool.",
+            ["pool", "state"],
+        ),
+    }
+
 
 class AsyncFilterableTransport(AsyncBaseTransport):
     def __init__(self, transport: AsyncBaseTransport, dispatcher: IAsyncEventDispatcher):
@@ -45,3 +61,74 @@ class AsyncFilterableTransport(AsyncBaseTransport):
         traceback: Optional[TracebackType] = None,
     ) -> None:
         await self.aclose()
+
+
+class ConnectionPoolStats(NamedTuple):
+    #: connections currently handling requests
+    active: int
+    #: kept alive connections, available for new requests
+    idle: int
+    #: requests waiting for a connection
+    waiting: int
+
+
+class AsyncPooledTransport(AsyncHTTPTransport):
+    """
+    Http transport that can use dedicated connection pools (with their own limits, keep-alive expiry and http/2
+    support) for the requests of some proxy endpoints, identified by the ``endpoint`` key of the ``harp`` request
+    extension, so that a slow upstream cannot exhaust the connections of the others. Other requests use the default
+    pool.
+
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._kwargs = kwargs
+        self._pools: dict[str, AsyncHTTPTransport] = {}
+        self._observe(DEFAULT_POOL, self)
+
+    def add_pool(self, name: str, *, limits: Limits, http2: bool = False) -> AsyncHTTPTransport:
+        """Creates a dedicated connection pool for the requests of an endpoint, using this transport's arguments
+        otherwise."""
+        if name in self._pools:
+            raise ValueError(f"Connection pool {name!r} already exists.")
+        pool = self._pools[name] = AsyncHTTPTransport(**(self._kwargs | {"limits": limits, "http2": http2}))
+        self._observe(name, pool)
+        return pool
+
+    def get_pool(self, request: Request) -> AsyncHTTPTransport:
+        name = (request.extensions.get("harp") or {}).get("endpoint")
+        return self._pools.get(name, self)
+
+    def get_stats(self) -> dict[str, ConnectionPoolStats]:
+        return {
+            DEFAULT_POOL: _get_pool_stats(self),
+            **{name: _get_pool_stats(pool) for name, pool in self._pools.items()},
+        }
+
+    async def handle_async_request(self, request: Request) -> Response:
+        pool = self.get_pool(request)
+        if pool is self:
+            return await super().handle_async_request(request)
+        return await pool.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        for pool in self._pools.values():
+            await pool.aclose()
+        await super().aclose()
+
+    @staticmethod
+    def _observe(name: str, transport: AsyncHTTPTransport):
+        if _prometheus:
+            for state in ConnectionPoolStats._fields:
+                _prometheus["pool"].labels(name, state).set_function(
+                    lambda state=state: getattr(_get_pool_stats(transport), state)
+                )
+
+
+def _get_pool_stats(transport: AsyncHTTPTransport) -> ConnectionPoolStats:
+    # httpcore does not expose these figures publicly, they are computed the same way as in its pool's repr.
+    pool = transport._pool
+    idle = sum(1 for connection in pool.connections if connection.is_idle())
+    waiting = sum(1 for request in pool._requests if request.is_queued())
+    return ConnectionPoolStats(active=len(pool.connections) - idle, idle=idle, waiting=waiting)
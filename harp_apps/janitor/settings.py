@@ -5,3 +5,7 @@ PERIOD = 600
 
 #: Number of days after we consider something as "old".
 OLD_AFTER = timedelta(days=60)
+
+#: Blobs written more recently than this are never considered as orphans by storages that need a mark-and-sweep, as the
+#: messages referencing them may not be written yet.
+ORPHAN_BLOBS_GRACE_PERIOD = timedelta(minutes=10)
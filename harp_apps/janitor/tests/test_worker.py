@@ -4,6 +4,7 @@ import pytest
 
 from harp_apps.janitor.settings import OLD_AFTER
 from harp_apps.janitor.worker import JanitorWorker
+from harp_apps.storage.services.blob_storages.filesystem import FilesystemBlobStorage
 from harp_apps.storage.services.sql import SqlStorage
 from harp_apps.storage.types import IBlobStorage
 from harp_apps.storage.utils.testing.mixins import StorageTestFixtureMixin
@@ -63,6 +64,27 @@ class TestJanitorWorker(StorageTestFixtureMixin):
             assert metrics["storage.blobs"] == 2
             assert metrics["storage.blobs.orphans"] == 0
 
+    async def test_sweep_orphan_blobs(
+        self, sql_storage: SqlStorage, filesystem_blob_storage: FilesystemBlobStorage, monkeypatch
+    ):
+        monkeypatch.setattr("harp_apps.janitor.worker.ORPHAN_BLOBS_GRACE_PERIOD", timedelta(seconds=-1))
+        worker = JanitorWorker(sql_storage, filesystem_blob_storage)
+
+        b1 = await self.create_blob(filesystem_blob_storage, "foo")
+        b2 = await self.create_blob(filesystem_blob_storage, "bar")
+        b3 = await self.create_blob(filesystem_blob_storage, "baz")
+
+        t = await self.create_transaction(sql_storage)
+        await self.create_message(
+            sql_storage, transaction_id=t.id, kind="misc", summary="foo", headers=b1.id, body=b2.id
+        )
+
+        await worker.delete_orphan_blobs()
+
+        assert await filesystem_blob_storage.exists(b1.id)
+        assert await filesystem_blob_storage.exists(b2.id)
+        assert not await filesystem_blob_storage.exists(b3.id)
+
     async def test_delete_old_transactions_but_keep_flagged_ones(
         self, sql_storage: SqlStorage, blob_storage: IBlobStorage
     ):
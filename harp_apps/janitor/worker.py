@@ -1,13 +1,17 @@
 import asyncio
+import time
 from typing import cast
 
 from harp import get_logger
 from harp.settings import USE_PROMETHEUS
+from harp.utils.processes import RuntimeLock
 from harp_apps.storage.services import SqlStorage
+from harp_apps.storage.services.blob_storages import find_blob_storage
+from harp_apps.storage.services.blob_storages.filesystem import FilesystemBlobStorage
 
 from ..storage.models.base import with_session
 from ..storage.types import IBlobStorage, IStorage
-from .settings import OLD_AFTER, PERIOD
+from .settings import OLD_AFTER, ORPHAN_BLOBS_GRACE_PERIOD, PERIOD
 
 logger = get_logger(__name__)
 
@@ -21,6 +25,9 @@ class JanitorWorker:
         self.session_factory = self.storage.session_factory
         self._running_lock = asyncio.Lock()
 
+        # in multi-process servers, only one worker cleans up the (shared) storage at a time.
+        self._runtime_lock = RuntimeLock("janitor")
+
         if USE_PROMETHEUS:
             from prometheus_client import Gauge
 
@@ -40,18 +47,23 @@ class JanitorWorker:
     async def run(self):
         """
         Once dependencies are ready, start the main loop (basically, run the `loop()` every PERIOD seconds), until
-        `stop()` is called.
+        `stop()` is called. In multi-process servers, the loop only runs in the worker holding the janitor lock, the
+        other ones trying to take it over every PERIOD seconds (if the holder exited).
         """
         # do not start before storage is ready
         async with self._running_lock:
             self.running = True
 
-            while self.running:
-                try:
-                    await self.loop()
-                except Exception as exc:
-                    logger.exception(exc)
-                await asyncio.sleep(PERIOD)
+            try:
+                while self.running:
+                    if self._runtime_lock.acquire():
+                        try:
+                            await self.loop()
+                        except Exception as exc:
+                            logger.exception(exc)
+                    await asyncio.sleep(PERIOD)
+            finally:
+                self._runtime_lock.release()
 
     async def loop(self):
         """
@@ -65,6 +77,10 @@ class JanitorWorker:
 
         await self.delete_orphan_blobs()
 
+        # Roll up recent transactions for the overview
+        logger.debug("🧹 Refresh transaction rollups...")
+        await self.storage.refresh_rollups()
+
         # Compute and store stored objecg counts as metrics
         logger.debug("🧹 Compute and store metrics...")
         await self.compute_and_store_metrics()
@@ -94,6 +110,8 @@ class JanitorWorker:
             result = await session.execute(self.storage.blobs.delete_orphans())
             await session.commit()
             count = result.rowcount if result.rowcount else 0
+        elif backend := find_blob_storage(self.blob_storage, FilesystemBlobStorage):
+            count = await self.sweep_orphan_blobs(backend, session=session)
         elif self.blob_storage.type == "redis":
             pass
         else:
@@ -112,6 +130,19 @@ class JanitorWorker:
                 count,
             )
 
+    async def sweep_orphan_blobs(self, blob_storage: FilesystemBlobStorage, /, *, session):
+        """
+        Mark-and-sweep orphan blobs of a storage that cannot be joined with messages in the database: mark all blob ids
+        referenced by messages, then sweep all other blobs, except the ones written recently (their messages may not
+        be written yet).
+        """
+        started_at = time.time()
+        referenced = set()
+        async for blob_id in await session.stream_scalars(self.storage.blobs.referenced_ids()):
+            referenced.add(blob_id)
+
+        return await blob_storage.sweep(referenced, before=started_at - ORPHAN_BLOBS_GRACE_PERIOD.total_seconds())
+
     @with_session
     async def compute_and_store_metrics(self, /, *, session):
         """
@@ -9,14 +9,19 @@ from typing import cast
 
 from httpx import AsyncClient
 
+from harp import get_logger
 from harp.config import Application
 from harp.config.events import OnBindEvent, OnBoundEvent, OnShutdownEvent
 from harp.utils.services import factory
+from harp_apps.http_client.transport import AsyncPooledTransport
 
+from .health import HealthTable, get_default_path
 from .settings import Proxy, ProxySettings
 
 PROXY_HEALTHCHECKS_TASK = "proxy.healthchecks"
 
+logger = get_logger(__name__)
+
 
 @factory(Proxy)
 def ProxyFactory(self, settings: ProxySettings) -> Proxy:
@@ -40,6 +45,31 @@ async def on_bound(event: OnBoundEvent):
     proxy: Proxy = event.provider.get(Proxy)
     http_client: AsyncClient = event.provider.get(AsyncClient)
 
+    health_path = proxy.settings.shared_health.path or get_default_path()
+    if proxy.settings.shared_health.enabled and health_path is None:
+        logger.info("Endpoints health is not shared, as the server runs in a single process.")
+    elif proxy.settings.shared_health.enabled:
+        health = HealthTable(health_path, size=proxy.settings.shared_health.size)
+        for endpoint in proxy.endpoints:
+            if endpoint.remote:
+                endpoint.remote.share_health(health, endpoint.settings.name)
+
+    pooled_endpoints = [endpoint for endpoint in proxy.endpoints if endpoint.settings.pool]
+    if pooled_endpoints:
+        transport = event.provider.get("http_client.transport")
+        if isinstance(transport, AsyncPooledTransport):
+            for endpoint in pooled_endpoints:
+                transport.add_pool(
+                    endpoint.settings.name,
+                    limits=endpoint.settings.pool.limits,
+                    http2=endpoint.settings.pool.http2,
+                )
+        else:
+            logger.warning(
+                f"Dedicated connection pools of proxy endpoints are ignored, as the http client transport "
+                f"({type(transport).__name__}) does not support them."
+            )
+
     for endpoint in proxy.endpoints:
         event.resolver.add(endpoint, dispatcher=event.dispatcher, http_client=http_client)
 
@@ -12,6 +12,8 @@ DOWN = -1
 CHECKING = 0
 UP = 1
 
+DEFAULT_STREAM_CAPTURE_SIZE = 64 * 1024
+
 DEFAULT_POOL = "default"
 FALLBACK_POOL = "fallback"
 AVAILABLE_POOLS = {DEFAULT_POOL, FALLBACK_POOL}
@@ -31,6 +33,9 @@ ERR_UNAVAILABLE_STATUS_CODE = 503
 ERR_UNAVAILABLE_MESSAGE = "Unavailable"
 ERR_UNAVAILABLE_VERBOSE = "Service Unavailable (remote server unavailable)"
 
+ERR_OVERLOADED_MESSAGE = "Overloaded"
+ERR_OVERLOADED_VERBOSE_MESSAGE = "Service Unavailable (remote concurrency limit reached)"
+
 ERR_TIMEOUT_STATUS_CODE = 504
 ERR_TIMEOUT_MESSAGE = "Timeout"
 ERR_TIMEOUT_VERBOSE_MESSAGE = "Gateway Timeout (remote server timeout)"
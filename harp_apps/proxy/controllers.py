@@ -1,15 +1,18 @@
+import asyncio
+import time
 from datetime import UTC, datetime
-from functools import cached_property, lru_cache
-from typing import Optional, cast
+from functools import cached_property, lru_cache, partial
+from typing import AsyncIterator, Callable, Optional, cast
 from urllib.parse import urlencode, urljoin, urlparse
 
 import httpx
-from httpx import AsyncClient, codes
+from httpx import AsyncByteStream, AsyncClient, ByteStream, codes
 from pyheck import shouty_snake
 from whistle import IAsyncEventDispatcher
 
 from harp import __parsed_version__, get_logger
-from harp.http import BaseHttpMessage, HttpError, HttpRequest, HttpResponse
+from harp.asgi import defer
+from harp.http import AsyncTeeStream, BaseHttpMessage, HttpError, HttpRequest, HttpResponse
 from harp.http.utils import parse_cache_control
 from harp.models import Transaction
 from harp.settings import USE_PROMETHEUS
@@ -21,6 +24,9 @@ from .constants import (
     BREAK_ON_NETWORK_ERROR,
     BREAK_ON_UNHANDLED_EXCEPTION,
     CHECKING,
+    DEFAULT_STREAM_CAPTURE_SIZE,
+    ERR_OVERLOADED_MESSAGE,
+    ERR_OVERLOADED_VERBOSE_MESSAGE,
     ERR_UNAVAILABLE_STATUS_CODE,
     ERR_UNHANDLED_MESSAGE,
     ERR_UNHANDLED_STATUS_CODE,
@@ -38,13 +44,16 @@ from .events import (
     TransactionEvent,
 )
 from .helpers import extract_tags_from_request
+from .retries import RetryPolicy
+from .settings.limiter import ConcurrencyLimitExceeded
 from .settings.remote import Remote
+from .settings.retries import RetrySettings
 
 logger = get_logger(__name__)
 
 _prometheus = None
 if USE_PROMETHEUS:
-    from prometheus_client import Counter, Histogram
+    from prometheus_client import Counter, Gauge, Histogram
 
     _prometheus = {
         "call": Counter("proxy_calls", "Requests to the proxy.", ["name", "method"]),
@@ -54,9 +63,33 @@ if USE_PROMETHEUS:
             ["name", "method"],
         ),
         "time.forward": Histogram("proxy_time_forward", "Forward time.", ["name", "method"]),
+        "limiter": Gauge("proxy_limiter", "Concurrency limiter state (limit, in_flight, queued).", ["name", "state"]),
+        "limiter.rejected": Counter(
+            "proxy_limiter_rejected", "Requests rejected by the concurrency limiter.", ["name"]
+        ),
     }
 
 
+class _OnCloseStream(AsyncByteStream):
+    """Response stream decorator, calling ``on_close`` once the stream is closed."""
+
+    def __init__(self, stream: AsyncByteStream, on_close: Callable[[], None]):
+        self._stream = stream
+        self._on_close = on_close
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            on_close, self._on_close = self._on_close, None
+            if on_close is not None:
+                on_close()
+
+
 class HttpProxyController:
     name: Optional[str] = None
     """Controller name, also refered as endpoint name (for example in
@@ -71,6 +104,18 @@ class HttpProxyController:
     remote: Remote
     """Base URL to proxy requests to."""
 
+    stream: bool = False
+    """Relay request and response bodies as they come instead of buffering them in memory."""
+
+    stream_capture_size: int = DEFAULT_STREAM_CAPTURE_SIZE
+    """Maximum size of the body prefix kept for transaction messages, when streaming."""
+
+    defer_events: bool = False
+    """Dispatch end of transaction events after the response has been sent, if running within a kernel."""
+
+    retries: Optional[RetryPolicy] = None
+    """Retry (and hedging) policy for idempotent requests, if any."""
+
     @cached_property
     def dispatcher(self):
         """Read-only reference to the event dispatcher."""
@@ -84,6 +129,10 @@ class HttpProxyController:
         dispatcher: Optional[IAsyncEventDispatcher] = None,
         name=None,
         logging=True,
+        stream: Optional[bool] = None,
+        stream_capture_size: Optional[int] = None,
+        defer_events: Optional[bool] = None,
+        retries: Optional[RetrySettings] = None,
     ):
         self.http_client = http_client
         self.remote = remote
@@ -92,6 +141,16 @@ class HttpProxyController:
         self.name = name or self.name
         self._logging = logging
         self._dispatcher = dispatcher or self._dispatcher
+        self.stream = self.stream if stream is None else stream
+        self.stream_capture_size = self.stream_capture_size if stream_capture_size is None else stream_capture_size
+        self.defer_events = self.defer_events if defer_events is None else defer_events
+        self.retries = RetryPolicy(retries) if retries else self.retries
+
+        if _prometheus and self.remote.limiter:
+            for state in ("limit", "in_flight", "queued"):
+                _prometheus["limiter"].labels(self.name or "-", state).set_function(
+                    lambda state=state: getattr(self.remote.limiter, state)
+                )
 
         # we only expose minimal information about the exact version
         if not self.user_agent:
@@ -162,9 +221,14 @@ class HttpProxyController:
             if self.user_agent:
                 context.request.headers["user-agent"] = self.user_agent
 
+            # streaming only makes sense if the request is going to be forwarded to a remote
+            streaming = bool(self.stream and remote_url and not context.response)
+            if streaming:
+                context.request.stream = AsyncTeeStream(context.request.stream, max_size=self.stream_capture_size)
+
             # create transaction (shouldn't that be before the filter operation ? it's debatable.)
             transaction = await self._create_transaction_from_request(
-                context.request, tags=extract_tags_from_request(context.request)
+                context.request, tags=extract_tags_from_request(context.request), dispatch_message=not streaming
             )
             if not remote_url:
                 transaction.extras["status_class"] = "ERR"
@@ -179,40 +243,46 @@ class HttpProxyController:
                     ),
                 )
 
-            await context.request.aread()
-            url = urljoin(remote_url, context.request.path) + (
-                f"?{urlencode(context.request.query)}" if context.request.query else ""
-            )
+            if not streaming:
+                await context.request.aread()
 
             with performances_observer("harp_http", labels=labels):
                 if not context.response:
                     # PROXY REQUEST
-                    remote_request: httpx.Request = self.http_client.build_request(
-                        context.request.method,
-                        url,
-                        headers=list(context.request.headers.items()),
-                        content=context.request.body,
-                        extensions={"harp": {"endpoint": self.name}},
-                    )
+                    remote_request = self._build_remote_request(remote_url, context.request, streaming=streaming)
                     context.request.extensions["remote_method"] = remote_request.method
                     context.request.extensions["remote_url"] = remote_request.url
 
                     self.debug(
-                        f"▶▶ {context.request.method} {url}",
+                        f"▶▶ {context.request.method} {remote_request.url}",
                         transaction=transaction,
                         extensions=remote_request.extensions,
                     )
 
                     # PROXY RESPONSE
-                    try:
-                        remote_response: httpx.Response = await self.http_client.send(remote_request)
-                    except Exception as exc:
-                        return await self.end_transaction(remote_url, transaction, exc)
+                    if self.retries and not streaming and self.retries.applies(context.request.method):
+                        remote_url, remote_response = await self._send_with_retries(
+                            remote_url, remote_request, context.request, transaction
+                        )
+                    else:
+                        try:
+                            remote_response = await self._send(remote_url, remote_request, stream=streaming)
+                        except Exception as exc:
+                            remote_response = exc
+
+                    if isinstance(remote_response, Exception):
+                        if streaming:
+                            await self._dispatch_streamed_request_message(transaction, context.request)
+                        return await self.end_transaction(remote_url, transaction, remote_response)
+
+                    if streaming:
+                        await self._dispatch_streamed_request_message(transaction, context.request)
 
                     self.remote.notify_url_status(remote_url, remote_response.status_code)
 
-                    await remote_response.aread()
-                    await remote_response.aclose()
+                    if not streaming:
+                        await remote_response.aread()
+                        await remote_response.aclose()
 
                     if self.remote[remote_url].status == CHECKING and 200 <= remote_response.status_code < 400:
                         self.remote.set_up(remote_url)
@@ -239,15 +309,212 @@ class HttpProxyController:
                             "cache_key", True
                         )
 
-                    context.response = HttpResponse(
-                        remote_response.content, status=remote_response.status_code, headers=response_headers
-                    )
+                    if streaming:
+                        response_stream = AsyncTeeStream(
+                            remote_response.aiter_bytes(),
+                            max_size=self.stream_capture_size,
+                            on_complete=remote_response.aclose,
+                        )
+                        context.response = HttpResponse(
+                            b"", status=remote_response.status_code, headers=response_headers
+                        )
+                        context.response.stream = response_stream
+                    else:
+                        context.response = HttpResponse(
+                            remote_response.content, status=remote_response.status_code, headers=response_headers
+                        )
             await self.adispatch(EVENT_FILTER_PROXY_RESPONSE, context)
 
+            if streaming and context.response.stream is response_stream:
+                # the body will be relayed to the client as it comes, and the transaction will end once it went
+                # through (or if the client goes away), with only the captured prefix attached to it.
+                response_stream.on_complete = partial(
+                    self._end_streamed_transaction, remote_url, transaction, context.response, remote_response
+                )
+                return context.response
+
             await context.response.aread()
+            if streaming:
+                # response was read or replaced by a filter, release the remote connection
+                await remote_response.aclose()
 
             return await self.end_transaction(remote_url, transaction, context.response)
 
+    def _build_remote_request(self, remote_url: str, request: HttpRequest, *, streaming=False) -> httpx.Request:
+        url = urljoin(remote_url, request.path) + (f"?{urlencode(request.query)}" if request.query else "")
+        headers = list(request.headers.items())
+        netloc = urlparse(remote_url).netloc
+        if request.headers.get("host") not in (None, netloc):
+            # retries may target another remote endpoint than the one chosen first
+            headers = [(k, v) for k, v in headers if k.lower() != "host"] + [("host", netloc)]
+        return self.http_client.build_request(
+            request.method,
+            url,
+            headers=headers,
+            content=request.stream if streaming else request.body,
+            extensions={"harp": {"endpoint": self.name}},
+        )
+
+    async def _send(
+        self, remote_url: str, remote_request: httpx.Request, *, stream=False, observe=True
+    ) -> httpx.Response:
+        """Sends a request to a remote endpoint, within the remote's concurrency limit (if any), keeping track of its
+        outstanding requests and latency. Streamed responses count as outstanding (and hold their concurrency slot)
+        until they are closed.
+
+        Unless ``observe`` is false (hedges and retries), the latency is also recorded for the hedging delay, including
+        for cancelled attempts (with the time they had been waiting), so that the slow ones stay in the window."""
+        limiter = self.remote.limiter
+        if limiter is not None:
+            try:
+                await limiter.acquire()
+            except ConcurrencyLimitExceeded:
+                if _prometheus:
+                    _prometheus["limiter.rejected"].labels(self.name or "-").inc()
+                raise
+
+        self.remote.start_request(remote_url)
+        started_at = time.monotonic()
+        try:
+            remote_response: httpx.Response = await self.http_client.send(remote_request, stream=stream)
+        except asyncio.CancelledError:
+            if self.retries and observe:
+                self.retries.observe(time.monotonic() - started_at)
+            self.remote.end_request(remote_url)
+            if limiter is not None:
+                limiter.release()
+            raise
+        except Exception:
+            elapsed = time.monotonic() - started_at
+            self.remote.end_request(remote_url, elapsed)
+            if limiter is not None:
+                limiter.release(elapsed, dropped=True)
+            raise
+
+        # cached responses say nothing about the remote endpoint's latency
+        elapsed = None if remote_response.extensions.get("from_cache") else time.monotonic() - started_at
+        if self.retries and observe and elapsed is not None:
+            self.retries.observe(elapsed)
+
+        def end_request():
+            self.remote.end_request(remote_url, elapsed)
+            if limiter is not None:
+                limiter.release(elapsed)
+
+        if stream:
+            remote_response.stream = _OnCloseStream(remote_response.stream, end_request)
+        else:
+            end_request()
+        return remote_response
+
+    async def _send_with_retries(
+        self, remote_url: str, remote_request: httpx.Request, request: HttpRequest, transaction: Transaction
+    ) -> tuple[str, httpx.Response | Exception]:
+        """
+        Sends an idempotent (buffered) request, sending it again to another remote endpoint if it fails, or if it did
+        not get a response after the hedging delay, as long as the retry budget allows it. The first successful
+        response wins, and the other attempts are cancelled.
+
+        Returns the url of the remote endpoint that answered and its response, or the last failure (response with a
+        retryable status, or exception) if none succeeded. The other finished attempts are already accounted for.
+
+        """
+        policy = self.retries
+        policy.budget.deposit()
+        urls = [remote_url]
+        pending = {asyncio.ensure_future(self._send(remote_url, remote_request)): remote_url}
+        hedging = True
+
+        try:
+            while True:
+                delay = policy.get_hedge_delay() if hedging and len(urls) < policy.settings.max_attempts else None
+                done, _ = await asyncio.wait(pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # slower than usual, race a duplicate request against the pending ones
+                    hedging = self._start_attempt(pending, urls, request, transaction, reason="hedge")
+                    continue
+
+                results = [(pending.pop(task), _get_task_result(task)) for task in done]
+                succeeded = [
+                    (url, result)
+                    for url, result in results
+                    if not isinstance(result, Exception) and result.status_code not in policy.settings.on_status
+                ]
+                if succeeded:
+                    # attempts finishing together with the winner are accounted for (and closed) as well
+                    for url, result in results:
+                        if result is not succeeded[0][1]:
+                            await self._discard_attempt(url, result)
+                    return succeeded[0]
+
+                for index, (url, result) in enumerate(results):
+                    # the concurrency limit is shared by all the endpoints of the remote, do not insist
+                    if len(urls) < policy.settings.max_attempts and not isinstance(result, ConcurrencyLimitExceeded):
+                        self._start_attempt(pending, urls, request, transaction, reason="retry")
+                    if not pending and index == len(results) - 1:
+                        return url, result
+                    await self._discard_attempt(url, result)
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+
+    def _start_attempt(self, pending: dict, urls: list[str], request: HttpRequest, transaction: Transaction, *, reason):
+        """Sends the request to another remote endpoint, if there is one available and the retry budget allows it, and
+        returns whether it did."""
+        try:
+            url = self.remote.get_url(exclude=urls)
+        except IndexError:
+            return False
+        if not self.retries.budget.withdraw():
+            return False
+
+        remote_request = self._build_remote_request(url, request)
+        self.debug(f"▶▶ {request.method} {remote_request.url} ({reason})", transaction=transaction)
+        pending[asyncio.ensure_future(self._send(url, remote_request, observe=False))] = url
+        urls.append(url)
+        transaction.extras["attempts"] = len(urls)
+        return True
+
+    async def _discard_attempt(self, remote_url: str, result: httpx.Response | Exception):
+        """Accounts for the result of an attempt that is not used (reporting it to the remote endpoint's circuit
+        breaker), and closes its response."""
+        if isinstance(result, Exception):
+            self._break_on_exception(remote_url, result)
+        else:
+            self.remote.notify_url_status(remote_url, result.status_code)
+            await result.aclose()
+
+    def _break_on_exception(self, remote_url: str, exc: Exception):
+        if isinstance(exc, ConcurrencyLimitExceeded):
+            # the remote endpoint did not even get the request
+            return
+
+        error_kind = BREAK_ON_NETWORK_ERROR if _get_base_network_error_type(type(exc)) else BREAK_ON_UNHANDLED_EXCEPTION
+        if error_kind in self.remote.settings.break_on:
+            if self.remote[remote_url].failure(shouty_snake(type(exc).__name__)):
+                self.remote.refresh()
+
+    async def _dispatch_streamed_request_message(self, transaction: Transaction, request: HttpRequest):
+        stream = request.stream
+        if isinstance(stream, AsyncTeeStream):
+            request.stream = ByteStream(stream.prefix)
+        await self.adispatch(EVENT_TRANSACTION_MESSAGE, HttpMessageEvent(transaction, request))
+
+    async def _end_streamed_transaction(
+        self,
+        remote_url: str,
+        transaction: Transaction,
+        response: HttpResponse,
+        remote_response: httpx.Response,
+    ):
+        await remote_response.aclose()
+        stream = response.stream
+        if isinstance(stream, AsyncTeeStream):
+            response.stream = ByteStream(stream.prefix)
+        await self.end_transaction(remote_url, transaction, response)
+
     async def end_transaction(
         self,
         remote_url: Optional[str],
@@ -259,11 +526,16 @@ class HttpProxyController:
         transaction.elapsed = spent
 
         if isinstance(response, Exception):
-            error_kind = BREAK_ON_UNHANDLED_EXCEPTION
-            error_name = shouty_snake(type(response).__name__)
+            self._break_on_exception(remote_url, response)
 
-            if network_error_type := _get_base_network_error_type(type(response)):
-                error_kind = BREAK_ON_NETWORK_ERROR
+            if isinstance(response, ConcurrencyLimitExceeded):
+                response = HttpError(
+                    ERR_OVERLOADED_MESSAGE,
+                    exception=response,
+                    status=ERR_UNAVAILABLE_STATUS_CODE,
+                    verbose_message=ERR_OVERLOADED_VERBOSE_MESSAGE,
+                )
+            elif network_error_type := _get_base_network_error_type(type(response)):
                 _status_code, _message, _verbose_message = NETWORK_ERRORS[network_error_type]
                 response = HttpError(
                     _message,
@@ -279,10 +551,6 @@ class HttpProxyController:
                     verbose_message=ERR_UNHANDLED_VERBOSE_MESSAGE,
                 )
 
-            if error_kind in self.remote.settings.break_on:
-                if self.remote[remote_url].failure(error_name):
-                    self.remote.refresh()
-
         if isinstance(response, HttpError):
             transaction.extras["status_class"] = "ERR"
             self.warning(
@@ -300,12 +568,15 @@ class HttpProxyController:
         else:
             transaction.tpdex = tpdex(transaction.elapsed)
 
-        # dispatch message event for response
-        # TODO delay after response is sent ?
-        await self.adispatch(EVENT_TRANSACTION_MESSAGE, HttpMessageEvent(transaction, response))
-        # dispatch transaction ended event
-        # TODO delay after response is sent ?
-        await self.adispatch(EVENT_TRANSACTION_ENDED, TransactionEvent(transaction))
+        async def dispatch_end_of_transaction_events():
+            # dispatch message event for response
+            await self.adispatch(EVENT_TRANSACTION_MESSAGE, HttpMessageEvent(transaction, response))
+            # dispatch transaction ended event
+            await self.adispatch(EVENT_TRANSACTION_ENDED, TransactionEvent(transaction))
+
+        # unless deferred after the response is sent (only possible within a kernel), dispatch events now.
+        if not (self.defer_events and defer(dispatch_end_of_transaction_events)):
+            await dispatch_end_of_transaction_events()
 
         if isinstance(response, HttpError):
             return HttpResponse(
@@ -317,7 +588,7 @@ class HttpProxyController:
 
         return cast(HttpResponse, response)
 
-    async def _create_transaction_from_request(self, request: HttpRequest, *, tags=None):
+    async def _create_transaction_from_request(self, request: HttpRequest, *, tags=None, dispatch_message=True):
         transaction = Transaction(
             id=generate_transaction_id_ksuid(),
             type="http",
@@ -342,8 +613,9 @@ class HttpProxyController:
         # we don't really want to await this, should run in background ? or use an async queue ?
         await self.adispatch(EVENT_TRANSACTION_STARTED, TransactionEvent(transaction))
 
-        # dispatch message event for request
-        await self.adispatch(EVENT_TRANSACTION_MESSAGE, HttpMessageEvent(transaction, request))
+        # dispatch message event for request (streamed requests are dispatched once they went through)
+        if dispatch_message:
+            await self.adispatch(EVENT_TRANSACTION_MESSAGE, HttpMessageEvent(transaction, request))
 
         return transaction
 
@@ -351,6 +623,14 @@ class HttpProxyController:
         return f"{type(self).__name__}({self.remote!r}, name={self.name!r})"
 
 
+def _get_task_result(task: asyncio.Task):
+    """Returns the result of a finished task, or the exception it raised."""
+    try:
+        return task.result()
+    except Exception as exc:
+        return exc
+
+
 @lru_cache
 def _get_base_network_error_type(exc_type):
     for _type in NETWORK_ERRORS:
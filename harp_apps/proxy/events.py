@@ -76,6 +76,18 @@ class ProxyFilterEvent(Event):
             self.set_response(context["response"])
         return context
 
+    def execute_function(self, *functions: Callable):
+        """
+        Executes compiled rule functions (see :data:`RULE_PARAMETERS <harp_apps.rules.models.scripts.RULE_PARAMETERS>`)
+        in order, which get the execution context as arguments instead of a dict, and return the response. The response
+        is checked after each function, so that an invalid response fails before the next function runs.
+        """
+        rule = self._get_rule_name()
+        for function in functions:
+            response = function(self.request, self.response, self.endpoint, logger, self.stop_propagation, rule)
+            if response is not self.response:
+                self.set_response(response)
+
 
 class TransactionEvent(Event):
     def __init__(self, transaction: Transaction):
@@ -0,0 +1,237 @@
+"""
+Endpoint health shared between the processes of a multi-process server (see ``harp server --workers``), using a
+memory mapped file.
+
+"""
+
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Mapping, NamedTuple, Optional
+
+from harp.utils.processes import RUNTIME_DIR_ENV
+from harp_apps.proxy.constants import CHECKING, DOWN
+
+if TYPE_CHECKING:
+    from harp_apps.proxy.settings.remote import RemoteEndpoint
+
+MAGIC = b"HHT\x00"
+VERSION = 1
+
+#: magic, version, generation (incremented on every write)
+_HEADER = struct.Struct("<4sB3xQ")
+_GENERATION_OFFSET = 8
+#: key digest, sequence (odd while being written), status, updated at, lease owner, lease expiry, reasons
+_SLOT = struct.Struct("<16sQbdid200p")
+_SLOT_FIELDS = ("status", "updated_at", "lease_owner", "lease_expires_at", "reasons")
+_SEQUENCE = struct.Struct("<Q")
+_EMPTY_KEY = bytes(16)
+
+#: Maximum size of the (comma separated) failure reasons of a record, in bytes.
+MAX_REASONS_SIZE = 199
+
+#: Number of attempts to read a consistent slot, while it is being written.
+MAX_READ_RETRIES = 1000
+
+
+class HealthRecord(NamedTuple):
+    status: int
+    failure_reasons: Optional[set]
+    updated_at: float
+
+
+def get_default_path() -> Optional[str]:
+    """Default table path, in the runtime directory of a multi-process server (removed by the supervisor when it exits),
+    or None outside of one, as there is nobody to share the health with."""
+    runtime_dir = os.environ.get(RUNTIME_DIR_ENV)
+    return os.path.join(runtime_dir, "health.bin") if runtime_dir else None
+
+
+class HealthTable:
+    """
+    Fixed size table of health records (and prober leases), in a memory mapped file that all the processes of a
+    server open.
+
+    Slots are allocated once per key (using open addressing on a digest of the key) and never move. Reads are lock
+    free: each slot has a sequence number, odd while the slot is being written, and readers retry until they read the
+    same even sequence number before and after the slot's content. Writes are serialized using a lock on the file, and
+    increment a global generation counter, so that processes know cheaply when something changed.
+
+    """
+
+    def __init__(self, path: str, size: int = 1024):
+        self.path = path
+        self.size = size
+        self._length = _HEADER.size + size * _SLOT.size
+        self._slots: dict[str, int] = {}
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self._lock():
+            length = os.fstat(self._fd).st_size
+            if length == 0:
+                os.ftruncate(self._fd, self._length)
+                os.pwrite(self._fd, _HEADER.pack(MAGIC, VERSION, 0), 0)
+                length = self._length
+        if length != self._length:
+            os.close(self._fd)
+            raise ValueError(f"Health table {path} exists with a different size.")
+        self._mmap = mmap.mmap(self._fd, self._length)
+
+        magic, version, _ = _HEADER.unpack_from(self._mmap)
+        if (magic, version) != (MAGIC, VERSION):
+            self.close()
+            raise ValueError(f"Invalid health table in {path}.")
+
+    @property
+    def generation(self) -> int:
+        return _SEQUENCE.unpack_from(self._mmap, _GENERATION_OFFSET)[0]
+
+    def allocate(self, key: str) -> int:
+        """Returns the index of the slot for a key, allocating it if needed."""
+        if key in self._slots:
+            return self._slots[key]
+
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        with self._lock():
+            start = int.from_bytes(digest[:8], "little") % self.size
+            for probe in range(self.size):
+                index = (start + probe) % self.size
+                offset = self._offset(index)
+                current = self._mmap[offset : offset + 16]
+                if current == _EMPTY_KEY:
+                    self._mmap[offset : offset + 16] = digest
+                if current in (_EMPTY_KEY, digest):
+                    self._slots[key] = index
+                    return index
+        raise ValueError(f"Health table {self.path} is full ({self.size} slots).")
+
+    def get(self, key: str) -> Optional[HealthRecord]:
+        """Returns the health record of a key, or None if it was never set."""
+        _, _, status, updated_at, _, _, reasons = self._read(self.allocate(key))
+        if not updated_at:
+            return None
+        reasons = reasons.decode(errors="ignore")
+        return HealthRecord(status, set(reasons.split(",")) if reasons else None, updated_at)
+
+    def set(self, key: str, status: int, failure_reasons: Optional[set] = None):
+        reasons = ",".join(sorted(failure_reasons or ())).encode()[:MAX_REASONS_SIZE]
+        index = self.allocate(key)
+        with self._lock():
+            self._write(index, status=status, updated_at=time.time(), reasons=reasons)
+
+    def acquire(self, key: str, owner: int, ttl: float) -> bool:
+        """Acquires (or renews) a lease for ``ttl`` seconds, unless another owner holds it, and returns whether the
+        given owner holds it."""
+        index = self.allocate(key)
+        with self._lock():
+            _, _, _, _, current_owner, expires_at, _ = self._read(index)
+            now = time.time()
+            if current_owner not in (0, owner) and expires_at > now:
+                return False
+            self._write(index, lease_owner=owner, lease_expires_at=now + ttl)
+        return True
+
+    def close(self):
+        self._mmap.close()
+        os.close(self._fd)
+
+    def _offset(self, index: int) -> int:
+        return _HEADER.size + index * _SLOT.size
+
+    def _read(self, index: int) -> tuple:
+        offset = self._offset(index)
+        for _ in range(MAX_READ_RETRIES):
+            sequence = _SEQUENCE.unpack_from(self._mmap, offset + 16)[0]
+            if sequence % 2 == 0:
+                values = _SLOT.unpack_from(self._mmap, offset)
+                if _SEQUENCE.unpack_from(self._mmap, offset + 16)[0] == sequence:
+                    return values
+        # a writer most probably died while writing this slot, use what's there
+        return _SLOT.unpack_from(self._mmap, offset)
+
+    def _write(self, index: int, **changes):
+        """Updates a slot, the caller must hold the table lock."""
+        offset = self._offset(index)
+        key, sequence, *values = _SLOT.unpack_from(self._mmap, offset)
+        values = dict(zip(_SLOT_FIELDS, values)) | changes
+        sequence += sequence % 2
+
+        _SEQUENCE.pack_into(self._mmap, offset + 16, sequence + 1)
+        _SLOT.pack_into(self._mmap, offset, key, sequence + 1, *(values[field] for field in _SLOT_FIELDS))
+        _SEQUENCE.pack_into(self._mmap, offset + 16, sequence + 2)
+        _SEQUENCE.pack_into(self._mmap, _GENERATION_OFFSET, self.generation + 1)
+
+    @contextmanager
+    def _lock(self):
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+
+class SharedRemoteHealth:
+    """
+    Shares the health of a remote's endpoints through a :class:`HealthTable`, under keys prefixed by ``name``.
+
+    Only the endpoints whose status (or failure reasons) changed locally since the last known shared state are
+    published, so that processes do not overwrite changes they did not see yet. Endpoints marked as down by a process
+    that did not set them back to checking after ``check_after`` seconds (most probably because it exited) are
+    considered as checking, once the delay is over (even if nothing else changed in the table).
+
+    """
+
+    def __init__(self, table: HealthTable, name: str, *, check_after: float):
+        self.table = table
+        self.name = name
+        self.check_after = check_after
+
+        #: last known shared state, by endpoint url
+        self._known: dict[str, tuple[int, Optional[set]]] = {}
+        self._generation = None
+
+        #: earliest time a shared down status will be considered as checking, if any
+        self._expires_at: Optional[float] = None
+
+    def publish(self, endpoints: Mapping[str, "RemoteEndpoint"]):
+        for url, endpoint in endpoints.items():
+            state = (endpoint.status, endpoint.failure_reasons)
+            if self._known.get(url, state) != state:
+                self.table.set(self._key(url), endpoint.status, endpoint.failure_reasons)
+            self._known[url] = state
+
+    def sync(self, endpoints: Mapping[str, "RemoteEndpoint"]) -> bool:
+        """Pulls the shared state into the local endpoints, if anything changed in the table since the last sync (or a
+        down status expired), and returns whether it did."""
+        generation, now = self.table.generation, time.time()
+        if generation == self._generation and (self._expires_at is None or now < self._expires_at):
+            return False
+        self._generation, self._expires_at = generation, None
+
+        for url, endpoint in endpoints.items():
+            record = self.table.get(self._key(url))
+            if record is None:
+                self._known.setdefault(url, (endpoint.status, endpoint.failure_reasons))
+                continue
+
+            status = record.status
+            if status == DOWN:
+                expires_at = record.updated_at + self.check_after
+                if expires_at < now:
+                    status = CHECKING
+                elif self._expires_at is None or expires_at < self._expires_at:
+                    self._expires_at = expires_at
+            endpoint.status, endpoint.failure_reasons = status, record.failure_reasons
+            self._known[url] = (record.status, record.failure_reasons)
+        return True
+
+    def acquire_prober(self, ttl: float) -> bool:
+        """Elects one prober per remote among the processes sharing the table, and returns whether it is us."""
+        return self.table.acquire(self._key("#probe"), os.getpid(), ttl)
+
+    def _key(self, url: str) -> str:
+        return f"{self.name}:{url}"
@@ -0,0 +1,101 @@
+"""
+Runtime state of the proxy endpoints retry policies (see :class:`RetrySettings
+<harp_apps.proxy.settings.retries.RetrySettings>`).
+
+"""
+
+import math
+import time
+from collections import deque
+from typing import Optional
+
+from harp_apps.proxy.settings.retries import RetrySettings
+
+#: Number of recent latencies used to compute the hedging delay.
+LATENCY_WINDOW_SIZE = 1000
+
+#: Number of latencies to observe before hedging requests.
+MIN_LATENCY_SAMPLES = 20
+
+#: Duration of the sliding window of a retry budget, in seconds.
+BUDGET_WINDOW = 10
+
+
+class LatencyWindow:
+    """Recent latencies of an endpoint, and their percentiles (computed again every few observations)."""
+
+    def __init__(self, size: int = LATENCY_WINDOW_SIZE, *, min_samples: int = MIN_LATENCY_SAMPLES):
+        self.latencies = deque(maxlen=size)
+        self.min_samples = min_samples
+        self._sorted = None
+        self._outdated = 0
+
+    def observe(self, latency: float):
+        self.latencies.append(latency)
+        self._outdated += 1
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """Returns the given percentile of the recent latencies, or None if there are not enough of them yet."""
+        if len(self.latencies) < self.min_samples:
+            return None
+        if self._sorted is None or self._outdated > len(self.latencies) // 10:
+            self._sorted = sorted(self.latencies)
+            self._outdated = 0
+        index = math.ceil(percentile / 100 * len(self._sorted)) - 1
+        return self._sorted[max(0, index)]
+
+
+class RetryBudget:
+    """Limits the retries to a ratio of the requests, over a sliding window of ``window`` seconds, with a minimum rate
+    of retries always allowed."""
+
+    def __init__(self, ratio: float, *, min_per_second: float = 1.0, window: int = BUDGET_WINDOW):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.window = window
+        #: [second, requests, retries] buckets, oldest first
+        self._buckets: deque[list[int]] = deque()
+
+    def deposit(self):
+        """Takes a request into account."""
+        self._current()[1] += 1
+
+    def withdraw(self) -> bool:
+        """Takes a retry into account if the budget allows it, and returns whether it does."""
+        current = self._current()
+        requests = sum(bucket[1] for bucket in self._buckets)
+        retries = sum(bucket[2] for bucket in self._buckets)
+        if retries >= self.min_per_second * self.window + self.ratio * requests:
+            return False
+        current[2] += 1
+        return True
+
+    def _current(self) -> list[int]:
+        second = int(time.monotonic())
+        while self._buckets and self._buckets[0][0] <= second - self.window:
+            self._buckets.popleft()
+        if not self._buckets or self._buckets[-1][0] != second:
+            self._buckets.append([second, 0, 0])
+        return self._buckets[-1]
+
+
+class RetryPolicy:
+    def __init__(self, settings: RetrySettings):
+        self.settings = settings
+        self.budget = RetryBudget(settings.budget, min_per_second=settings.min_retries_per_second)
+        self.latencies = LatencyWindow()
+
+    def applies(self, method: str) -> bool:
+        return self.settings.max_attempts > 1 and method.upper() in self.settings.methods
+
+    def observe(self, latency: float):
+        self.latencies.observe(latency)
+
+    def get_hedge_delay(self) -> Optional[float]:
+        """Returns how long to wait for a response before sending a duplicate request, or None to wait forever."""
+        if self.settings.hedge_percentile is None:
+            return None
+        latency = self.latencies.percentile(self.settings.hedge_percentile)
+        if latency is None:
+            return None
+        return max(latency, self.settings.hedge_min_delay)
@@ -3,9 +3,13 @@ from functools import cached_property
 from harp.config import Configurable, Stateful
 
 from .endpoint import Endpoint, EndpointSettings
+from .health import SharedHealthSettings
+from .pool import ConnectionPoolSettings
 from .remote import Remote, RemoteEndpoint, RemoteEndpointSettings, RemoteProbe, RemoteProbeSettings, RemoteSettings
+from .retries import RetrySettings
 
 __all__ = [
+    "ConnectionPoolSettings",
     "Endpoint",
     "EndpointSettings",
     "Proxy",
@@ -16,6 +20,8 @@ __all__ = [
     "RemoteProbe",
     "RemoteProbeSettings",
     "RemoteSettings",
+    "RetrySettings",
+    "SharedHealthSettings",
 ]
 
 
@@ -37,6 +43,9 @@ class ProxySettings(BaseProxySettings):
 
     endpoints: list[EndpointSettings] = []
 
+    #: Endpoints health shared between the processes of a multi-process server.
+    shared_health: SharedHealthSettings = SharedHealthSettings()
+
 
 class Proxy(Stateful[ProxySettings]):
     @cached_property
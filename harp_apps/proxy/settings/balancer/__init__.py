@@ -0,0 +1,36 @@
+from typing import Annotated, Union
+
+from pydantic import Discriminator
+
+from .least_requests import (
+    LeastRequestsBalancer,
+    LeastRequestsBalancerSettings,
+    PowerOfTwoBalancer,
+    PowerOfTwoBalancerSettings,
+)
+from .peak_ewma import PeakEwmaBalancer, PeakEwmaBalancerSettings
+from .round_robin import (
+    RoundRobinBalancer,
+    RoundRobinBalancerSettings,
+    WeightedRoundRobinBalancer,
+    WeightedRoundRobinBalancerSettings,
+)
+
+BalancerSettings = Annotated[
+    Union[
+        LeastRequestsBalancerSettings,
+        PeakEwmaBalancerSettings,
+        PowerOfTwoBalancerSettings,
+        RoundRobinBalancerSettings,
+        WeightedRoundRobinBalancerSettings,
+    ],
+    Discriminator("type"),
+]
+
+Balancer = Union[
+    LeastRequestsBalancer,
+    PeakEwmaBalancer,
+    PowerOfTwoBalancer,
+    RoundRobinBalancer,
+    WeightedRoundRobinBalancer,
+]
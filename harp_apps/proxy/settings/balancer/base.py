@@ -0,0 +1,33 @@
+from typing import TYPE_CHECKING, Literal, Optional, Sequence, TypeVar
+
+from pydantic import model_validator
+
+from harp.config import Configurable, Stateful
+
+if TYPE_CHECKING:
+    from harp_apps.proxy.settings.remote import RemoteEndpoint
+
+
+class BaseBalancerSettings(Configurable):
+    type: Literal["round_robin", "weighted_round_robin", "least_requests", "power_of_two", "peak_ewma"] = "round_robin"
+
+    @model_validator(mode="before")
+    @classmethod
+    def __initialize_type(cls, value):
+        _args = cls.model_fields["type"].annotation.__args__
+        if len(_args) == 1:
+            value.setdefault("type", _args[0])
+        return value
+
+
+TSettings = TypeVar("TSettings", bound=Configurable)
+
+
+class BaseBalancer(Stateful[TSettings]):
+    def select(self, pool: Sequence["RemoteEndpoint"]) -> "RemoteEndpoint":
+        """Select the endpoint to send the next request to, from a non-empty pool of available endpoints (that may be
+        reordered in place)."""
+        raise NotImplementedError()
+
+    def observe(self, endpoint: "RemoteEndpoint", elapsed: Optional[float]):
+        """Take into account the end of a request sent to an endpoint, that took ``elapsed`` seconds (if known)."""
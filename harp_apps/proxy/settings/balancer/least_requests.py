@@ -0,0 +1,42 @@
+import random
+from collections import deque
+from typing import Literal, override
+
+from .base import BaseBalancer, BaseBalancerSettings
+
+
+class LeastRequestsBalancerSettings(BaseBalancerSettings):
+    type: Literal["least_requests"]
+
+    def build_impl(self):
+        return LeastRequestsBalancer(settings=self)
+
+
+class LeastRequestsBalancer(BaseBalancer[LeastRequestsBalancerSettings]):
+    """Sends requests to the endpoint with the least outstanding (in flight) requests. The pool is rotated, so that
+    ties are broken in a round-robin fashion."""
+
+    @override
+    def select(self, pool: deque):
+        endpoint = min(pool, key=lambda endpoint: endpoint.in_flight)
+        pool.rotate(-1)
+        return endpoint
+
+
+class PowerOfTwoBalancerSettings(BaseBalancerSettings):
+    type: Literal["power_of_two"]
+
+    def build_impl(self):
+        return PowerOfTwoBalancer(settings=self)
+
+
+class PowerOfTwoBalancer(BaseBalancer[PowerOfTwoBalancerSettings]):
+    """Picks two random endpoints and sends the request to the one with the least outstanding requests (power of two
+    choices). Nearly as good as least requests, without always piling the next requests on the same endpoint."""
+
+    @override
+    def select(self, pool):
+        if len(pool) == 1:
+            return pool[0]
+        first, second = random.sample(range(len(pool)), 2)
+        return min(pool[first], pool[second], key=lambda endpoint: endpoint.in_flight)
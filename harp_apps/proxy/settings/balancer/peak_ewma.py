@@ -0,0 +1,66 @@
+import math
+import random
+import time
+from typing import Literal, Optional, override
+
+from .base import BaseBalancer, BaseBalancerSettings
+
+
+class PeakEwmaBalancerSettings(BaseBalancerSettings):
+    type: Literal["peak_ewma"]
+
+    #: Time (in seconds) for older latency samples to weigh about a third (1/e) of the average.
+    decay: float = 10.0
+
+    def build_impl(self):
+        return PeakEwmaBalancer(settings=self)
+
+
+class PeakEwmaBalancer(BaseBalancer[PeakEwmaBalancerSettings]):
+    """
+    Picks two random endpoints and sends the request to the one with the lowest cost, being its latency multiplied by
+    its outstanding requests plus one (as in Finagle and Linkerd).
+
+    Latencies are exponentially weighted moving averages (decaying with time, not with the number of samples), except
+    that slower samples replace the average right away (peak), so that traffic moves away quickly from degrading
+    endpoints, and comes back progressively. Latencies also decay (towards zero) while no sample comes in, so that
+    endpoints avoided after a spike get traffic again, and new samples. Endpoints without latency samples yet are
+    considered as fast as the average of the others.
+
+    Latencies are measured by the proxy controller, from sending a request to receiving the response headers (or an
+    error). Responses served from the http client cache are not taken into account.
+
+    """
+
+    @override
+    def select(self, pool):
+        if len(pool) == 1:
+            return pool[0]
+
+        now = time.monotonic()
+        latencies = {id(endpoint): self.get_latency(endpoint, now) for endpoint in pool if endpoint.latency is not None}
+        # without any sample yet, only outstanding requests are compared
+        default_latency = sum(latencies.values()) / len(latencies) if latencies else 1.0
+
+        def cost(endpoint):
+            return latencies.get(id(endpoint), default_latency) * (endpoint.in_flight + 1)
+
+        first, second = random.sample(range(len(pool)), 2)
+        return min(pool[first], pool[second], key=cost)
+
+    def get_latency(self, endpoint, now: float) -> float:
+        """Returns the latency of an endpoint with samples, decayed by the time elapsed since the last one."""
+        return endpoint.latency * math.exp(-(now - endpoint.latency_updated_at) / self.settings.decay)
+
+    @override
+    def observe(self, endpoint, elapsed: Optional[float]):
+        if elapsed is None:
+            return
+
+        now = time.monotonic()
+        if endpoint.latency is None or elapsed > endpoint.latency:
+            endpoint.latency = elapsed
+        else:
+            weight = math.exp(-(now - endpoint.latency_updated_at) / self.settings.decay)
+            endpoint.latency = endpoint.latency * weight + elapsed * (1 - weight)
+        endpoint.latency_updated_at = now
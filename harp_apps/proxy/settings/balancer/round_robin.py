@@ -0,0 +1,52 @@
+from collections import deque
+from typing import Literal, override
+
+from .base import BaseBalancer, BaseBalancerSettings
+
+
+class RoundRobinBalancerSettings(BaseBalancerSettings):
+    type: Literal["round_robin"] = "round_robin"
+
+    def build_impl(self):
+        return RoundRobinBalancer(settings=self)
+
+
+class RoundRobinBalancer(BaseBalancer[RoundRobinBalancerSettings]):
+    """Sends requests to each endpoint in turn, rotating the pool."""
+
+    @override
+    def select(self, pool: deque):
+        endpoint = pool[0]
+        pool.rotate(-1)
+        return endpoint
+
+
+class WeightedRoundRobinBalancerSettings(BaseBalancerSettings):
+    type: Literal["weighted_round_robin"]
+
+    def build_impl(self):
+        return WeightedRoundRobinBalancer(settings=self)
+
+
+class WeightedRoundRobinBalancer(BaseBalancer[WeightedRoundRobinBalancerSettings]):
+    """Sends requests to endpoints in proportion to their weight, interleaved ("smooth" weighted round-robin, as in
+    nginx): each endpoint gains its weight on each selection, and the selected one loses the total weight."""
+
+    _current_weights: dict[str, int] = None
+
+    @override
+    def select(self, pool):
+        if self._current_weights is None:
+            self._current_weights = {}
+
+        selected, selected_weight, total = None, None, 0
+        for endpoint in pool:
+            url = str(endpoint.settings.url)
+            weight = self._current_weights.get(url, 0) + endpoint.settings.weight
+            self._current_weights[url] = weight
+            total += endpoint.settings.weight
+            if selected is None or weight > selected_weight:
+                selected, selected_weight = endpoint, weight
+
+        self._current_weights[str(selected.settings.url)] -= total
+        return selected
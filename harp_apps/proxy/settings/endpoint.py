@@ -3,7 +3,10 @@ from typing import Optional
 from pydantic import Field, model_validator
 
 from harp.config import Configurable, Stateful
+from harp_apps.proxy.constants import DEFAULT_STREAM_CAPTURE_SIZE
+from harp_apps.proxy.settings.pool import ConnectionPoolSettings
 from harp_apps.proxy.settings.remote import Remote, RemoteEndpointSettings, RemoteSettings
+from harp_apps.proxy.settings.retries import RetrySettings
 
 
 class BaseEndpointSettings(Configurable):
@@ -11,6 +14,17 @@ class BaseEndpointSettings(Configurable):
     port: int
     description: Optional[str] = None
 
+    #: Relay request and response bodies chunk by chunk instead of buffering them in memory. Only a bounded prefix of
+    #: the bodies will be attached to the stored transaction messages.
+    stream: bool = False
+
+    #: Maximum number of body bytes to keep for transaction messages, when streaming.
+    stream_capture_size: int = DEFAULT_STREAM_CAPTURE_SIZE
+
+    #: Dispatch the end of transaction events (response message, transaction ended) in the background, once the
+    #: response has been sent to the client, so that their listeners (storage, ...) do not add to the client latency.
+    defer_events: bool = False
+
 
 class EndpointSettings(BaseEndpointSettings):
     """
@@ -24,6 +38,12 @@ class EndpointSettings(BaseEndpointSettings):
         remote:
           # see HttpRemote
           ...
+        pool:
+          # see ConnectionPoolSettings, omit to use the shared connection pool
+          ...
+        retries:
+          # see RetrySettings, omit to never retry
+          ...
 
     A shorthand syntax is also available for cases where you only need to proxy to a single URL and do not require
     fine-tuning the endpoint settings:
@@ -40,6 +60,14 @@ class EndpointSettings(BaseEndpointSettings):
     # resilience-compatible remote definition, with url pools, probes, etc.
     remote: Optional[RemoteSettings] = Field(None, repr=False)
 
+    #: Dedicated upstream connection pool, so that a slow remote cannot exhaust the connections shared by the other
+    #: endpoints (by default, all endpoints share the http client's connection pool).
+    pool: Optional[ConnectionPoolSettings] = None
+
+    #: Retry (and hedging) policy for idempotent requests, sending them again to another remote endpoint when they
+    #: fail or are slower than usual.
+    retries: Optional[RetrySettings] = None
+
     @model_validator(mode="before")
     @classmethod
     def __prepare(cls, values):
@@ -0,0 +1,27 @@
+from typing import Optional
+
+from harp.config import Configurable
+
+
+class SharedHealthSettings(Configurable):
+    """
+    Configuration parser for ``proxy.shared_health`` settings.
+
+    .. code-block:: yaml
+
+        enabled: true
+        path: /var/run/harp/health.bin
+        size: 1024
+
+    """
+
+    #: Share the endpoints health (status and failure reasons) between the processes of a multi-process server, and
+    #: elect one prober per remote instead of probing from every process.
+    enabled: bool = False
+
+    #: Path of the memory mapped file holding the shared health table. Defaults to a file in the runtime directory of
+    #: a multi-process server (removed when the server exits), the health not being shared in a single process server.
+    path: Optional[str] = None
+
+    #: Number of slots of the table (one per remote endpoint, and one per probed remote).
+    size: int = 1024
@@ -0,0 +1,30 @@
+from typing import Annotated, Union
+
+from pydantic import Discriminator
+
+from .aimd import AimdLimiter, AimdLimiterSettings
+from .base import ConcurrencyLimitExceeded
+from .gradient import GradientLimiter, GradientLimiterSettings
+
+__all__ = [
+    "AimdLimiter",
+    "AimdLimiterSettings",
+    "ConcurrencyLimitExceeded",
+    "GradientLimiter",
+    "GradientLimiterSettings",
+    "Limiter",
+    "LimiterSettings",
+]
+
+LimiterSettings = Annotated[
+    Union[
+        AimdLimiterSettings,
+        GradientLimiterSettings,
+    ],
+    Discriminator("type"),
+]
+
+Limiter = Union[
+    AimdLimiter,
+    GradientLimiter,
+]
@@ -0,0 +1,31 @@
+from typing import Annotated, Literal, override
+
+from pydantic import Field
+
+from .base import BaseLimiter, BaseLimiterSettings
+
+
+class AimdLimiterSettings(BaseLimiterSettings):
+    type: Literal["aimd"]
+
+    #: Ratio applied to the limit on drops (failures, or responses slower than ``timeout``).
+    backoff_ratio: Annotated[float, Field(gt=0.0, lt=1.0)] = 0.9
+
+    #: Round trip time (in seconds) over which a request is considered as dropped.
+    timeout: Annotated[float, Field(gt=0.0)] = 5.0
+
+    def build_impl(self):
+        return AimdLimiter(settings=self)
+
+
+class AimdLimiter(BaseLimiter[AimdLimiterSettings]):
+    """Additive increase, multiplicative decrease: the limit grows by one for each successful request while more than
+    half of it is used, and is multiplied by the backoff ratio on drops."""
+
+    @override
+    def update(self, rtt, dropped):
+        if dropped or rtt > self.settings.timeout:
+            return self.limit * self.settings.backoff_ratio
+        if (self.in_flight + 1) * 2 >= self.limit:
+            return self.limit + 1
+        return self.limit
@@ -0,0 +1,117 @@
+import asyncio
+from collections import deque
+from typing import Annotated, Literal, Optional, TypeVar
+
+from pydantic import Field, model_validator
+
+from harp.config import Configurable, Stateful
+
+
+class ConcurrencyLimitExceeded(Exception):
+    """Raised when a request cannot be sent to a remote, as it has too many requests in flight already (and the request
+    could not wait for one to end)."""
+
+
+class BaseLimiterSettings(Configurable):
+    type: Literal["aimd", "gradient"] = "aimd"
+
+    #: Concurrency limit (maximum number of requests in flight) to start with.
+    initial_limit: Annotated[int, Field(gt=0)] = 20
+
+    #: Bounds of the concurrency limit.
+    min_limit: Annotated[int, Field(gt=0)] = 1
+    max_limit: Annotated[int, Field(gt=0)] = 200
+
+    #: Maximum number of requests waiting for a request in flight to end, once the limit is reached (others are
+    #: rejected right away, use 0 to never wait).
+    max_queue: Annotated[int, Field(ge=0)] = 100
+
+    #: Maximum time a request waits for a request in flight to end, in seconds, before being rejected.
+    queue_timeout: Annotated[float, Field(ge=0.0)] = 1.0
+
+    @model_validator(mode="before")
+    @classmethod
+    def __initialize_type(cls, value):
+        _args = cls.model_fields["type"].annotation.__args__
+        if len(_args) == 1:
+            value.setdefault("type", _args[0])
+        return value
+
+
+TSettings = TypeVar("TSettings", bound=BaseLimiterSettings)
+
+
+class BaseLimiter(Stateful[TSettings]):
+    """
+    Limits the number of requests in flight to a remote, queuing (for a bounded time) or rejecting the others. The
+    limit is adapted by implementations from the round trip times (and drops) of the requests, so that the remote gets
+    as much concurrency as it can handle without its latency growing.
+
+    """
+
+    #: Current concurrency limit (may be fractional, only its integer part matters).
+    limit: float = Field(None, exclude=True)
+
+    #: Number of requests in flight.
+    in_flight: int = Field(0, exclude=True)
+
+    #: Number of requests rejected (right away, or after waiting).
+    rejected: int = Field(0, exclude=True)
+
+    _waiters: deque[asyncio.Future] = None
+
+    @model_validator(mode="after")
+    def __initialize(self):
+        if self.limit is None:
+            self.limit = float(self.settings.initial_limit)
+        self._waiters = deque()
+        return self
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self):
+        """Waits until a request can be sent, or raises :class:`ConcurrencyLimitExceeded`."""
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+
+        if len(self._waiters) >= self.settings.max_queue or not self.settings.queue_timeout:
+            self.rejected += 1
+            raise ConcurrencyLimitExceeded(f"Concurrency limit reached ({int(self.limit)} requests in flight).")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # the slot is handed over by release(), which counts it as in flight
+            await asyncio.wait_for(asyncio.shield(waiter), self.settings.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over meanwhile, give it back
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            self.rejected += 1
+            raise ConcurrencyLimitExceeded(
+                f"Concurrency limit reached ({int(self.limit)} requests in flight, waited {self.settings.queue_timeout}s)."
+            ) from exc
+
+    def release(self, rtt: Optional[float] = None, *, dropped: bool = False):
+        """Takes the end of a request into account, that took ``rtt`` seconds (if relevant), and failed if
+        ``dropped``."""
+        self.in_flight = max(0, self.in_flight - 1)
+        if rtt is not None:
+            self.limit = float(min(self.settings.max_limit, max(self.settings.min_limit, self.update(rtt, dropped))))
+
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    def update(self, rtt: float, dropped: bool) -> float:
+        """Returns the new concurrency limit, given a request's round trip time and whether it failed."""
+        raise NotImplementedError()
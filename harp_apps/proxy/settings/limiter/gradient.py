@@ -0,0 +1,56 @@
+import math
+from typing import Annotated, Literal, Optional, override
+
+from pydantic import Field
+
+from .base import BaseLimiter, BaseLimiterSettings
+
+#: Round trip times (in seconds) are clamped to this minimum, so that instant responses do not zero the gradient.
+MIN_RTT = 1e-6
+
+
+class GradientLimiterSettings(BaseLimiterSettings):
+    type: Literal["gradient"]
+
+    #: Ratio of the long term round trip time a request can take before the latency is considered as growing.
+    tolerance: Annotated[float, Field(ge=1.0)] = 1.5
+
+    #: Weight of each new limit in the current one (0 to 1, higher values adapt faster).
+    smoothing: Annotated[float, Field(gt=0.0, le=1.0)] = 0.2
+
+    #: Number of requests over which the long term round trip time is averaged.
+    long_window: Annotated[int, Field(gt=0)] = 600
+
+    def build_impl(self):
+        return GradientLimiter(settings=self)
+
+
+class GradientLimiter(BaseLimiter[GradientLimiterSettings]):
+    """
+    Adapts the limit to the ratio between the long term round trip time (moving average) and the current one (as in
+    Netflix's gradient2 limit): the limit decreases as soon as the latency grows over the tolerance, and otherwise
+    grows by its square root (the requests allowed to queue at the remote), as long as it is actually used.
+
+    """
+
+    _long_rtt: Optional[float] = None
+
+    @override
+    def update(self, rtt, dropped):
+        rtt = max(rtt, MIN_RTT)
+        if self._long_rtt is None:
+            self._long_rtt = rtt
+        else:
+            self._long_rtt += (rtt - self._long_rtt) / self.settings.long_window
+            # recover faster from past latency increases, that would lead to a too high limit otherwise
+            if self._long_rtt / rtt > 2.0:
+                self._long_rtt *= 0.95
+
+        gradient = max(0.5, min(1.0, self.settings.tolerance * self._long_rtt / rtt))
+        new_limit = self.limit * gradient + math.sqrt(self.limit)
+
+        # do not grow the limit if it is not used
+        if new_limit > self.limit and (self.in_flight + 1) * 2 < self.limit:
+            return self.limit
+
+        return self.limit * (1 - self.settings.smoothing) + new_limit * self.settings.smoothing
@@ -0,0 +1,43 @@
+from typing import Annotated, Optional
+
+from httpx import Limits
+from pydantic import Field
+
+from harp.config import Configurable
+
+
+class ConnectionPoolSettings(Configurable):
+    """
+    Configuration parser for ``proxy.endpoints[].pool`` settings, giving an endpoint its own upstream connection pool,
+    instead of sharing the http client's default one with the other endpoints.
+
+    .. code-block:: yaml
+
+        max_connections: 100
+        max_keepalive_connections: 20
+        keepalive_expiry: 5.0
+        http2: true
+
+    """
+
+    #: Maximum number of connections to the endpoint's remote (null for no limit). Requests wait for a connection when
+    #: the limit is reached.
+    max_connections: Optional[Annotated[int, Field(gt=0)]] = 100
+
+    #: Maximum number of idle connections kept alive (null for no limit).
+    max_keepalive_connections: Optional[Annotated[int, Field(ge=0)]] = 20
+
+    #: Delay after which idle connections are closed, in seconds.
+    keepalive_expiry: Optional[float] = 5.0
+
+    #: Use HTTP/2 with remotes supporting it (negotiated using ALPN, so only for https urls), multiplexing requests over
+    #: the same connections.
+    http2: bool = False
+
+    @property
+    def limits(self) -> Limits:
+        return Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
@@ -1,7 +1,8 @@
 import asyncio
+import random
 import warnings
 from collections import deque
-from typing import Iterable, List, Mapping, Optional
+from typing import TYPE_CHECKING, Iterable, List, Mapping, Optional
 
 from _operator import attrgetter
 from pydantic import Field, computed_field, field_serializer, field_validator, model_validator
@@ -21,10 +22,15 @@ from harp_apps.proxy.constants import (
     UP,
 )
 
+from ..balancer import Balancer, BalancerSettings, RoundRobinBalancerSettings
+from ..limiter import Limiter, LimiterSettings
 from ..liveness import InheritLivenessSettings, Liveness, LivenessSettings, NaiveLiveness, NaiveLivenessSettings
 from .endpoint import RemoteEndpoint, RemoteEndpointSettings
 from .probe import RemoteProbe, RemoteProbeSettings
 
+if TYPE_CHECKING:
+    from harp_apps.proxy.health import HealthTable, SharedRemoteHealth
+
 logger = get_logger(__name__)
 
 __all__ = [
@@ -84,6 +90,13 @@ class RemoteSettings(BaseRemoteSettings):
     probe: Optional[RemoteProbeSettings] = None
     liveness: LivenessSettings = InheritLivenessSettings()
 
+    #: Strategy used to choose the endpoint of each request, among the available ones.
+    balancer: BalancerSettings = RoundRobinBalancerSettings()
+
+    #: Adaptive limit of the requests in flight to the remote (all endpoints together), queuing or rejecting the
+    #: others. Unlimited if not set.
+    limiter: Optional[LimiterSettings] = None
+
     def __getitem__(self, item):
         item = normalize_url(item)
         for endpoint in self.endpoints:
@@ -93,8 +106,8 @@ class RemoteSettings(BaseRemoteSettings):
 
 
 class Remote(Stateful[RemoteSettings]):
-    #: Current pool deque contains the list of available URLs, from least recently used to most recently used. It will
-    #: be rotated on each request to implement a naive round-robin strategy.
+    #: Current pool deque contains the list of available URLs, from least recently used to most recently used. The
+    #: balancer chooses the endpoint of each request from it (and may rotate it, for round-robin strategies).
     _current_pool: deque[RemoteEndpoint] = None
 
     #: Name of the currently used pool. This does not mean that all urls come from this pool, as the fallback pool may
@@ -110,6 +123,15 @@ class Remote(Stateful[RemoteSettings]):
     #: Liveness
     liveness: Liveness = Field(None, exclude=True)
 
+    #: Balancer
+    balancer: Balancer = Field(None, exclude=True)
+
+    #: Concurrency limiter, if any
+    limiter: Optional[Limiter] = Field(None, exclude=True)
+
+    #: Health shared with other processes, if enabled (see :meth:`share_health`).
+    _health: Optional["SharedRemoteHealth"] = None
+
     @computed_field
     @property
     def current_pool(self) -> List[str]:
@@ -128,6 +150,8 @@ class Remote(Stateful[RemoteSettings]):
         }
         self._current_pool = deque()
         self.probe = RemoteProbe(settings=self.settings.probe) if self.settings.probe else None
+        self.balancer = self.settings.balancer.build_impl()
+        self.limiter = self.settings.limiter.build_impl() if self.settings.limiter else None
 
         # build our liveness object, or use default if it is set to inherit
         if self.settings.liveness.type == "inherit":
@@ -153,8 +177,26 @@ class Remote(Stateful[RemoteSettings]):
     def __getitem__(self, url: str) -> RemoteEndpoint:
         return self._endpoints[normalize_url(url)]
 
+    def share_health(self, table: "HealthTable", name: str):
+        """Shares the endpoints health with the other processes using the same health table, adopting the already
+        shared state."""
+        from harp_apps.proxy.health import SharedRemoteHealth
+
+        for url in self._endpoints:
+            table.allocate(f"{name}:{url}")
+        self._health = SharedRemoteHealth(table, name, check_after=self.settings.check_after)
+        self._health.sync(self._endpoints)
+        self._refresh_pool()
+
     def refresh(self):
-        """Recompute the current pool of endpoints."""
+        """Recompute the current pool of endpoints (after publishing the local endpoints health changes, and pulling
+        other processes' ones, if shared)."""
+        if self._health is not None:
+            self._health.publish(self._endpoints)
+            self._health.sync(self._endpoints)
+        self._refresh_pool()
+
+    def _refresh_pool(self):
         refreshed: deque[RemoteEndpoint] = deque()
         for endpoint in self._endpoints.values():
             if DEFAULT_POOL in endpoint.settings.pools and endpoint.status >= CHECKING:
@@ -170,15 +212,31 @@ class Remote(Stateful[RemoteSettings]):
 
         self._current_pool = refreshed
 
-    def get_url(self) -> str:
-        """Get next candidate url from the current pool, then rotate."""
-        try:
-            return str(self._current_pool[0].settings.url)
-        except IndexError as exc:
-            raise IndexError("No available URLs for remote.") from exc
+    def get_url(self, exclude: Iterable[str] = ()) -> str:
+        """Get next candidate url from the current pool (without the ``exclude`` urls, used to retry requests on other
+        endpoints), as chosen by the balancer."""
+        if self._health is not None and self._health.sync(self._endpoints):
+            self._refresh_pool()
 
-        finally:
-            self._current_pool.rotate(-1)
+        pool = self._current_pool
+        if exclude:
+            exclude = set(map(normalize_url, exclude))
+            pool = deque(endpoint for endpoint in pool if str(endpoint.settings.url) not in exclude)
+
+        if not pool:
+            raise IndexError("No available URLs for remote.")
+        return str(self.balancer.select(pool).settings.url)
+
+    def start_request(self, url: str):
+        """Take into account a request being sent to an url (see :meth:`end_request`)."""
+        self[url].in_flight += 1
+
+    def end_request(self, url: str, elapsed: Optional[float] = None):
+        """Take into account the end of a request sent to an url, that took ``elapsed`` seconds to get a response (or
+        to fail), if relevant for latency tracking."""
+        endpoint = self[url]
+        endpoint.in_flight = max(0, endpoint.in_flight - 1)
+        self.balancer.observe(endpoint, elapsed)
 
     def notify_url_status(self, url, status):
         """
@@ -222,24 +280,37 @@ class Remote(Stateful[RemoteSettings]):
 
     async def check(self):
         """Uses the probe (luke), to check the health of each urls. It is also done on fallback and inactive urls, to
-        ensure that they are ready in case we need them."""
+        ensure that they are ready in case we need them. Endpoints are probed concurrently (up to the probe's
+        concurrency), so that a hanging endpoint does not delay the others."""
         if self.probe is None:
             return
 
-        state_changed = False
-
         async with self.probe.async_client() as client:
-            for endpoint in self._endpoints.values():
-                url_state_changed = await self.probe.check(client, endpoint)
-                state_changed |= url_state_changed
+            changes = await asyncio.gather(
+                *(self.probe.check(client, endpoint) for endpoint in self._endpoints.values())
+            )
 
-        if state_changed:
+        if any(changes):
             self.refresh()
 
     async def check_forever(self):
+        """Probes each endpoint on its own (jittered) schedule, until cancelled."""
+        try:
+            await asyncio.gather(*(self._check_endpoint_forever(endpoint) for endpoint in self._endpoints.values()))
+        finally:
+            await self.probe.aclose()
+
+    async def _check_endpoint_forever(self, endpoint: RemoteEndpoint):
+        # spread the first probes, next ones are spread by the jitter of each delay
+        await asyncio.sleep(random.uniform(0.0, self.probe.settings.interval * self.probe.settings.jitter))
         while True:
             try:
-                await self.check()
+                # only one of the processes sharing the endpoints health probes them, the others follow
+                if self._health is None or self._health.acquire_prober(ttl=self.probe.settings.interval * 3):
+                    if await self.probe.check(self.probe.client, endpoint):
+                        self.refresh()
+                elif self._health.sync(self._endpoints):
+                    self._refresh_pool()
             except Exception as exc:
                 logger.error(f"Failed to check remote health: {exc}")
-            await asyncio.sleep(self.probe.settings.interval)
+            await asyncio.sleep(self.probe.get_delay())
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Annotated, List, Optional
 
 from pydantic import Field, HttpUrl, field_serializer, field_validator, model_validator
 
@@ -16,12 +16,14 @@ class RemoteEndpointSettings(Configurable):
 
         url: "http://my-endpoint:8080"
         pools: [fallback]  # omit for default pool
+        weight: 2  # relative share of traffic, for the weighted round-robin balancer
         failure_threshold: 3
         success_threshold: 1
     """
 
     url: HttpUrl
     pools: List[str] = ["default"]
+    weight: Annotated[int, Field(gt=0)] = 1
     liveness: LivenessSettings = Field(default_factory=InheritLivenessSettings)
 
     @field_validator("pools")
@@ -45,6 +47,13 @@ class RemoteEndpoint(Stateful[RemoteEndpointSettings]):
     failure_reasons: Optional[set] = None
     liveness: Liveness = Field(None, exclude=True)
 
+    #: Number of requests currently being sent to this endpoint.
+    in_flight: int = Field(0, exclude=True)
+
+    #: Average latency (in seconds), if tracked by the remote's balancer.
+    latency: Optional[float] = Field(None, exclude=True)
+    latency_updated_at: Optional[float] = Field(None, exclude=True)
+
     @model_validator(mode="after")
     def __initialize(self):
         if self.liveness is None and self.settings.liveness is not None:
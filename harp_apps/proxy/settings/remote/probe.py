@@ -1,5 +1,8 @@
+import asyncio
+import random
+import time
 from contextlib import asynccontextmanager
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 from urllib.parse import urljoin
 
 import httpx
@@ -8,12 +11,21 @@ from pyheck import shouty_snake
 
 from harp import get_logger
 from harp.config import Configurable, Stateful
+from harp.settings import USE_PROMETHEUS
 
 if TYPE_CHECKING:
     from harp_apps.proxy.settings.remote.endpoint import RemoteEndpoint
 
 logger = get_logger(__name__)
 
+_prometheus = None
+if USE_PROMETHEUS:
+    from prometheus_client import Histogram
+
+    _prometheus = {
+        "time": Histogram("proxy_probe_time", "Probe requests duration, per remote endpoint.", ["url"]),
+    }
+
 
 class RemoteProbeSettings(Configurable):
     """
@@ -28,6 +40,8 @@ class RemoteProbeSettings(Configurable):
         headers:
           x-purpose: "health probe"
         timeout: 5.0
+        concurrency: 10
+        jitter: 0.1
     """
 
     method: str = "GET"
@@ -37,18 +51,60 @@ class RemoteProbeSettings(Configurable):
     timeout: float = 10.0
     verify: bool = True
 
+    #: Maximum number of endpoints probed at the same time.
+    concurrency: int = Field(10, gt=0)
+
+    #: Random variation of the delay between two probes of an endpoint, as a fraction of the interval, so that the
+    #: probes of all endpoints do not happen at the same time.
+    jitter: float = Field(0.1, ge=0.0, lt=1.0)
+
 
 class RemoteProbe(Stateful[RemoteProbeSettings]):
-    """Stateful version of a probe definition."""
+    """Stateful version of a probe definition.
+
+    Probes share a long-lived http client (keeping connections to endpoints alive between probes), and at most
+    ``concurrency`` of them run at the same time."""
+
+    _client: Optional[httpx.AsyncClient] = None
+    _semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                verify=self.settings.verify,
+                limits=httpx.Limits(
+                    max_connections=self.settings.concurrency,
+                    max_keepalive_connections=self.settings.concurrency,
+                ),
+            )
+        return self._client
 
     @asynccontextmanager
     async def async_client(self):
-        async with httpx.AsyncClient(verify=self.settings.verify) as client:
-            yield client
+        yield self.client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def get_delay(self) -> float:
+        """Returns the delay before the next probe of an endpoint, i.e. the interval, with some jitter."""
+        jitter = self.settings.jitter
+        return self.settings.interval * random.uniform(1.0 - jitter, 1.0 + jitter)
 
     async def check(self, client: httpx.AsyncClient, endpoint: "RemoteEndpoint"):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.settings.concurrency)
+
+        async with self._semaphore:
+            return await self._check(client, endpoint)
+
+    async def _check(self, client: httpx.AsyncClient, endpoint: "RemoteEndpoint"):
         probe_url = urljoin(str(endpoint.settings.url), self.settings.path)
         response = None
+        started_at = time.perf_counter()
         try:
             response = await client.request(
                 self.settings.method,
@@ -67,5 +123,7 @@ class RemoteProbe(Stateful[RemoteProbeSettings]):
             logger.exception(f"Probe failure: {probe_url} -> {failure}")
             return endpoint.failure(failure)
         finally:
+            if _prometheus:
+                _prometheus["time"].labels(str(endpoint.settings.url)).observe(time.perf_counter() - started_at)
             if response:
                 logger.debug(f"Probe request: {probe_url} -> {response.status_code}")
@@ -0,0 +1,50 @@
+from typing import Annotated, Optional
+
+from pydantic import Field, field_validator
+
+from harp.config import Configurable
+
+
+class RetrySettings(Configurable):
+    """
+    Configuration parser for ``proxy.endpoints[].retries`` settings, retrying idempotent requests on another remote
+    endpoint when they fail, and sending a duplicate of those that are slower than usual (hedging), the first response
+    winning.
+
+    .. code-block:: yaml
+
+        methods: [GET, HEAD, OPTIONS]
+        max_attempts: 2
+        on_status: [502, 503, 504]
+        hedge_percentile: 95.0
+        budget: 0.1
+
+    """
+
+    #: Methods of the requests that can be retried or hedged, which must be idempotent.
+    methods: list[str] = ["GET", "HEAD", "OPTIONS"]
+
+    #: Maximum number of attempts (the original request included) to send for a request.
+    max_attempts: Annotated[int, Field(ge=1)] = 2
+
+    #: Response status codes to retry, on top of network errors.
+    on_status: list[int] = [502, 503, 504]
+
+    #: Percentile of the recent latencies of the endpoint above which a duplicate request is sent (null to disable
+    #: hedging, and only retry failures).
+    hedge_percentile: Optional[Annotated[float, Field(gt=0.0, lt=100.0)]] = 95.0
+
+    #: Minimum delay before sending a duplicate request, in seconds.
+    hedge_min_delay: float = 0.01
+
+    #: Ratio of retries (and duplicates) to requests allowed, over the last ten seconds, so that retries cannot amplify
+    #: an outage.
+    budget: Annotated[float, Field(ge=0.0)] = 0.1
+
+    #: Minimum retries allowed per second whatever the budget, for endpoints with little traffic.
+    min_retries_per_second: Annotated[float, Field(ge=0.0)] = 1.0
+
+    @field_validator("methods")
+    @classmethod
+    def __validate_methods(cls, methods: list[str]) -> list[str]:
+        return [method.upper() for method in methods]
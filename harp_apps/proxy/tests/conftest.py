@@ -0,0 +1,66 @@
+import httpx
+import pytest
+from whistle import AsyncEventDispatcher
+
+from harp_apps.proxy.controllers import HttpProxyController
+from harp_apps.proxy.events import EVENT_TRANSACTION_ENDED, EVENT_TRANSACTION_MESSAGE
+from harp_apps.proxy.settings.remote import Remote
+
+
+@pytest.fixture
+def base_url():
+    """Url of the single remote endpoint of the controllers created by :func:`create_controller` and
+    :func:`create_detailed_controller`."""
+    return "http://example.com"
+
+
+def _controller_factory(base_url, on_message, on_ended):
+    def _create_controller(events: list = None, **kwargs):
+        events = [] if events is None else events
+        dispatcher = AsyncEventDispatcher()
+
+        async def _on_message(event):
+            events.append(await on_message(event))
+
+        async def _on_ended(event):
+            events.append(on_ended(event))
+
+        dispatcher.add_listener(EVENT_TRANSACTION_MESSAGE, _on_message)
+        dispatcher.add_listener(EVENT_TRANSACTION_ENDED, _on_ended)
+
+        remote = Remote.from_settings_dict({"endpoints": [{"url": base_url}]})
+        controller = HttpProxyController(remote, http_client=httpx.AsyncClient(), dispatcher=dispatcher, **kwargs)
+        return controller, events
+
+    return _create_controller
+
+
+@pytest.fixture
+def create_controller(base_url):
+    """
+    Factory of proxy controllers to a single remote endpoint (see :func:`base_url`), recording the transaction events
+    they dispatch in ``events`` (message kinds, then ``"ended"``). Keyword arguments are passed to the controller.
+
+    Returns the controller and the events list.
+
+    """
+
+    async def on_message(event):
+        return event.message.kind
+
+    return _controller_factory(base_url, on_message, lambda event: "ended")
+
+
+@pytest.fixture
+def create_detailed_controller(base_url):
+    """
+    Same as :func:`create_controller`, but messages are recorded along with their body, and the end of the transaction
+    along with whether its duration was set.
+
+    """
+
+    async def on_message(event):
+        await event.message.aread()
+        return event.message.kind, event.message.body
+
+    return _controller_factory(base_url, on_message, lambda event: ("ended", event.transaction.elapsed is not None))
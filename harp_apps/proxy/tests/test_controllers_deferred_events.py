@@ -0,0 +1,41 @@
+from unittest.mock import AsyncMock
+
+import httpx
+import respx
+
+from harp.asgi import ASGIKernel
+from harp.controllers import DefaultControllerResolver
+from harp.http import HttpRequest
+
+
+@respx.mock
+async def test_events_are_dispatched_after_response_is_sent(create_controller, base_url):
+    respx.get(base_url).mock(return_value=httpx.Response(200, content=b"Hello."))
+    events = []
+
+    async def send(message):
+        events.append(message["type"])
+
+    controller, _ = create_controller(events, defer_events=True)
+    kernel = ASGIKernel(resolver=DefaultControllerResolver(default_controller=controller))
+    kernel.started = True
+
+    await kernel(
+        {"type": "http", "method": "GET", "path": "/", "query_string": b"", "headers": [], "server": ()},
+        AsyncMock(return_value={"type": "http.request", "body": b"", "more_body": False}),
+        send,
+    )
+    await kernel.drain()
+
+    assert events == ["request", "http.response.start", "http.response.body", "response", "ended"]
+
+
+@respx.mock
+async def test_events_are_dispatched_inline_outside_of_a_kernel(create_controller, base_url):
+    respx.get(base_url).mock(return_value=httpx.Response(200, content=b"Hello."))
+    controller, events = create_controller(defer_events=True)
+
+    response = await controller(HttpRequest())
+
+    assert response.status == 200
+    assert events == ["request", "response", "ended"]
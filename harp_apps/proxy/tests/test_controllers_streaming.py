@@ -0,0 +1,65 @@
+import httpx
+import respx
+
+from harp.asgi.bridge.responses import HttpResponseAsgiBridge
+from harp.http import HttpRequest
+
+
+async def consume(response):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await HttpResponseAsgiBridge(response, send).send()
+    return b"".join(message.get("body", b"") for message in sent)
+
+
+@respx.mock
+async def test_streaming_relays_bodies(create_detailed_controller, base_url):
+    route = respx.post(base_url).mock(return_value=httpx.Response(200, content=b"Hello, world!"))
+    controller, events = create_detailed_controller(stream=True)
+
+    response = await controller(HttpRequest(method="POST", body=[b"foo", b"bar"]))
+
+    assert route.calls.last.request.content == b"foobar"
+    # transaction is not ended until the response body went through
+    assert events == [("request", b"foobar")]
+
+    assert await consume(response) == b"Hello, world!"
+    assert events == [("request", b"foobar"), ("response", b"Hello, world!"), ("ended", True)]
+
+
+@respx.mock
+async def test_streaming_requests_are_outstanding_until_relayed(create_detailed_controller, base_url):
+    respx.get(base_url).mock(return_value=httpx.Response(200, content=b"Hello, world!"))
+    controller, events = create_detailed_controller(stream=True)
+    (endpoint,) = controller.remote.endpoints
+
+    response = await controller(HttpRequest())
+    assert endpoint.in_flight == 1
+
+    assert await consume(response) == b"Hello, world!"
+    assert endpoint.in_flight == 0
+
+
+@respx.mock
+async def test_streaming_only_captures_a_bounded_prefix(create_detailed_controller, base_url):
+    respx.post(base_url).mock(return_value=httpx.Response(200, content=b"Hello, world!"))
+    controller, events = create_detailed_controller(stream=True, stream_capture_size=4)
+
+    response = await controller(HttpRequest(method="POST", body=[b"foo", b"bar"]))
+
+    assert await consume(response) == b"Hello, world!"
+    assert events == [("request", b"foob"), ("response", b"Hell"), ("ended", True)]
+
+
+@respx.mock
+async def test_streaming_network_error(create_detailed_controller, base_url):
+    respx.get(base_url).mock(side_effect=httpx.ConnectError("Connection refused"))
+    controller, events = create_detailed_controller(stream=True)
+
+    response = await controller(HttpRequest())
+
+    assert response.status == 503
+    assert [kind for kind, _ in events] == ["request", "error", "ended"]
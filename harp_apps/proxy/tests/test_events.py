@@ -1,4 +1,5 @@
 from decimal import Decimal
+from unittest.mock import Mock
 
 import pytest
 
@@ -31,3 +32,27 @@ def test_execution():
 
     event.execute_script(none_response_script)
     assert event.response is None
+
+
+def test_execute_function():
+    event = ProxyFilterEvent("api", request=HttpRequest())
+
+    event.execute_function(lambda request, response, endpoint, logger, stop_propagation, rule: response)
+    assert event.response is None
+
+    event.execute_function(lambda *args: HttpResponse("Ok.", status=200))
+    assert event.response.status == 200
+
+    with pytest.raises(ValueError):
+        event.execute_function(lambda *args: Decimal(200))
+    assert event.response.status == 200
+
+
+def test_execute_functions_checks_each_response():
+    event = ProxyFilterEvent("api", request=HttpRequest())
+    next_function = Mock()
+
+    with pytest.raises(ValueError):
+        event.execute_function(lambda *args: HttpResponse("Ok.", status=200), lambda *args: Decimal(200), next_function)
+    assert event.response.status == 200
+    assert not next_function.called
@@ -0,0 +1,124 @@
+import os
+import time
+from multiprocessing import get_context
+
+import pytest
+
+from harp_apps.proxy.constants import CHECKING, DOWN, UP
+from harp_apps.proxy.health import HealthTable
+from harp_apps.proxy.settings.remote import Remote, RemoteSettings
+
+
+@pytest.fixture
+def table(tmp_path):
+    table = HealthTable(str(tmp_path / "health.bin"), size=16)
+    yield table
+    table.close()
+
+
+def create_remote(table: HealthTable):
+    remote = Remote(settings=RemoteSettings(endpoints=[{"url": "http://a/"}, {"url": "http://b/"}]))
+    remote.share_health(table, "test")
+    return remote
+
+
+def _set_down(path):
+    table = HealthTable(path, size=16)
+    table.set("foo", DOWN, {"PROBE_HTTP_503"})
+    table.close()
+
+
+class TestHealthTable:
+    def test_records(self, table):
+        assert table.get("foo") is None
+        generation = table.generation
+
+        table.set("foo", DOWN, {"HTTP_503", "NETWORK_ERROR"})
+        assert table.get("foo")[:2] == (DOWN, {"HTTP_503", "NETWORK_ERROR"})
+        assert table.generation == generation + 1
+
+        # slots are shared by all the tables mapping the same file
+        other = HealthTable(table.path, size=16)
+        other.set("foo", UP)
+        assert table.get("foo")[:2] == (UP, None)
+        other.close()
+
+    def test_shared_between_processes(self, table):
+        process = get_context("fork").Process(target=_set_down, args=(table.path,))
+        process.start()
+        process.join()
+
+        assert table.get("foo")[:2] == (DOWN, {"PROBE_HTTP_503"})
+
+    def test_leases(self, table):
+        assert table.acquire("probe", 1, ttl=60)
+        assert table.acquire("probe", 1, ttl=60)
+        assert not table.acquire("probe", 2, ttl=60)
+
+        assert table.acquire("probe", 1, ttl=-1)
+        assert table.acquire("probe", 2, ttl=60)
+
+    def test_full(self, table):
+        for i in range(16):
+            table.allocate(f"key-{i}")
+        with pytest.raises(ValueError):
+            table.allocate("one-too-many")
+
+    def test_size_mismatch(self, table):
+        with pytest.raises(ValueError):
+            HealthTable(table.path, size=32)
+
+
+class TestSharedRemoteHealth:
+    def test_status_changes_are_shared(self, table):
+        first, second = create_remote(table), create_remote(table)
+
+        first.set_down("http://a/")
+        assert [second.get_url() for _ in range(2)] == ["http://b/", "http://b/"]
+        assert second["http://a/"].status == DOWN
+
+        second.set_up("http://a/")
+        assert first.get_url() == "http://a/"
+        assert first["http://a/"].status == UP
+
+    def test_unseen_changes_are_not_overwritten(self, table):
+        first, second = create_remote(table), create_remote(table)
+
+        first.set_down("http://a/")
+        # second did not sync yet, its own changes must not publish its stale view of other endpoints
+        second["http://b/"].status = UP
+        second.refresh()
+
+        assert table.get("test:http://a/").status == DOWN
+        assert table.get("test:http://b/").status == UP
+        assert list(map(str, second.current_pool)) == ["http://b/"]
+
+    def test_stale_down_status_is_checked_again(self, table):
+        table.set("test:http://a/", DOWN)
+        remote = create_remote(table)
+        assert remote["http://a/"].status == DOWN
+
+        table.set("test:http://b/", UP)
+        remote._health.check_after = 0
+        time.sleep(0.01)
+        remote.get_url()
+        assert remote["http://a/"].status == CHECKING
+
+    def test_down_status_expires_without_table_changes(self, table):
+        remote = create_remote(table)
+        remote._health.check_after = 0.05
+        table.set("test:http://a/", DOWN)
+        remote.get_url()
+        assert remote["http://a/"].status == DOWN
+
+        time.sleep(0.1)
+        remote.get_url()
+        assert remote["http://a/"].status == CHECKING
+
+    def test_single_prober(self, table):
+        remote = create_remote(table)
+        assert remote._health.acquire_prober(ttl=60)
+        assert remote._health.acquire_prober(ttl=60)
+
+        # another process (pid) cannot probe this remote while the lease is valid
+        assert not table.acquire("test:#probe", os.getpid() + 1, ttl=60)
@@ -0,0 +1,192 @@
+import asyncio
+
+import httpx
+import respx
+
+from harp.http import HttpRequest
+from harp.utils.testing.config import BaseConfigurableTest
+from harp_apps.proxy.constants import UP
+from harp_apps.proxy.controllers import HttpProxyController
+from harp_apps.proxy.retries import LatencyWindow, RetryBudget, RetryPolicy
+from harp_apps.proxy.settings import RetrySettings
+from harp_apps.proxy.settings.remote import Remote
+
+FIRST_URL, SECOND_URL = "http://first.example.com/", "http://second.example.com/"
+
+
+class TestRetrySettings(BaseConfigurableTest):
+    type = RetrySettings
+    initial = {}
+    expected = {}
+    expected_verbose = {
+        "budget": 0.1,
+        "hedge_min_delay": 0.01,
+        "hedge_percentile": 95.0,
+        "max_attempts": 2,
+        "methods": ["GET", "HEAD", "OPTIONS"],
+        "min_retries_per_second": 1.0,
+        "on_status": [502, 503, 504],
+    }
+
+    def test_methods(self):
+        assert self.create(methods=["get", "put"]).methods == ["GET", "PUT"]
+
+
+def test_latency_window():
+    window = LatencyWindow(10, min_samples=5)
+    for latency in (0.4, 0.1, 0.3, 0.2):
+        window.observe(latency)
+    assert window.percentile(50) is None
+
+    window.observe(0.5)
+    assert window.percentile(50) == 0.3
+    assert window.percentile(95) == 0.5
+    assert window.percentile(1) == 0.1
+
+
+def test_retry_budget():
+    budget = RetryBudget(0.5, min_per_second=0.0)
+    assert not budget.withdraw()
+
+    for _ in range(4):
+        budget.deposit()
+    assert budget.withdraw()
+    assert budget.withdraw()
+    assert not budget.withdraw()
+
+    budget = RetryBudget(0.0, min_per_second=0.1, window=10)
+    assert budget.withdraw()
+    assert not budget.withdraw()
+
+
+def test_hedge_delay():
+    policy = RetryPolicy(RetrySettings(hedge_percentile=50.0, hedge_min_delay=0.2))
+    assert policy.get_hedge_delay() is None
+    for _ in range(100):
+        policy.observe(0.1)
+    assert policy.get_hedge_delay() == 0.2
+
+    policy = RetryPolicy(RetrySettings(hedge_percentile=None))
+    for _ in range(100):
+        policy.observe(0.1)
+    assert policy.get_hedge_delay() is None
+
+
+def create_controller(*, break_on=("network_error",), **retries):
+    remote = Remote.from_settings_dict(
+        {"endpoints": [{"url": FIRST_URL}, {"url": SECOND_URL}], "break_on": list(break_on)}
+    )
+    return HttpProxyController(remote, http_client=httpx.AsyncClient(), retries=RetrySettings(**retries))
+
+
+class TestRetries:
+    @respx.mock
+    async def test_failures_are_retried_on_another_endpoint(self):
+        first = respx.get(FIRST_URL).mock(side_effect=httpx.ConnectError("Connection refused"))
+        second = respx.get(SECOND_URL).mock(return_value=httpx.Response(200, content=b"Hello."))
+        controller = create_controller(hedge_percentile=None)
+
+        response = await controller(HttpRequest())
+        assert response.status == 200
+        assert response.body == b"Hello."
+        assert (first.call_count, second.call_count) == (1, 1)
+        assert second.calls.last.request.headers["host"] == "second.example.com"
+
+        # the failed endpoint is taken into account by the circuit breaker
+        assert controller.remote[FIRST_URL].failure_reasons == {"CONNECT_ERROR"}
+        assert controller.remote[SECOND_URL].status == UP
+
+    @respx.mock
+    async def test_retryable_status(self):
+        respx.get(FIRST_URL).mock(return_value=httpx.Response(503))
+        respx.get(SECOND_URL).mock(return_value=httpx.Response(503))
+        controller = create_controller(hedge_percentile=None)
+
+        response = await controller(HttpRequest())
+        assert response.status == 503
+        assert respx.calls.call_count == 2
+
+    @respx.mock
+    async def test_non_idempotent_requests_are_not_retried(self):
+        respx.post(FIRST_URL).mock(side_effect=httpx.ConnectError("Connection refused"))
+        respx.post(SECOND_URL).mock(return_value=httpx.Response(200))
+        controller = create_controller(hedge_percentile=None)
+
+        response = await controller(HttpRequest(method="POST", body=b"foo"))
+        assert response.status == 503
+        assert respx.calls.call_count == 1
+
+    @respx.mock
+    async def test_retries_are_budgeted(self):
+        respx.get(FIRST_URL).mock(side_effect=httpx.ConnectError("Connection refused"))
+        respx.get(SECOND_URL).mock(side_effect=httpx.ConnectError("Connection refused"))
+        controller = create_controller(
+            hedge_percentile=None, budget=0.0, min_retries_per_second=0.1, break_on=["unhandled_exception"]
+        )
+
+        await controller(HttpRequest())
+        assert respx.calls.call_count == 2
+        await controller(HttpRequest())
+        assert respx.calls.call_count == 3
+
+    @respx.mock
+    async def test_slow_requests_are_hedged(self):
+        slow_calls = []
+
+        async def slow(request):
+            slow_calls.append(request)
+            await asyncio.sleep(1.0)
+            return httpx.Response(200, content=b"Slow.")
+
+        respx.get(FIRST_URL).mock(side_effect=slow)
+        respx.get(SECOND_URL).mock(return_value=httpx.Response(200, content=b"Fast."))
+        controller = create_controller(hedge_percentile=50.0, hedge_min_delay=0.05)
+        for _ in range(100):
+            controller.retries.observe(0.01)
+
+        response = await controller(HttpRequest())
+        assert response.body == b"Fast."
+        assert len(slow_calls) == 1
+
+        # the slow attempt was cancelled
+        assert controller.remote[FIRST_URL].in_flight == 0
+
+    @respx.mock
+    async def test_cancelled_attempts_are_observed(self):
+        async def slow(request):
+            await asyncio.sleep(1.0)
+            return httpx.Response(200, content=b"Slow.")
+
+        respx.get(FIRST_URL).mock(side_effect=slow)
+        respx.get(SECOND_URL).mock(return_value=httpx.Response(200, content=b"Fast."))
+        controller = create_controller(hedge_percentile=50.0, hedge_min_delay=0.05)
+        for _ in range(100):
+            controller.retries.observe(0.01)
+
+        assert (await controller(HttpRequest())).body == b"Fast."
+
+        # the (cancelled) original attempt is observed with the time it waited, the hedge is not observed at all
+        latencies = controller.retries.latencies.latencies
+        assert len(latencies) == 101
+        assert latencies[-1] >= 0.05
+
+    @respx.mock
+    async def test_attempts_finishing_together_are_all_accounted_for(self, monkeypatch):
+        ready = asyncio.Event()
+
+        async def wait_until_ready(request):
+            await ready.wait()
+            return httpx.Response(200, content=b"Hello.")
+
+        respx.get(FIRST_URL).mock(side_effect=wait_until_ready)
+        respx.get(SECOND_URL).mock(side_effect=wait_until_ready)
+        controller = create_controller(hedge_percentile=50.0, hedge_min_delay=0.01)
+        for _ in range(100):
+            controller.retries.observe(0.01)
+
+        notified = []
+        monkeypatch.setattr(Remote, "notify_url_status", lambda self, url, status: notified.append((url, status)))
+        asyncio.get_running_loop().call_later(0.05, ready.set)
+
+        assert (await controller(HttpRequest())).body == b"Hello."
+        assert sorted(notified) == [(FIRST_URL, 200), (SECOND_URL, 200)]
@@ -0,0 +1,162 @@
+import random
+from collections import Counter
+
+import pytest
+
+from harp.config import Configurable
+from harp.utils.testing.config import BaseConfigurableTest
+from harp_apps.proxy.settings import Remote
+from harp_apps.proxy.settings.balancer import (
+    BalancerSettings,
+    LeastRequestsBalancer,
+    PeakEwmaBalancer,
+    PowerOfTwoBalancer,
+    RoundRobinBalancer,
+    RoundRobinBalancerSettings,
+    WeightedRoundRobinBalancer,
+)
+
+
+class StubSettingsWithBalancer(Configurable):
+    balancer: BalancerSettings = RoundRobinBalancerSettings()
+
+
+class BaseBalancerSettingsTest(BaseConfigurableTest):
+    type = StubSettingsWithBalancer
+    impl_type = None
+
+    def test_build_impl(self):
+        settings = self.create()
+        impl = settings.balancer.build_impl()
+        assert isinstance(impl, self.impl_type)
+
+
+class TestDefaultBalancerSettings(BaseBalancerSettingsTest):
+    impl_type = RoundRobinBalancer
+    initial = {}
+    expected = {}
+    expected_verbose = {"balancer": {"type": "round_robin"}}
+
+
+class TestWeightedRoundRobinBalancerSettings(BaseBalancerSettingsTest):
+    impl_type = WeightedRoundRobinBalancer
+    initial = {"balancer": {"type": "weighted_round_robin"}}
+    expected = {"balancer": {"type": "weighted_round_robin"}}
+    expected_verbose = {"balancer": {"type": "weighted_round_robin"}}
+
+
+class TestLeastRequestsBalancerSettings(BaseBalancerSettingsTest):
+    impl_type = LeastRequestsBalancer
+    initial = {"balancer": {"type": "least_requests"}}
+    expected = {"balancer": {"type": "least_requests"}}
+    expected_verbose = {"balancer": {"type": "least_requests"}}
+
+
+class TestPowerOfTwoBalancerSettings(BaseBalancerSettingsTest):
+    impl_type = PowerOfTwoBalancer
+    initial = {"balancer": {"type": "power_of_two"}}
+    expected = {"balancer": {"type": "power_of_two"}}
+    expected_verbose = {"balancer": {"type": "power_of_two"}}
+
+
+class TestPeakEwmaBalancerSettings(BaseBalancerSettingsTest):
+    impl_type = PeakEwmaBalancer
+    initial = {"balancer": {"type": "peak_ewma", "decay": 5.0}}
+    expected = {"balancer": {"type": "peak_ewma", "decay": 5.0}}
+    expected_verbose = {"balancer": {"type": "peak_ewma", "decay": 5.0}}
+
+
+def create_remote(balancer, *weights):
+    return Remote.from_settings_dict(
+        {
+            "endpoints": [{"url": f"http://api{i}.example.com/", "weight": weight} for i, weight in enumerate(weights)],
+            "balancer": {"type": balancer},
+        }
+    )
+
+
+def count_urls(remote, n):
+    return Counter(remote.get_url() for _ in range(n))
+
+
+def test_round_robin():
+    remote = create_remote("round_robin", 1, 1, 1)
+    assert [remote.get_url() for _ in range(4)] == [
+        "http://api0.example.com/",
+        "http://api1.example.com/",
+        "http://api2.example.com/",
+        "http://api0.example.com/",
+    ]
+
+
+def test_weighted_round_robin():
+    remote = create_remote("weighted_round_robin", 5, 1, 1)
+    urls = [remote.get_url() for _ in range(7)]
+
+    assert Counter(urls) == {
+        "http://api0.example.com/": 5,
+        "http://api1.example.com/": 1,
+        "http://api2.example.com/": 1,
+    }
+    # selections are interleaved, instead of sending bursts to the heaviest endpoint
+    assert urls[:3] == ["http://api0.example.com/", "http://api0.example.com/", "http://api1.example.com/"]
+
+
+def test_least_requests():
+    remote = create_remote("least_requests", 1, 1, 1)
+    remote.start_request("http://api0.example.com/")
+    remote.start_request("http://api1.example.com/")
+
+    assert count_urls(remote, 3) == {"http://api2.example.com/": 3}
+
+    remote.end_request("http://api0.example.com/", 0.1)
+    assert remote.get_url() == "http://api0.example.com/"
+
+
+@pytest.mark.parametrize("balancer", ["power_of_two", "peak_ewma"])
+def test_loaded_endpoints_are_avoided(balancer):
+    random.seed(0)
+    remote = create_remote(balancer, 1, 1)
+    for _ in range(10):
+        remote.start_request("http://api0.example.com/")
+
+    assert count_urls(remote, 10) == {"http://api1.example.com/": 10}
+
+
+def test_peak_ewma():
+    random.seed(0)
+    remote = create_remote("peak_ewma", 1, 1, 1)
+    for url, latency in (("http://api0.example.com/", 0.01), ("http://api1.example.com/", 0.01)):
+        remote.start_request(url)
+        remote.end_request(url, latency)
+
+    # the slow endpoint gets almost no traffic (only when not picked as one of the two choices)
+    remote.start_request("http://api2.example.com/")
+    remote.end_request("http://api2.example.com/", 1.0)
+    assert count_urls(remote, 100)["http://api2.example.com/"] == 0
+
+    # peaks are taken into account right away
+    remote.start_request("http://api0.example.com/")
+    remote.end_request("http://api0.example.com/", 2.0)
+    assert remote["http://api0.example.com/"].latency == 2.0
+
+    # cached (or unmeasured) responses do not change the average
+    remote.start_request("http://api0.example.com/")
+    remote.end_request("http://api0.example.com/")
+    assert remote["http://api0.example.com/"].latency == 2.0
+    assert remote["http://api0.example.com/"].in_flight == 0
+
+
+def test_peak_ewma_decays_without_samples():
+    random.seed(0)
+    remote = create_remote("peak_ewma", 1, 1)
+    for url, latency in (("http://api0.example.com/", 0.01), ("http://api1.example.com/", 1.0)):
+        remote.start_request(url)
+        remote.end_request(url, latency)
+    assert count_urls(remote, 10) == {"http://api0.example.com/": 10}
+
+    # the spiked endpoint gets traffic again once its latency decayed, although no sample came in
+    decay = remote.balancer.settings.decay
+    remote["http://api0.example.com/"].latency_updated_at -= 5 * decay
+    remote["http://api1.example.com/"].latency_updated_at -= 10 * decay
+    assert count_urls(remote, 10) == {"http://api1.example.com/": 10}
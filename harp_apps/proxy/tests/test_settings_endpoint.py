@@ -14,7 +14,20 @@ class TestEndpointSettings(BaseConfigurableTest):
     type = EndpointSettings
     initial = {**base_settings}
     expected = {**initial}
-    expected_verbose = {**expected, "description": None, "remote": None}
+    expected_verbose = {
+        **expected,
+        "description": None,
+        "pool": None,
+        "retries": None,
+        "remote": None,
+        "stream": False,
+        "stream_capture_size": 65536,
+        "defer_events": False,
+    }
+
+    def test_pool(self):
+        obj = self.create(pool={"http2": True})
+        assert asdict(obj) == {**self.expected, "pool": {"http2": True}}
 
     def test_old_url_syntax(self):
         obj = self.create(url="http://my-endpoint:8080")
@@ -34,7 +47,13 @@ class TestEndpointSettingsWithRemote(BaseConfigurableTest):
     expected_verbose = {
         **expected,
         "description": None,
+        "pool": None,
+        "retries": None,
+        "stream": False,
+        "stream_capture_size": 65536,
+        "defer_events": False,
         "remote": {
+            "balancer": {"type": "round_robin"},
             "break_on": ["network_error", "unhandled_exception"],
             "check_after": 10.0,
             "endpoints": [
@@ -42,11 +61,13 @@ class TestEndpointSettingsWithRemote(BaseConfigurableTest):
                     "liveness": {"type": "inherit"},
                     "pools": ["default"],
                     "url": "http://example.com/",
+                    "weight": 1,
                 }
             ],
             "min_pool_size": 1,
             "probe": None,
             "liveness": {"type": "inherit"},
+            "limiter": None,
         },
     }
 
@@ -60,6 +81,9 @@ class TestEndpointStateful(BaseConfigurableTest):
         "settings": {
             **TestEndpointSettings.expected,
             "description": None,
+            "stream": False,
+            "stream_capture_size": 65536,
+            "defer_events": False,
         },
     }
     expected_verbose = {
@@ -86,6 +110,7 @@ class TestEndpointStatefulWithRemote(BaseConfigurableTest):
                         "liveness": {"type": "inherit"},
                         "url": "http://example.com/",
                         "pools": ["default"],
+                        "weight": 1,
                     },
                 }
             ],
@@ -95,7 +120,13 @@ class TestEndpointStatefulWithRemote(BaseConfigurableTest):
                 "min_pool_size": 1,
             },
         },
-        "settings": {**TestEndpointSettings.expected, "description": None},
+        "settings": {
+            **TestEndpointSettings.expected,
+            "description": None,
+            "stream": False,
+            "stream_capture_size": 65536,
+            "defer_events": False,
+        },
     }
 
     expected_verbose = {
@@ -105,7 +136,12 @@ class TestEndpointStatefulWithRemote(BaseConfigurableTest):
             "endpoints": [
                 {
                     "failure_reasons": None,
-                    "settings": {"liveness": {"type": "inherit"}, "pools": ["default"], "url": "http://example.com/"},
+                    "settings": {
+                        "liveness": {"type": "inherit"},
+                        "pools": ["default"],
+                        "url": "http://example.com/",
+                        "weight": 1,
+                    },
                     "status": 0,
                 }
             ],
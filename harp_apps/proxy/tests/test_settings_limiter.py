@@ -0,0 +1,175 @@
+import asyncio
+
+import httpx
+import pytest
+import respx
+
+from harp.config import Configurable
+from harp.http import HttpRequest
+from harp.utils.testing.config import BaseConfigurableTest
+from harp_apps.proxy.constants import CHECKING
+from harp_apps.proxy.controllers import HttpProxyController
+from harp_apps.proxy.settings import Remote
+from harp_apps.proxy.settings.limiter import (
+    AimdLimiter,
+    AimdLimiterSettings,
+    ConcurrencyLimitExceeded,
+    GradientLimiter,
+    GradientLimiterSettings,
+    LimiterSettings,
+)
+
+
+class StubSettingsWithLimiter(Configurable):
+    limiter: LimiterSettings = AimdLimiterSettings()
+
+
+class BaseLimiterSettingsTest(BaseConfigurableTest):
+    type = StubSettingsWithLimiter
+    impl_type = None
+
+    def test_build_impl(self):
+        settings = self.create()
+        impl = settings.limiter.build_impl()
+        assert isinstance(impl, self.impl_type)
+        assert impl.limit == settings.limiter.initial_limit
+
+
+class TestAimdLimiterSettings(BaseLimiterSettingsTest):
+    impl_type = AimdLimiter
+    initial = {}
+    expected = {}
+    expected_verbose = {
+        "limiter": {
+            "backoff_ratio": 0.9,
+            "initial_limit": 20,
+            "max_limit": 200,
+            "max_queue": 100,
+            "min_limit": 1,
+            "queue_timeout": 1.0,
+            "timeout": 5.0,
+            "type": "aimd",
+        }
+    }
+
+
+class TestGradientLimiterSettings(BaseLimiterSettingsTest):
+    impl_type = GradientLimiter
+    initial = {"limiter": {"type": "gradient"}}
+    expected = {"limiter": {"type": "gradient"}}
+    expected_verbose = {
+        "limiter": {
+            "initial_limit": 20,
+            "long_window": 600,
+            "max_limit": 200,
+            "max_queue": 100,
+            "min_limit": 1,
+            "queue_timeout": 1.0,
+            "smoothing": 0.2,
+            "tolerance": 1.5,
+            "type": "gradient",
+        }
+    }
+
+
+async def test_queue():
+    limiter = AimdLimiterSettings(initial_limit=1, max_queue=1, queue_timeout=0.05).build_impl()
+    await limiter.acquire()
+
+    waiting = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    assert limiter.queued == 1
+
+    # queue is full
+    with pytest.raises(ConcurrencyLimitExceeded):
+        await limiter.acquire()
+
+    # the waiting request gets the slot of the one that ends
+    limiter.release()
+    await waiting
+    assert (limiter.in_flight, limiter.queued) == (1, 0)
+
+    # waits are bounded
+    with pytest.raises(ConcurrencyLimitExceeded):
+        await limiter.acquire()
+    assert (limiter.in_flight, limiter.queued, limiter.rejected) == (1, 0, 2)
+
+
+async def test_reject_without_queue():
+    limiter = AimdLimiterSettings(initial_limit=1, max_queue=0).build_impl()
+    await limiter.acquire()
+    with pytest.raises(ConcurrencyLimitExceeded):
+        await limiter.acquire()
+
+
+async def test_aimd():
+    limiter = AimdLimiterSettings(initial_limit=4, timeout=1.0, min_limit=2).build_impl()
+    for _ in range(3):
+        await limiter.acquire()
+
+    # the limit grows while used, and is cut on drops (or slow responses)
+    limiter.release(0.1)
+    assert limiter.limit == 5
+    limiter.release(0.1, dropped=True)
+    assert limiter.limit == 4.5
+    limiter.release(2.0)
+    assert limiter.limit == 4.05
+
+    # but never goes under the minimum
+    for _ in range(20):
+        await limiter.acquire()
+        limiter.release(2.0)
+    assert limiter.limit == 2
+
+
+async def test_gradient():
+    limiter = GradientLimiterSettings(initial_limit=10, smoothing=1.0).build_impl()
+    for _ in range(10):
+        await limiter.acquire()
+
+    # stable latency, the limit grows
+    for _ in range(5):
+        limiter.release(0.1)
+        await limiter.acquire()
+    increased = limiter.limit
+    assert increased > 10
+
+    # latency grows a lot, the limit decreases
+    limiter.release(1.0)
+    assert limiter.limit < increased
+
+
+async def test_gradient_instant_responses():
+    limiter = GradientLimiterSettings(initial_limit=10).build_impl()
+    for rtt in (0.0, 0.0, 0.1, 0.0):
+        await limiter.acquire()
+        limiter.release(rtt)
+    assert 1 <= limiter.limit <= 200
+
+
+@respx.mock
+async def test_controller_rejections():
+    release = asyncio.Event()
+
+    async def slow(request):
+        await release.wait()
+        return httpx.Response(200)
+
+    respx.get("http://example.com/").mock(side_effect=slow)
+    remote = Remote.from_settings_dict(
+        {"endpoints": [{"url": "http://example.com/"}], "limiter": {"type": "aimd", "initial_limit": 1, "max_queue": 0}}
+    )
+    controller = HttpProxyController(remote, http_client=httpx.AsyncClient())
+
+    first = asyncio.create_task(controller(HttpRequest()))
+    await asyncio.sleep(0.01)
+
+    response = await controller(HttpRequest())
+    assert response.status == 503
+    assert response.extensions["reason_phrase"] == "Service Unavailable (remote concurrency limit reached)"
+    # the endpoint is not to blame
+    assert remote["http://example.com/"].status == CHECKING
+
+    release.set()
+    assert (await first).status == 200
+    assert remote.limiter.in_flight == 0
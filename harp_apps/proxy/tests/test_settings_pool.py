@@ -0,0 +1,43 @@
+import httpx
+
+from harp.config import ConfigurationBuilder
+from harp.utils.testing.config import BaseConfigurableTest
+from harp_apps.proxy.settings import ConnectionPoolSettings
+
+
+class TestConnectionPoolSettings(BaseConfigurableTest):
+    type = ConnectionPoolSettings
+    initial = {}
+    expected = {}
+    expected_verbose = {
+        "http2": False,
+        "keepalive_expiry": 5.0,
+        "max_connections": 100,
+        "max_keepalive_connections": 20,
+    }
+
+    def test_limits(self):
+        settings = self.create(max_connections=10, max_keepalive_connections=None, keepalive_expiry=30.0)
+        assert settings.limits == httpx.Limits(
+            max_connections=10, max_keepalive_connections=None, keepalive_expiry=30.0
+        )
+
+
+async def test_endpoints_with_dedicated_pools():
+    system = await ConfigurationBuilder(
+        {
+            "applications": ["http_client", "proxy"],
+            "proxy": {
+                "endpoints": [
+                    {"name": "api", "port": 4000, "url": "https://api.example.com/", "pool": {"http2": True}},
+                    {"name": "other", "port": 4001, "url": "https://other.example.com/"},
+                ]
+            },
+        },
+        use_default_applications=False,
+    ).abuild_system()
+
+    transport = system.provider.get("http_client.transport")
+    assert set(transport.get_stats()) == {"default", "api"}
+    assert transport._pools["api"]._pool._http2 is True
+    await system.dispose()
@@ -1,3 +1,6 @@
+import asyncio
+import time
+
 import httpx
 import pytest
 import respx
@@ -11,12 +14,14 @@ from harp_apps.proxy.settings.remote import Remote, RemoteSettings
 class TestRemoteSettings(BaseConfigurableTest):
     type = RemoteSettings
     expected_verbose = {
+        "balancer": {"type": "round_robin"},
         "break_on": ["network_error", "unhandled_exception"],
         "check_after": 10.0,
         "endpoints": None,
         "min_pool_size": 1,
         "probe": None,
         "liveness": {"type": "inherit"},
+        "limiter": None,
     }
 
     def test_validate_break_on(self):
@@ -252,3 +257,75 @@ class TestRemoteStateful(BaseConfigurableTest):
         await remote.check()
         assert url.status == 0
         assert url.failure_reasons == {"PROBE_CONNECT_TIMEOUT"}
+
+    @respx.mock
+    async def test_probes_are_concurrent(self):
+        async def slow(request):
+            await asyncio.sleep(0.2)
+            return httpx.Response(200)
+
+        respx.get("https://a.example.com/health").mock(side_effect=slow)
+        respx.get("https://b.example.com/health").mock(side_effect=slow)
+        respx.get("https://c.example.com/health").mock(side_effect=slow)
+
+        remote = self.create(
+            settings={
+                "endpoints": [
+                    {"url": "https://a.example.com"},
+                    {"url": "https://b.example.com"},
+                    {"url": "https://c.example.com"},
+                ],
+                "probe": {"method": "GET", "path": "/health", "concurrency": 2},
+            }
+        )
+
+        started_at = time.perf_counter()
+        await remote.check()
+        # two rounds, bounded by the concurrency, instead of one probe after the other
+        assert 0.4 <= time.perf_counter() - started_at < 0.6
+        assert all(endpoint.status > 0 for endpoint in remote.endpoints)
+
+    @respx.mock
+    async def test_probe_client_is_kept_alive(self):
+        respx.get("https://example.com/health").mock(return_value=httpx.Response(200))
+        remote = self.create(
+            settings={"endpoints": [{"url": "https://example.com"}], "probe": {"method": "GET", "path": "/health"}}
+        )
+
+        client = remote.probe.client
+        await remote.check()
+        await remote.check()
+        assert remote.probe.client is client
+
+        await remote.probe.aclose()
+        assert client.is_closed
+        assert remote.probe.client is not client
+
+    def test_probe_delays_are_jittered(self):
+        remote = self.create(
+            settings={"endpoints": [{"url": "https://example.com"}], "probe": {"interval": 10.0, "jitter": 0.2}}
+        )
+        delays = {remote.probe.get_delay() for _ in range(100)}
+        assert len(delays) > 1
+        assert all(8.0 <= delay <= 12.0 for delay in delays)
+
+    @respx.mock
+    async def test_check_forever(self):
+        healthcheck = respx.get("https://example.com/health").mock(return_value=httpx.Response(200))
+        remote = self.create(
+            settings={
+                "endpoints": [{"url": "https://example.com"}],
+                "probe": {"method": "GET", "path": "/health", "interval": 0.01},
+            }
+        )
+
+        client = remote.probe.client
+        task = asyncio.create_task(remote.check_forever())
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert healthcheck.call_count > 1
+        assert remote["https://example.com"].status > 0
+        assert client.is_closed
@@ -17,6 +17,7 @@ class TestRemoteEndpointSettings(BaseConfigurableTest):
         "url": "http://example.com/",
         "pools": ["default"],
         "liveness": {"type": "inherit"},
+        "weight": 1,
     }
 
     @pytest.mark.parametrize("pools", all_combinations(AVAILABLE_POOLS))
@@ -87,6 +88,7 @@ class TestRemoteEndpointStateful(BaseConfigurableTest):
             "pools": ["default"],
             "url": "http://example.com/",
             "liveness": {"type": "inherit"},
+            "weight": 1,
         },
     }
     expected_verbose = {
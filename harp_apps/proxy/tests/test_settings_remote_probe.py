@@ -7,8 +7,10 @@ class TestRemoteProbeSettings(BaseConfigurableTest):
     initial = {}
     expected = {}
     expected_verbose = {
+        "concurrency": 10,
         "headers": {},
         "interval": 10.0,
+        "jitter": 0.1,
         "method": "GET",
         "path": "/",
         "timeout": 10.0,
@@ -6,3 +6,6 @@ AVAILABLE_EVENTS = (
 )
 DEFAULT_LEVELS = ("default",)
 DEFAULT_RULES_LEVELS = ("endpoint", "request", "event")
+
+#: Number of distinct match arguments (for example endpoint, request and event) whose matched scripts are memoized.
+MATCH_CACHE_SIZE = 1024
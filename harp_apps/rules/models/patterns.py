@@ -1,4 +1,5 @@
 import re
+from typing import Iterable
 from weakref import WeakValueDictionary
 
 
@@ -18,6 +19,10 @@ class Pattern:
         self._source = source
         self._pattern = re.compile("^" + ".*".join([re.escape(x) for x in source.split("*")]) + "$")
 
+        #: prefix: literal part of the source, before the first wildcard (the whole source for literal patterns)
+        self.prefix = source.split("*", 1)[0]
+        self.is_literal = "*" not in source
+
     @property
     def source(self):
         return self._source
@@ -27,3 +32,41 @@ class Pattern:
 
     def match(self, value: str, /):
         return self._pattern.match(value)
+
+
+class PatternIndex:
+    """
+    Index of a sequence of patterns, to find the ones matching a value without trying them all: literal patterns are
+    found with a hash lookup, and glob patterns are only tried if the value starts with their literal prefix (looked up
+    once per distinct prefix length).
+
+    """
+
+    def __init__(self, patterns: Iterable[Pattern], /):
+        #: literals: position of each literal pattern, by source
+        self._literals = {}
+
+        #: globs: positions and glob patterns, by literal prefix, by prefix length
+        self._globs = {}
+
+        for position, pattern in enumerate(patterns):
+            if pattern.is_literal:
+                self._literals[pattern.source] = position
+            else:
+                self._globs.setdefault(len(pattern.prefix), {}).setdefault(pattern.prefix, []).append(
+                    (position, pattern)
+                )
+
+    def match(self, value: str, /) -> list[int]:
+        """Returns the positions of the patterns matching the given value, in order."""
+        positions = []
+        if (position := self._literals.get(value)) is not None:
+            positions.append(position)
+
+        for length, globs in self._globs.items():
+            for position, pattern in globs.get(value[:length], ()):
+                if pattern.match(value):
+                    positions.append(position)
+
+        positions.sort()
+        return positions
@@ -2,17 +2,26 @@ from functools import reduce
 
 import orjson
 
-from harp_apps.rules.constants import DEFAULT_LEVELS, DEFAULT_RULES_LEVELS
+from harp.utils.collections import LRUDict
+from harp_apps.rules.constants import DEFAULT_LEVELS, DEFAULT_RULES_LEVELS, MATCH_CACHE_SIZE
 from harp_apps.rules.models.compilers import BaseRuleSetCompiler
+from harp_apps.rules.models.patterns import PatternIndex
+from harp_apps.rules.models.scripts import ScriptChain
 
 
-def _match_level(rules, against):
-    for pattern, rules in rules:
-        if pattern.match(against):
-            if hasattr(rules, "items"):
-                yield from rules.items()
-            else:
-                yield from rules
+def _build_index(rules: dict):
+    return PatternIndex(rules.keys()), [
+        _build_index(value) if hasattr(value, "items") else value for value in rules.values()
+    ]
+
+
+def _match_index(index, against, *remaining):
+    patterns, values = index
+    for position in patterns.match(against):
+        if remaining:
+            yield from _match_index(values[position], *remaining)
+        else:
+            yield from values[position]
 
 
 def _rules_as_human_dict(rules: dict, *, show_scripts=True):
@@ -51,24 +60,47 @@ class BaseRuleSet:
         #: rules: the compiled rules
         self._rules = rules or {}
 
+        #: index: pattern indexes of the compiled rules, built on first match
+        self._index = None
+
+        #: cache: matched script chains, by match arguments
+        self._cache = LRUDict(MATCH_CACHE_SIZE)
+
     @property
     def rules(self):
         return self._rules
 
     def add(self, sources: dict):
         self._rules = self._compiler.compile(sources, target=self._rules)
+        self._index = None
+        self._cache.clear()
 
     def match(self, *args):
         """
         Match the given arguments against the rules. Each argument must match a "level" in this ruleset.
         """
+        yield from self.match_chain(*args)
+
+    def match_chain(self, *args) -> ScriptChain:
+        """
+        Match the given arguments against the rules, and return the matching scripts chained into one function (see
+        :class:`ScriptChain <harp_apps.rules.models.scripts.ScriptChain>`).
+
+        Patterns are looked up using an index (see :class:`PatternIndex
+        <harp_apps.rules.models.patterns.PatternIndex>`), and chains are memoized for the most recently used
+        arguments, so that matching cost does not grow with the number of rules.
+        """
         if len(args) != len(self._levels):
             raise ValueError(f"Expected {len(self._levels)} arguments, got {len(args)}")
 
-        rules = self.rules.items()
-        for against in args:
-            rules = _match_level(rules, against)
-        yield from rules
+        chain = self._cache.get(args)
+        if chain is None:
+            if self._index is None:
+                self._index = _build_index(self.rules)
+            chain = ScriptChain(_match_index(self._index, *args))
+            self._cache.set(args, chain)
+
+        return chain
 
     def _asdict(self, /, *, secure=True):
         return _rules_as_human_dict(self.rules)
@@ -1,5 +1,11 @@
 import ast
-from typing import Callable
+import builtins
+import copy
+import symtable
+from typing import Callable, Iterable, Optional
+
+#: Parameters of compiled rule functions, in order. Rule functions return the (maybe replaced) response.
+RULE_PARAMETERS = ("request", "response", "endpoint", "logger", "stop_propagation", "rule")
 
 
 def _get_normalized_sources_from_ast(code_ast: ast.AST, /):
@@ -14,6 +20,69 @@ def _get_normalized_sources_from_ast(code_ast: ast.AST, /):
     return ("\n".join(statements)).strip()
 
 
+def _compile_function(code_ast: ast.Module, /, *, filename: str) -> Optional[Callable]:
+    """
+    Compiles a script body into a function taking the rule parameters (see :data:`RULE_PARAMETERS`) and returning the
+    response, so that names are resolved as fast locals instead of being looked up in a context dict.
+
+    Returns None for the (rare) scripts that would behave differently as a function body than as module code: star
+    imports (not allowed in functions), deleted rule parameters, and assigned builtin names (local for the whole
+    function, even before their assignment). Those must be run using ``exec``.
+    """
+    for node in ast.walk(code_ast):
+        if isinstance(node, ast.Delete) and any(
+            isinstance(target, ast.Name) and target.id in RULE_PARAMETERS for target in node.targets
+        ):
+            return None
+
+    body = copy.deepcopy(code_ast.body) + [ast.Return(value=ast.Name(id="response", ctx=ast.Load()))]
+    function_ast = ast.Module(
+        body=[
+            ast.FunctionDef(
+                name="rule",
+                args=ast.arguments(
+                    posonlyargs=[],
+                    args=[ast.arg(arg=name) for name in RULE_PARAMETERS],
+                    kwonlyargs=[],
+                    kw_defaults=[],
+                    defaults=[],
+                ),
+                body=body,
+                decorator_list=[],
+                type_params=[],
+                lineno=1,
+                col_offset=0,
+            )
+        ],
+        type_ignores=[],
+    )
+    function_ast = ast.fix_missing_locations(function_ast)
+    try:
+        code = compile(function_ast, filename=filename, mode="exec")
+    except SyntaxError:
+        return None
+
+    (function_table,) = symtable.symtable(ast.unparse(function_ast), filename, "exec").get_children()
+    if any(symbol.is_assigned() and hasattr(builtins, symbol.get_name()) for symbol in function_table.get_symbols()):
+        return None
+
+    namespace = {"__name__": filename}
+    exec(code, namespace)
+    return namespace["rule"]
+
+
+def _exec_function(code, /) -> Callable:
+    """Wraps compiled module code into a function with the same signature as compiled rule functions, that runs the
+    code using ``exec`` on a context dict."""
+
+    def rule(*args):
+        context = dict(zip(RULE_PARAMETERS, args))
+        exec(code, None, context)
+        return context["response"]
+
+    return rule
+
+
 class Script(Callable):
     """
     A script object represents a small python script that can be executed in a controlled environment. For example, it
@@ -31,6 +100,7 @@ class Script(Callable):
             source = ast.parse(source)
 
         self._code = compile(source, filename=self._filename, mode="exec")
+        self._function = _compile_function(source, filename=self._filename) or _exec_function(self._code)
         self._source = _get_normalized_sources_from_ast(source)
 
     @property
@@ -41,6 +111,11 @@ class Script(Callable):
     def filename(self):
         return self._filename
 
+    @property
+    def function(self):
+        """The script compiled as a function, see :data:`RULE_PARAMETERS`."""
+        return self._function
+
     @classmethod
     def from_file(cls, filename: str):
         """Constructor from a file content, by filename."""
@@ -68,3 +143,28 @@ class ExecutableObject(Callable):
 
     def __call__(self, context: dict):
         return self._target(context)
+
+    def function(self, *args):
+        context = dict(zip(RULE_PARAMETERS, args))
+        self._target(context)
+        return context["response"]
+
+
+class ScriptChain:
+    """
+    All the scripts matching one event, with their compiled functions (see :data:`RULE_PARAMETERS`), to be run in order,
+    each script being given the response returned by the previous one. Iterating over a chain gives its scripts.
+    """
+
+    def __init__(self, scripts: Iterable[Script | ExecutableObject] = (), /):
+        self.scripts = tuple(scripts)
+        self.functions = tuple(script.function for script in self.scripts)
+
+    def __iter__(self):
+        return iter(self.scripts)
+
+    def __len__(self):
+        return len(self.scripts)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({list(self.scripts)!r})"
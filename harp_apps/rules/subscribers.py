@@ -33,5 +33,6 @@ class RulesSubscriber:
         return self.ruleset.match(*args)
 
     async def on_filter_event(self, event: ProxyFilterEvent | HttpClientFilterEvent):
-        for script in self.match(*event.criteria):
-            event.execute_script(script)
+        chain = self.ruleset.match_chain(*event.criteria)
+        if len(chain):
+            event.execute_function(*chain.functions)
@@ -1,5 +1,5 @@
 from harp_apps.rules.models.compilers import BaseRuleSetCompiler
-from harp_apps.rules.models.patterns import Pattern
+from harp_apps.rules.models.patterns import Pattern, PatternIndex
 from harp_apps.rules.models.rulesets import BaseRuleSet, RuleSet
 from harp_apps.rules.models.scripts import Script
 
@@ -59,3 +59,45 @@ def test_repr():
     compiler = BaseRuleSetCompiler(levels=levels)
     ruleset = BaseRuleSet(compiler.compile({"foo": {"bar": "print('Hello, World!')"}}))
     assert repr(ruleset) == 'BaseRuleSet({"foo":{"bar":"..."}})'
+
+
+def test_match_order_with_literal_and_glob_patterns():
+    ruleset = BaseRuleSet(
+        BaseRuleSetCompiler().compile(
+            {
+                "GET /api/*": "print('glob')",
+                "*": "print('catch all')",
+                "GET /api/users": "print('literal')",
+                "POST /api/*": "print('other method')",
+                "*/users": "print('suffix')",
+            }
+        )
+    )
+
+    assert [script.source for script in ruleset.match("GET /api/users")] == [
+        Script("print('glob')").source,
+        Script("print('catch all')").source,
+        Script("print('literal')").source,
+        Script("print('suffix')").source,
+    ]
+    assert [script.source for script in ruleset.match("PUT /users")] == [
+        Script("print('catch all')").source,
+        Script("print('suffix')").source,
+    ]
+
+
+def test_match_cache_is_invalidated_on_add():
+    ruleset = RuleSet()
+    ruleset.add({"*": {"GET /": {"on_request": "print('first')"}}})
+    assert len(list(ruleset.match("api", "GET /", "on_request"))) == 1
+
+    ruleset.add({"api": {"GET *": {"on_request": "print('second')"}}})
+    assert len(list(ruleset.match("api", "GET /", "on_request"))) == 2
+
+
+def test_pattern_index():
+    index = PatternIndex(map(Pattern, ("foo", "f*", "*o", "bar*")))
+    assert index.match("foo") == [0, 1, 2]
+    assert index.match("fo") == [1, 2]
+    assert index.match("barfoo") == [2, 3]
+    assert index.match("") == []
@@ -1,7 +1,7 @@
 from tempfile import NamedTemporaryFile
 from unittest.mock import Mock
 
-from harp_apps.rules.models.scripts import Script
+from harp_apps.rules.models.scripts import ExecutableObject, Script, ScriptChain
 
 
 def test_script_from_sources():
@@ -28,3 +28,53 @@ def test_script_from_file():
 
     assert print_mock.called
     assert print_mock.call_count == 1
+
+
+def test_script_function():
+    # nested functions can use the rule parameters, as they are function locals instead of exec locals
+    script = Script("def get_path():\n    return request.path\nresponse = (response, get_path(), endpoint, rule)")
+
+    request = Mock(path="/foo")
+    assert script.function(request, "previous", "api", Mock(), Mock(), "on_request") == (
+        "previous",
+        "/foo",
+        "api",
+        "on_request",
+    )
+
+
+def test_script_function_keeps_response_if_not_assigned():
+    script = Script("logger.info(request)")
+    logger = Mock()
+    assert script.function("request", "response", "api", logger, Mock(), "on_request") == "response"
+    logger.info.assert_called_once_with("request")
+
+
+def test_script_chain():
+    def replace_status(context):
+        context["response"] = context["response"] + ("callable",)
+
+    chain = ScriptChain(
+        [Script("response = (response, 'first')"), ExecutableObject(replace_status), Script("response += ('last',)")]
+    )
+    assert len(chain) == 3
+
+    response = "initial"
+    for function in chain.functions:
+        response = function(None, response, "api", None, None, "on_request")
+    assert response == ("initial", "first", "callable", "last")
+
+
+def test_script_function_falls_back_to_exec():
+    # valid module code that would not compile, or behave differently, as a function body
+    for source in (
+        "from string import *\nresponse = ascii_lowercase[:3]",
+        "len = 3\nresponse = len",
+        "del response\nresponse = 'abc'",
+    ):
+        script = Script(source)
+        assert script.function(None, None, "api", None, None, "on_request") in ("abc", 3)
+
+    # builtins read before being assigned resolve as in module code
+    script = Script("response = len(response)\nlen = None")
+    assert script.function(None, "abc", "api", None, None, "on_request") == 3
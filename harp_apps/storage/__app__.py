@@ -1,6 +1,5 @@
 """Storage Application"""
 
-from functools import partial
 from os.path import dirname
 from pathlib import Path
 from typing import cast
@@ -28,13 +27,9 @@ async def _run_migrations(engine: AsyncEngine):
 
     else:
         # todo refactor ? see harp_apps.storage.utils.testing.mixins.StorageTestFixtureMixin
-        from alembic import command
+        from harp_apps.storage.utils.migrations import upgrade
 
-        from harp_apps.storage.utils.migrations import create_alembic_config, do_migrate
-
-        alembic_cfg = create_alembic_config(engine.url.render_as_string(hide_password=False))
-        migrator = partial(command.upgrade, alembic_cfg, "head")
-        await do_migrate(engine, migrator=migrator)
+        await upgrade(engine)
 
 
 async def on_bind(event: OnBindEvent):
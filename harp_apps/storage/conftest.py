@@ -30,6 +30,13 @@ async def sql_blob_storage(sql_engine):
     yield SqlBlobStorage(sql_engine)
 
 
+@pytest.fixture
+async def filesystem_blob_storage(tmp_path):
+    from harp_apps.storage.services.blob_storages.filesystem import FilesystemBlobStorage
+
+    yield FilesystemBlobStorage(tmp_path / "blobs")
+
+
 @pytest.fixture(params=["sql", "redis"])
 async def blob_storage(request, sql_engine):
     if request.param == "sql":
@@ -1,3 +1,4 @@
+from datetime import timedelta
 from enum import Enum
 
 
@@ -8,3 +9,15 @@ class TimeBucket(Enum):
     DAY = "day"
     HOUR = "hour"
     MINUTE = "minute"
+
+
+#: Granularities transactions are pre-aggregated into, each computed from the previous one (or from raw transactions for
+#: the first), with how long their rollups are kept (relative to the latest rollup), if not forever.
+ROLLUP_RETENTIONS = {
+    TimeBucket.MINUTE: timedelta(days=2),
+    TimeBucket.HOUR: timedelta(days=90),
+    TimeBucket.DAY: None,
+}
+
+#: Rollups are recomputed from this far before the latest one, to account for transactions written or finished late.
+ROLLUP_REFRESH_WINDOW = timedelta(minutes=10)
@@ -0,0 +1,25 @@
+"""transactions keyset index
+
+Revision ID: 8f2c61d0b5e4
+Revises: 4bdd9e1d790d
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8f2c61d0b5e4"
+down_revision: Union[str, None] = "4bdd9e1d790d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_transactions_started_at_id", "transactions", ["started_at", "id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transactions_started_at_id", table_name="transactions")
@@ -0,0 +1,49 @@
+"""transaction rollups
+
+Revision ID: 3a9e4b7c1f20
+Revises: 8f2c61d0b5e4
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3a9e4b7c1f20"
+down_revision: Union[str, None] = "8f2c61d0b5e4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "transaction_rollups",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("granularity", sa.String(length=6), nullable=False),
+        sa.Column("bucket", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("endpoint", sa.String(length=32), nullable=True),
+        sa.Column("status_class", sa.String(length=3), nullable=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("errors", sa.Integer(), nullable=False),
+        sa.Column("cached", sa.Integer(), nullable=False),
+        sa.Column("elapsed_sum", sa.Float(), nullable=False),
+        sa.Column("elapsed_count", sa.Integer(), nullable=False),
+        sa.Column("tpdex_sum", sa.Float(), nullable=False),
+        sa.Column("tpdex_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("id"),
+    )
+    op.create_index(
+        "ix_transaction_rollups_granularity_bucket",
+        "transaction_rollups",
+        ["granularity", "bucket"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transaction_rollups_granularity_bucket", table_name="transaction_rollups")
+    op.drop_table("transaction_rollups")
@@ -0,0 +1,25 @@
+"""transactions finished_at index
+
+Revision ID: c5d1e8a2b7f3
+Revises: 3a9e4b7c1f20
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c5d1e8a2b7f3"
+down_revision: Union[str, None] = "3a9e4b7c1f20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f("ix_transactions_finished_at"), "transactions", ["finished_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_transactions_finished_at"), table_name="transactions")
@@ -3,6 +3,7 @@ from .blobs import Blob, BlobsRepository
 from .flags import FLAGS_BY_NAME, FLAGS_BY_TYPE, FlagsRepository, UserFlag
 from .messages import Message, MessagesRepository
 from .metrics import Metric, MetricsRepository, MetricValue, MetricValuesRepository
+from .rollups import TransactionRollup, TransactionRollupsRepository
 from .tags import Tag, TagsRepository, TagValue, TagValuesRepository
 from .transactions import Transaction, TransactionsRepository
 from .users import User, UsersRepository
@@ -24,6 +25,8 @@ __all__ = [
     "Tag",
     "TagsRepository",
     "Transaction",
+    "TransactionRollup",
+    "TransactionRollupsRepository",
     "TransactionsRepository",
     "User",
     "UserFlag",
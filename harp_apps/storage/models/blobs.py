@@ -33,6 +33,9 @@ class BlobsRepository(Repository[Blob]):
         query = select(func.count(subquery.c.id)).where(subquery.c[1] == 0)
         return query
 
+    def referenced_ids(self):
+        return select(Message.headers).union(select(Message.body).where(Message.body.is_not(None)))
+
     def delete_orphans(self):
         MH = aliased(Message, name="mh")
         MB = aliased(Message, name="mb")
@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from sqlalchemy import TIMESTAMP, Float, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base, Repository
+
+
+class TransactionRollup(Base):
+    """
+    Pre-aggregated transaction statistics, for one time bucket of a given granularity (see
+    :data:`ROLLUP_RETENTIONS <harp_apps.storage.constants.ROLLUP_RETENTIONS>`), endpoint and status class. Sums and
+    counts are stored instead of means, so that rollups can be added together.
+
+    """
+
+    __tablename__ = "transaction_rollups"
+    __table_args__ = (Index("ix_transaction_rollups_granularity_bucket", "granularity", "bucket"),)
+
+    id = mapped_column(Integer(), primary_key=True, unique=True, autoincrement=True)
+    granularity: Mapped[str] = mapped_column(String(6))
+    bucket: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True))
+    endpoint: Mapped[str] = mapped_column(String(32), nullable=True)
+    status_class: Mapped[str] = mapped_column(String(3), nullable=True)
+
+    count: Mapped[int] = mapped_column(Integer(), default=0)
+    errors: Mapped[int] = mapped_column(Integer(), default=0)
+    cached: Mapped[int] = mapped_column(Integer(), default=0)
+    elapsed_sum: Mapped[float] = mapped_column(Float(), default=0.0)
+    elapsed_count: Mapped[int] = mapped_column(Integer(), default=0)
+    tpdex_sum: Mapped[float] = mapped_column(Float(), default=0.0)
+    tpdex_count: Mapped[int] = mapped_column(Integer(), default=0)
+
+
+class TransactionRollupsRepository(Repository[TransactionRollup]):
+    Type = TransactionRollup
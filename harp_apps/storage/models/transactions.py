@@ -1,8 +1,8 @@
 from datetime import UTC, datetime, timedelta
 from typing import TYPE_CHECKING, List
 
-from sqlalchemy import TIMESTAMP, Boolean, Column, Float, ForeignKey, Integer, String, Table, exists, insert
-from sqlalchemy.orm import Mapped, mapped_column, relationship, selectinload
+from sqlalchemy import TIMESTAMP, Boolean, Column, Float, ForeignKey, Index, Integer, String, Table, exists, insert
+from sqlalchemy.orm import Mapped, mapped_column, noload, relationship, selectinload
 
 from harp.models.transactions import Transaction as TransactionModel
 
@@ -27,12 +27,13 @@ transaction_tag_values_association_table = Table(
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (Index("ix_transactions_started_at_id", "started_at", "id"),)
 
     id: Mapped[int] = mapped_column(String(27), primary_key=True, unique=True)
     type: Mapped[str] = mapped_column(String(10), index=True)
     endpoint: Mapped[str] = mapped_column(String(32), nullable=True, index=True)
     started_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), index=True)
-    finished_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+    finished_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=True, index=True)
     elapsed: Mapped[float] = mapped_column(Float(), nullable=True)
     tpdex: Mapped[int] = mapped_column(Integer(), nullable=True)
     x_method: Mapped[str] = mapped_column(String(16), nullable=True, index=True)
@@ -114,6 +115,9 @@ class TransactionsRepository(Repository[Transaction]):
                     self.Type.messages,
                 )
             )
+        else:
+            # lazy loading is not available with async sessions, leave the relationship empty instead
+            query = query.options(noload(self.Type.messages))
 
         # should we select flags for given user id?
         if with_user_flags:
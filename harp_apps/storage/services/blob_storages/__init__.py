@@ -0,0 +1,16 @@
+from typing import Optional, TypeVar
+
+T = TypeVar("T")
+
+
+def find_blob_storage(storage, type_: type[T]) -> Optional[T]:
+    """
+    Finds the first blob storage of the given type in a chain of blob storage decorators, each decorator wrapping the
+    next one as its ``storage`` attribute. Returns None if there is no such blob storage in the chain.
+
+    """
+    while storage is not None:
+        if isinstance(storage, type_):
+            return storage
+        storage = getattr(storage, "storage", None)
+    return None
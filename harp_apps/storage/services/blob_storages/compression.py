@@ -0,0 +1,144 @@
+import asyncio
+import gzip
+import threading
+from fnmatch import fnmatchcase
+from typing import Callable, Iterable, NamedTuple, Optional, override
+
+from harp.models import Blob
+from harp_apps.storage.settings import BlobCompressionSettings
+from harp_apps.storage.types import IBlobStorage
+
+#: Content type parameter recording the compression algorithm of a stored blob.
+COMPRESSION_PARAMETER = "compression"
+
+#: Stored content types cannot be longer than this (see the sql blobs table), blobs are stored as is otherwise.
+MAX_CONTENT_TYPE_LENGTH = 64
+
+
+class Codec(NamedTuple):
+    compress: Callable[[bytes], bytes]
+    decompress: Callable[[bytes], bytes]
+
+
+def get_codec(algorithm: str, level: Optional[int] = None) -> Codec:
+    if algorithm == "gzip":
+        return Codec(
+            lambda data: gzip.compress(data, compresslevel=6 if level is None else level, mtime=0),
+            gzip.decompress,
+        )
+
+    if algorithm == "zstd":
+        try:
+            import zstandard
+        except ImportError as exc:
+            raise RuntimeError("The «zstandard» package is required to use zstd compression.") from exc
+
+        # zstandard (de)compressors cannot be used concurrently, and codecs are run in threads: keep one per thread.
+        local = threading.local()
+
+        def compress(data: bytes) -> bytes:
+            if (compressor := getattr(local, "compressor", None)) is None:
+                compressor = local.compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+            return compressor.compress(data)
+
+        def decompress(data: bytes) -> bytes:
+            if (decompressor := getattr(local, "decompressor", None)) is None:
+                decompressor = local.decompressor = zstandard.ZstdDecompressor()
+            return decompressor.decompress(data)
+
+        return Codec(compress, decompress)
+
+    raise ValueError(f"Unsupported compression algorithm: {algorithm!r}")
+
+
+class CompressingBlobStorage(IBlobStorage):
+    """
+    Blob storage decorator compressing blobs before they reach the underlying storage, if they are large enough and of
+    a compressible content type (see :class:`BlobCompressionSettings
+    <harp_apps.storage.settings.BlobCompressionSettings>`).
+
+    The algorithm is recorded per blob, as a content type parameter (``application/json;compression=gzip``), so that
+    reads are always decompressed transparently, even if the settings changed since the blob was written. Blobs are
+    stored as is if compression does not make them smaller. Compression and decompression run in a thread, to keep
+    the event loop free.
+
+    """
+
+    def __init__(self, storage: IBlobStorage, settings: Optional[BlobCompressionSettings] = None):
+        self.storage = storage
+        self.settings = settings or BlobCompressionSettings()
+        self.codec = get_codec(self.settings.algorithm, self.settings.level) if self.settings.algorithm else None
+        self._decoders = {}
+
+    @property
+    def type(self):
+        return self.storage.type
+
+    def should_compress(self, blob: Blob) -> bool:
+        return (
+            self.codec is not None
+            and len(blob.data) >= self.settings.threshold
+            and bool(blob.content_type)
+            and ";" not in blob.content_type
+            and any(fnmatchcase(blob.content_type, pattern) for pattern in self.settings.content_types)
+        )
+
+    def compress(self, blob: Blob) -> Blob:
+        """Returns the blob as it should be stored, compressed or not."""
+        if not self.should_compress(blob):
+            return blob
+
+        content_type = f"{blob.content_type};{COMPRESSION_PARAMETER}={self.settings.algorithm}"
+        if len(content_type) > MAX_CONTENT_TYPE_LENGTH:
+            return blob
+
+        data = self.codec.compress(blob.data)
+        if len(data) >= len(blob.data):
+            return blob
+
+        return Blob(id=blob.id, data=data, content_type=content_type)
+
+    def decompress(self, blob: Blob) -> Blob:
+        """Returns the original blob from a stored one, compressed or not."""
+        if not blob.content_type or ";" not in blob.content_type:
+            return blob
+
+        content_type, _, parameter = blob.content_type.partition(";")
+        name, _, algorithm = parameter.partition("=")
+        if name != COMPRESSION_PARAMETER:
+            return blob
+
+        if algorithm not in self._decoders:
+            self._decoders[algorithm] = get_codec(algorithm).decompress
+
+        return Blob(id=blob.id, data=self._decoders[algorithm](blob.data), content_type=content_type or None)
+
+    async def compress_many(self, blobs: Iterable[Blob]) -> list[Blob]:
+        """Compresses a bunch of blobs at once (using one thread hop), for callers writing to the storage directly."""
+        blobs = list(blobs)
+        if not any(map(self.should_compress, blobs)):
+            return blobs
+        return await asyncio.to_thread(lambda: list(map(self.compress, blobs)))
+
+    @override
+    async def get(self, blob_id: str):
+        blob = await self.storage.get(blob_id)
+        if blob and blob.content_type and ";" in blob.content_type:
+            return await asyncio.to_thread(self.decompress, blob)
+        return blob
+
+    @override
+    async def put(self, blob: Blob) -> Blob:
+        if self.should_compress(blob):
+            await self.storage.put(await asyncio.to_thread(self.compress, blob))
+        else:
+            await self.storage.put(blob)
+        return blob
+
+    @override
+    async def delete(self, blob_id: str):
+        return await self.storage.delete(blob_id)
+
+    @override
+    async def exists(self, blob_id: str) -> bool:
+        return await self.storage.exists(blob_id)
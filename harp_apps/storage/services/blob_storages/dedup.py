@@ -0,0 +1,112 @@
+import time
+from typing import Iterable, Optional, override
+
+from harp.models import Blob
+from harp.utils.collections import BloomFilter, LRUDict
+from harp_apps.storage.settings import BlobDeduplicationSettings
+from harp_apps.storage.types import IBlobStorage
+
+
+class DeduplicatingBlobStorage(IBlobStorage):
+    """
+    Blob storage decorator remembering the ids of recently stored blobs, so that storing them again does not hit the
+    underlying storage at all. As blobs are content addressed, identical headers or bodies (which are most of the
+    traffic) are only written once.
+
+    Known ids are kept in a memory bounded set of recently used ids, optionally backed by a bloom filter that can
+    remember way more ids for the same memory, at the cost of rare false positives (see
+    :class:`BlobDeduplicationSettings <harp_apps.storage.settings.BlobDeduplicationSettings>`). Ids are forgotten
+    ``ttl`` seconds after being stored (the bloom filter is reset every ``ttl`` seconds), as blobs may be removed by
+    another process's janitor once orphaned, without this process knowing.
+
+    """
+
+    #: Content types of blobs that are not content addressed (their data may change for a given id), and that must
+    #: always be written through.
+    mutable_content_types = frozenset({"cache/meta"})
+
+    def __init__(self, storage: IBlobStorage, settings: Optional[BlobDeduplicationSettings] = None):
+        self.storage = storage
+        settings = settings or BlobDeduplicationSettings()
+
+        self.ttl = settings.ttl
+
+        #: recently stored ids, with the (monotonic) time they were stored at
+        self.recent = LRUDict(settings.cache_size) if settings.cache_size else None
+        self.filter = (
+            BloomFilter(settings.bloom_filter_capacity, settings.bloom_filter_error_rate)
+            if settings.bloom_filter_capacity
+            else None
+        )
+        self._filter_started_at = time.monotonic()
+
+    @property
+    def type(self):
+        return self.storage.type
+
+    def known(self, blob_id: str) -> bool:
+        """Returns whether the given blob id was stored less than ``ttl`` seconds ago, without querying the underlying
+        storage."""
+        now = time.monotonic()
+        if self.recent is not None and (stored_at := self.recent.get(blob_id)) is not None:
+            if now - stored_at < self.ttl:
+                return True
+            self.recent.pop(blob_id)
+        return self.filter is not None and not self._expire_filter(now) and blob_id in self.filter
+
+    def remember(self, blob_ids: Iterable[str]):
+        """Marks the given blob ids as stored (for example, if they were written to the underlying storage directly)."""
+        now = time.monotonic()
+        if self.filter is not None:
+            self._expire_filter(now)
+        for blob_id in blob_ids:
+            if self.recent is not None:
+                self.recent.set(blob_id, now)
+            if self.filter is not None and blob_id not in self.filter:
+                if len(self.filter) >= self.filter.capacity:
+                    self.filter.clear()
+                self.filter.add(blob_id)
+
+    def _expire_filter(self, now: float) -> bool:
+        """Resets the bloom filter if it is older than ``ttl`` seconds, and returns whether it was."""
+        if now - self._filter_started_at < self.ttl:
+            return False
+        self.filter.clear()
+        self._filter_started_at = now
+        return True
+
+    def clear(self):
+        """Forget all known ids."""
+        if self.recent is not None:
+            self.recent.clear()
+        if self.filter is not None:
+            self.filter.clear()
+
+    @override
+    async def get(self, blob_id: str):
+        return await self.storage.get(blob_id)
+
+    @override
+    async def put(self, blob: Blob) -> Blob:
+        if blob.content_type in self.mutable_content_types:
+            return await self.storage.put(blob)
+
+        if self.known(blob.id):
+            return blob
+
+        blob = await self.storage.put(blob)
+        self.remember((blob.id,))
+        return blob
+
+    @override
+    async def delete(self, blob_id: str):
+        if self.recent is not None:
+            self.recent.pop(blob_id)
+        if self.filter is not None and blob_id in self.filter:
+            # bloom filters cannot forget one item
+            self.filter.clear()
+        return await self.storage.delete(blob_id)
+
+    @override
+    async def exists(self, blob_id: str) -> bool:
+        return self.known(blob_id) or await self.storage.exists(blob_id)
@@ -0,0 +1,134 @@
+import asyncio
+import mmap
+import os
+import tempfile
+from typing import Iterable, override
+
+from harp import get_logger
+from harp.models import Blob
+from harp_apps.storage.types import IBlobStorage
+
+logger = get_logger(__name__)
+
+#: Default directory for blobs, relative to the working directory unless absolute.
+DEFAULT_PATH = "blobs"
+
+#: Size (in bytes) above which blob files are memory mapped for reading, instead of read through a buffer.
+MMAP_THRESHOLD = 1024 * 1024
+
+#: Prefix of temporary files, written before being atomically renamed to their final name.
+TEMPORARY_PREFIX = ".tmp-"
+
+
+class FilesystemBlobStorage(IBlobStorage):
+    """
+    Stores blobs as files, under sharded directories named after the first characters of their (sha1) id, so that no
+    directory gets too many entries (``ab/cd/abcdef...``). Each file contains the content type on its first line,
+    followed by the raw data.
+
+    Writes go to a temporary file first, then are atomically renamed, so that readers never see partial blobs. Large
+    blobs are read through a memory mapping, copying the data once, straight from the page cache. Disk operations run
+    in a thread, to keep the event loop free.
+
+    """
+
+    type = "filesystem"
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = os.path.abspath(path)
+        os.makedirs(self.path, exist_ok=True)
+
+    def _get_directory(self, blob_id: str) -> str:
+        return os.path.join(self.path, blob_id[0:2], blob_id[2:4])
+
+    def _get_filename(self, blob_id: str) -> str:
+        if not blob_id or os.sep in blob_id or (os.altsep and os.altsep in blob_id) or blob_id.startswith("."):
+            raise ValueError(f"Invalid blob id: {blob_id!r}")
+        return os.path.join(self._get_directory(blob_id), blob_id)
+
+    def _read(self, blob_id: str):
+        try:
+            with open(self._get_filename(blob_id), "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size < MMAP_THRESHOLD:
+                    content_type = f.readline()
+                    data = f.read()
+                else:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        offset = mapped.find(b"\n") + 1
+                        content_type, data = mapped[:offset], mapped[offset:]
+        except FileNotFoundError:
+            return None
+
+        content_type = content_type.rstrip(b"\n").decode()
+        return Blob(id=blob_id, data=data, content_type=content_type or None)
+
+    def _write(self, blob: Blob):
+        filename = self._get_filename(blob.id)
+        directory = os.path.dirname(filename)
+        os.makedirs(directory, exist_ok=True)
+
+        fd, temporary_filename = tempfile.mkstemp(prefix=TEMPORARY_PREFIX, dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(((blob.content_type or "") + "\n").encode())
+                f.write(blob.data)
+            os.replace(temporary_filename, filename)
+        except BaseException:
+            os.unlink(temporary_filename)
+            raise
+
+    def _delete(self, blob_id: str):
+        try:
+            os.unlink(self._get_filename(blob_id))
+        except FileNotFoundError:
+            pass
+
+    def _sweep(self, referenced: set[str], before: float) -> int:
+        count = 0
+        for entry in self._scan():
+            if entry.name not in referenced and entry.stat().st_mtime < before:
+                try:
+                    os.unlink(entry.path)
+                    count += 1
+                except FileNotFoundError:
+                    pass
+        return count
+
+    def _scan(self) -> Iterable[os.DirEntry]:
+        for level1 in os.scandir(self.path):
+            if not level1.is_dir():
+                continue
+            for level2 in os.scandir(level1.path):
+                if not level2.is_dir():
+                    continue
+                yield from (entry for entry in os.scandir(level2.path) if entry.is_file())
+
+    @override
+    async def get(self, blob_id: str):
+        return await asyncio.to_thread(self._read, blob_id)
+
+    @override
+    async def put(self, blob: Blob) -> Blob:
+        await asyncio.to_thread(self._write, blob)
+        return blob
+
+    @override
+    async def delete(self, blob_id: str):
+        await asyncio.to_thread(self._delete, blob_id)
+
+    @override
+    async def exists(self, blob_id: str) -> bool:
+        return await asyncio.to_thread(os.path.exists, self._get_filename(blob_id))
+
+    async def sweep(self, referenced: set[str], /, *, before: float) -> int:
+        """
+        Sweep phase of a mark-and-sweep garbage collection: removes all blob files (including abandoned temporary
+        files) whose id is not in the given referenced set, and that were last modified before the given timestamp, so
+        that blobs written since the mark phase started are kept.
+
+        :param referenced: set of blob ids still in use
+        :param before: timestamp (as in :func:`time.time`) of the mark phase start, minus some safety margin
+        :return: number of removed files
+        """
+        return await asyncio.to_thread(self._sweep, referenced, before)
@@ -1,23 +1,96 @@
+import time
+from collections import Counter, OrderedDict
+from typing import Optional, override
+
 from harp.models import Blob
+from harp_apps.storage.settings import MemoryBlobStorageSettings
 from harp_apps.storage.types import IBlobStorage
 
 
 class MemoryBlobStorage(IBlobStorage):
+    """
+    Stores blobs in memory, bounded in total size (and optionally in number of blobs), evicting the least recently
+    used blobs first once full. Blobs can also expire, some time after they were written (see
+    :class:`MemoryBlobStorageSettings <harp_apps.storage.settings.MemoryBlobStorageSettings>`). Blobs larger than the
+    maximum size are not stored.
+
+    Hits, misses, evictions and expirations are counted in ``stats``.
+
+    """
+
     type = "memory"
 
-    def __init__(self):
+    def __init__(self, settings: Optional[MemoryBlobStorageSettings] = None):
         super().__init__()
-        self._blobs = {}
+        self.settings = settings or MemoryBlobStorageSettings()
+
+        #: blobs, least recently used first
+        self._blobs: OrderedDict[str, Blob] = OrderedDict()
+        #: expiry times (as in :func:`time.monotonic`), least recently written first
+        self._expiries: OrderedDict[str, float] = OrderedDict()
+
+        self.size = 0
+        self.stats = Counter()
+
+    def _expired(self, blob_id: str) -> bool:
+        expires_at = self._expiries.get(blob_id)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._remove(blob_id)
+            self.stats["expirations"] += 1
+            return True
+        return False
 
+    def _remove(self, blob_id: str):
+        blob = self._blobs.pop(blob_id, None)
+        if blob is not None:
+            self.size -= len(blob.data)
+        self._expiries.pop(blob_id, None)
+
+    def _purge(self):
+        now = time.monotonic()
+        while self._expiries:
+            blob_id, expires_at = next(iter(self._expiries.items()))
+            if expires_at > now:
+                break
+            self._remove(blob_id)
+            self.stats["expirations"] += 1
+
+        max_items = self.settings.max_items
+        while self.size > self.settings.max_size or (max_items is not None and len(self._blobs) > max_items):
+            self._remove(next(iter(self._blobs)))
+            self.stats["evictions"] += 1
+
+    @override
     async def get(self, blob_id: str):
-        return self._blobs.get(blob_id, None)
+        if blob_id not in self._blobs or self._expired(blob_id):
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["hits"] += 1
+        self._blobs.move_to_end(blob_id)
+        return self._blobs[blob_id]
 
+    @override
     async def put(self, blob: Blob) -> Blob:
+        self._remove(blob.id)
+        if len(blob.data) > self.settings.max_size:
+            return blob
+
         self._blobs[blob.id] = blob
+        self.size += len(blob.data)
+        if self.settings.ttl is not None:
+            self._expiries[blob.id] = time.monotonic() + self.settings.ttl
+
+        self._purge()
         return blob
 
+    @override
     async def delete(self, blob_id: str):
-        del self._blobs[blob_id]
+        self._remove(blob_id)
 
+    @override
     async def exists(self, blob_id: str) -> bool:
-        return False
+        return blob_id in self._blobs and not self._expired(blob_id)
+
+    def __len__(self):
+        return len(self._blobs)
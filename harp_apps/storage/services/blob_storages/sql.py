@@ -1,7 +1,6 @@
-from collections import OrderedDict
 from typing import override
 
-from sqlalchemy import delete, insert, select
+from sqlalchemy import delete, func, select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncEngine
 
@@ -9,47 +8,17 @@ from harp import get_logger
 from harp.models import Blob
 from harp_apps.storage.models import Blob as SqlBlob
 from harp_apps.storage.types import IBlobStorage
+from harp_apps.storage.services.blob_storages.dedup import DeduplicatingBlobStorage
+from harp_apps.storage.utils.sql import insert_ignore, upsert
 
 logger = get_logger(__name__)
 
 
-class LRUSet:
-    def __init__(self, capacity):
-        self.capacity = capacity
-        self.items = OrderedDict()
-
-    def add(self, item):
-        if item in self.items:
-            # Move to the end to mark as recently used
-            self.items.move_to_end(item)
-        else:
-            self.items[item] = True
-            if len(self.items) > self.capacity:
-                # Remove the least recently used item
-                self.items.popitem(last=False)
-
-    def remove(self, item):
-        if item in self.items:
-            del self.items[item]
-
-    def exists(self, item):
-        return item in self.items
-
-    def get_lru(self):
-        if self.items:
-            return next(iter(self.items))
-        return None
-
-    def __repr__(self):
-        return f"LRUSet({set(self.items.keys())})"
-
-
 class SqlBlobStorage(IBlobStorage):
     type = "sql"
 
     def __init__(self, engine: AsyncEngine):
         self.engine = engine
-        self.seen = LRUSet(1000)
 
     @override
     async def get(self, blob_id):
@@ -71,29 +40,33 @@ class SqlBlobStorage(IBlobStorage):
     @override
     async def put(self, blob: Blob) -> Blob:
         """
-        Store a blob in the database.
+        Store a blob in the database, unless a blob with the same id is already there (using a single, dialect-native
+        "insert or ignore" statement). Blobs of mutable content types (see
+        :attr:`DeduplicatingBlobStorage.mutable_content_types`), that are not content addressed, replace the existing
+        one instead (and count as new, for the janitor's orphans grace period).
 
         :param blob_id: sha1 hash of the blob
         :param data: blob data
         """
-        if self.seen.exists(blob.id):
-            return blob
+        values = dict(id=blob.id, data=blob.data, content_type=blob.content_type)
+        mutable = (blob.content_type or "").partition(";")[0] in DeduplicatingBlobStorage.mutable_content_types
+        dialect = self.engine.dialect.name
+        if mutable:
+            values["created_at"] = func.now()
 
         async with self.engine.connect() as conn:
-            if not (
-                await conn.execute(
-                    select(
-                        select(SqlBlob.id).where(SqlBlob.id == blob.id).exists(),
-                    ),
-                )
-            ).scalar_one():
-                try:
-                    await conn.execute(
-                        insert(SqlBlob).values(id=blob.id, data=blob.data, content_type=blob.content_type),
-                    )
+            try:
+                if mutable:
+                    await conn.execute(upsert(SqlBlob, values, dialect=dialect))
+                else:
+                    await conn.execute(insert_ignore(SqlBlob, dialect=dialect).values(**values))
+                await conn.commit()
+            except IntegrityError:
+                # already there? that's fine, unless it has to be replaced.
+                await conn.rollback()
+                if mutable:
+                    await conn.execute(update(SqlBlob).where(SqlBlob.id == blob.id).values(**values))
                     await conn.commit()
-                except IntegrityError:
-                    pass  # already there? that's fine!
         return blob
 
     @override
@@ -103,7 +76,6 @@ class SqlBlobStorage(IBlobStorage):
 
         :param blob_id: sha1 hash of the blob
         """
-        self.seen.remove(blob_id)
         async with self.engine.connect() as conn:
             await conn.execute(
                 delete(SqlBlob).where(SqlBlob.id == blob_id),
@@ -118,9 +90,6 @@ class SqlBlobStorage(IBlobStorage):
         :param blob_id: sha1 hash of the blob
         :return: True if the blob exists, False otherwise
         """
-        if self.seen.exists(blob_id):
-            return True
-
         async with self.engine.connect() as conn:
             return bool(
                 (
@@ -5,7 +5,7 @@ from datetime import UTC, datetime, timedelta
 from operator import itemgetter
 from typing import Iterable, Optional, override
 
-from sqlalchemy import and_, bindparam, case, delete, func, literal, literal_column, null, or_, select, text
+from sqlalchemy import and_, bindparam, case, delete, func, insert, literal, literal_column, null, or_, select, text
 from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
 from sqlalchemy.sql.functions import count
 
@@ -14,7 +14,7 @@ from harp.models import Results, Transaction
 from harp.settings import PAGE_SIZE
 from harp.utils.background import AsyncWorkerQueue
 from harp.utils.dates import ensure_datetime
-from harp_apps.storage.constants import TimeBucket
+from harp_apps.storage.constants import ROLLUP_REFRESH_WINDOW, ROLLUP_RETENTIONS, TimeBucket
 from harp_apps.storage.models import FLAGS_BY_NAME, Base, BlobsRepository, FlagsRepository
 from harp_apps.storage.models import Message as SqlMessage
 from harp_apps.storage.models import (
@@ -25,16 +25,22 @@ from harp_apps.storage.models import (
     TagValuesRepository,
 )
 from harp_apps.storage.models import Transaction as SqlTransaction
-from harp_apps.storage.models import TransactionsRepository
+from harp_apps.storage.models import TransactionRollup as SqlTransactionRollup
+from harp_apps.storage.models import TransactionRollupsRepository, TransactionsRepository
 from harp_apps.storage.models import User as SqlUser
 from harp_apps.storage.models import UserFlag as SqlUserFlag
 from harp_apps.storage.models import UsersRepository
 from harp_apps.storage.settings import StorageSettings
 from harp_apps.storage.types import IBlobStorage, IStorage, TransactionsGroupedByTimeBucket
+from harp_apps.storage.utils.cursors import Cursor
 from harp_apps.storage.utils.dates import TruncDatetime
+from harp_apps.storage.utils.sql import advisory_lock
 
 logger = get_logger(__name__)
 
+#: Transactions are counted up to this limit, larger counts are reported as a lower bound (or a planner estimate).
+TOTAL_COUNT_LIMIT = 10000
+
 _FILTER_COLUMN_NAMES = {
     "method": "x_method",
     "status": "x_status_class",
@@ -42,6 +48,99 @@ _FILTER_COLUMN_NAMES = {
 }
 
 
+#: Name of the database lock held while refreshing rollups, so that concurrent refreshes do not interleave.
+ROLLUPS_LOCK_NAME = "harp_transaction_rollups"
+
+#: Rollup granularity to read each time bucket from, finer time buckets are aggregated from raw transactions.
+_ROLLUP_SOURCES = {
+    TimeBucket.HOUR.value: TimeBucket.HOUR,
+    TimeBucket.DAY.value: TimeBucket.DAY,
+    TimeBucket.WEEK.value: TimeBucket.DAY,
+    TimeBucket.MONTH.value: TimeBucket.DAY,
+    TimeBucket.YEAR.value: TimeBucket.DAY,
+}
+
+#: Additive statistics stored in rollups, in the order of the aggregate columns below.
+_ROLLUP_VALUES = ("count", "errors", "cached", "elapsed_sum", "elapsed_count", "tpdex_sum", "tpdex_count")
+
+
+def _transaction_aggregates():
+    return (
+        func.count(),
+        func.sum(case((SqlTransaction.x_status_class.in_(("5xx", "ERR")), 1), else_=0)),
+        func.sum(case((and_(SqlTransaction.x_cached.is_not(None), SqlTransaction.x_cached != ""), 1), else_=0)),
+        func.sum(SqlTransaction.elapsed),
+        func.count(SqlTransaction.elapsed),
+        func.sum(SqlTransaction.tpdex),
+        func.count(SqlTransaction.tpdex),
+    )
+
+
+def _rollup_aggregates():
+    return tuple(func.sum(getattr(SqlTransactionRollup, name)) for name in _ROLLUP_VALUES)
+
+
+def _rollup_values(row) -> dict:
+    # sums may be null (no values) or decimals (depending on the dialect)
+    return {
+        name: (float(value or 0) if name.endswith("_sum") else int(value or 0))
+        for name, value in zip(_ROLLUP_VALUES, row)
+    }
+
+
+def _as_utc(value) -> datetime:
+    if not isinstance(value, datetime) or value.tzinfo is None:
+        return ensure_datetime(value, UTC)
+    return value.astimezone(UTC)
+
+
+#: Duration of the buckets of each rollup granularity.
+_ROLLUP_DURATIONS = {
+    TimeBucket.MINUTE: timedelta(minutes=1),
+    TimeBucket.HOUR: timedelta(hours=1),
+    TimeBucket.DAY: timedelta(days=1),
+}
+
+
+def _refreshed(column, since: datetime, buckets: Iterable[datetime], granularity: TimeBucket):
+    """Condition on a datetime column, matching values from ``since`` onwards, and values within the given (older)
+    buckets of the given granularity (consecutive buckets being merged into one range)."""
+    conditions, duration = [column >= since], _ROLLUP_DURATIONS[granularity]
+    start = end = None
+    for bucket in sorted(buckets):
+        if bucket != end:
+            if start is not None:
+                conditions.append(and_(column >= start, column < end))
+            start = bucket
+        end = bucket + duration
+    if start is not None:
+        conditions.append(and_(column >= start, column < end))
+    return or_(*conditions)
+
+
+def _truncate(value: datetime, time_bucket: TimeBucket) -> datetime:
+    if time_bucket == TimeBucket.MINUTE:
+        return value.replace(second=0, microsecond=0)
+    if time_bucket == TimeBucket.HOUR:
+        return value.replace(minute=0, second=0, microsecond=0)
+    if time_bucket == TimeBucket.DAY:
+        return value.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unsupported rollup time bucket: {time_bucket}")
+
+
+def _keyset_filter(cursor: Cursor):
+    # the redundant bound on started_at alone makes the predicate usable as an index range on any dialect
+    if cursor.direction == "prev":
+        return and_(
+            SqlTransaction.started_at >= cursor.started_at,
+            or_(SqlTransaction.started_at > cursor.started_at, SqlTransaction.id > cursor.id),
+        )
+    return and_(
+        SqlTransaction.started_at <= cursor.started_at,
+        or_(SqlTransaction.started_at < cursor.started_at, SqlTransaction.id < cursor.id),
+    )
+
+
 def _numerical_filter_query(query, name: str, values: dict[str, float]):
     if values:
         column_name = _FILTER_COLUMN_NAMES.get(name, name)
@@ -156,12 +255,14 @@ class SqlStorage(IStorage):
 
         self._is_ready = asyncio.Event()
         self._worker = None
+        self._rollups_lock = asyncio.Lock()
 
         self.blobs = BlobsRepository(self.session_factory)
         self.messages = MessagesRepository(self.session_factory)
         self.tags = TagsRepository(self.session_factory)
         self.tag_values = TagValuesRepository(self.session_factory)
         self.transactions = TransactionsRepository(self.session_factory, tags=self.tags, tag_values=self.tag_values)
+        self.rollups = TransactionRollupsRepository(self.session_factory)
         self.users = UsersRepository(self.session_factory)
         self.metrics = MetricsRepository(self.session_factory)
         self.metric_values = MetricValuesRepository(self.session_factory)
@@ -277,15 +378,24 @@ class SqlStorage(IStorage):
         username: str,
         with_messages=False,
         filters=None,
-        page: int = 1,
         cursor: str = "",
         text_search="",
+        with_total=False,
     ):
         """
-        Implements :meth:`Storage.find_transactions <harp.typing.storage.Storage.find_transactions>`.
+        Implements :meth:`IStorage.get_transaction_list <harp_apps.storage.types.IStorage.get_transaction_list>`.
 
-        """
+        Pages are read using keyset pagination on ``(started_at, id)``, so that reading a page only costs an index
+        range scan, whatever its depth. Opaque cursors to the previous and next pages (if any) are returned in the
+        result's ``prev`` and ``next`` metadata.
 
+        Counting all matching transactions is expensive on large tables, so it is only done if ``with_total`` is set,
+        and counts are capped to :data:`TOTAL_COUNT_LIMIT`. Past this limit, postgres unfiltered counts are estimated
+        from the planner statistics. The ``total_relation`` metadata tells how to read the ``total``: exact count
+        (``eq``), lower bound (``gte``) or estimate (``approx``).
+
+        """
+        _cursor = Cursor.decode(cursor) if cursor else None
         user = await self.users.find_one_by_username(username)
 
         result = Results()
@@ -305,29 +415,57 @@ class SqlStorage(IStorage):
         if text_search:
             query = _filter_transactions_based_on_text(query, text_search, dialect_name=self.engine.dialect.name)
 
-        query = query.order_by(SqlTransaction.started_at.desc())
-
-        # apply cursor (before count)
-        if page and cursor:
-            query = query.filter(SqlTransaction.id <= cursor)
-
-        async with self.begin() as session:
-            # count items from query
-            result.meta["total"] = await session.scalar(
-                query.with_only_columns(func.count(SqlTransaction.id)).order_by(None)
-            )
+        if with_total:
+            async with self.begin() as session:
+                result.meta["total"], result.meta["total_relation"] = await self._count_transactions(
+                    session, query, filtered=query.whereclause is not None
+                )
 
-        # apply limit/offset (after count)
-        query = query.limit(PAGE_SIZE)
-        if page:
-            query = query.offset(max(0, (page - 1) * PAGE_SIZE))
+        # apply cursor (after count), and fetch one more row to know if there is another page in this direction
+        backwards = _cursor is not None and _cursor.direction == "prev"
+        if _cursor:
+            query = query.filter(_keyset_filter(_cursor))
+        if backwards:
+            query = query.order_by(SqlTransaction.started_at.asc(), SqlTransaction.id.asc())
+        else:
+            query = query.order_by(SqlTransaction.started_at.desc(), SqlTransaction.id.desc())
+        query = query.limit(PAGE_SIZE + 1)
 
         async with self.begin() as session:
-            for transaction in (await session.scalars(query)).unique().all():
+            rows = (await session.scalars(query)).unique().all()
+            has_more = len(rows) > PAGE_SIZE
+            rows = rows[:PAGE_SIZE]
+            if backwards:
+                rows.reverse()
+            for transaction in rows:
                 result.append(transaction.to_model(with_user_flags=True))
 
+        has_prev, has_next = (has_more, _cursor is not None) if backwards else (_cursor is not None, has_more)
+        first, last = (result.items[0], result.items[-1]) if result.items else (None, None)
+        result.meta["prev"] = Cursor("prev", first.started_at, first.id).encode() if first and has_prev else None
+        result.meta["next"] = Cursor("next", last.started_at, last.id).encode() if last and has_next else None
+
         return result
 
+    async def _count_transactions(self, session, query, /, *, filtered: bool) -> tuple[int, str]:
+        total = await session.scalar(
+            select(func.count()).select_from(
+                query.with_only_columns(SqlTransaction.id).order_by(None).limit(TOTAL_COUNT_LIMIT + 1).subquery()
+            )
+        )
+        if total <= TOTAL_COUNT_LIMIT:
+            return total, "eq"
+
+        if not filtered and self.engine.dialect.name == "postgresql":
+            estimate = await session.scalar(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+                {"name": SqlTransaction.__tablename__},
+            )
+            if estimate and estimate > TOTAL_COUNT_LIMIT:
+                return estimate, "approx"
+
+        return TOTAL_COUNT_LIMIT, "gte"
+
     @override
     async def get_transaction(self, id: str, /, *, username: str) -> Optional[Transaction]:
         user = await self.users.find_one_by_username(username)
@@ -349,52 +487,165 @@ class SqlStorage(IStorage):
         time_bucket: str = TimeBucket.DAY.value,
         start_datetime: Optional[datetime] = None,
     ) -> list[TransactionsGroupedByTimeBucket]:
+        """
+        Implements :meth:`IStorage.transactions_grouped_by_time_bucket
+        <harp_apps.storage.types.IStorage.transactions_grouped_by_time_bucket>`.
+
+        Buckets of an hour or more are read from the rollups (see :meth:`refresh_rollups`), and only transactions
+        started after the latest rollup are aggregated from raw rows, so that the cost does not depend on the time
+        range. Rollups are read in whole buckets, so the bucket containing ``start_datetime`` is complete.
+
+        """
         if time_bucket not in [e.value for e in TimeBucket]:
             raise ValueError(
                 f"Invalid time bucket: {time_bucket}. Must be one of {', '.join([e.value for e in TimeBucket])}."
             )
 
-        s_date = TruncDatetime(literal(time_bucket), SqlTransaction.started_at).label("tb")
-        query = select(
-            s_date,
-            func.count(),
-            func.sum(case((SqlTransaction.x_status_class.in_(("5xx", "ERR")), 1), else_=0)),
-            func.sum(
-                case(
-                    (
-                        and_(
-                            SqlTransaction.x_cached is not None,
-                            SqlTransaction.x_cached != "",
-                        ),
-                        1,
-                    ),
-                    else_=0,
-                )
-            ),
-            func.avg(SqlTransaction.elapsed),
-            func.avg(SqlTransaction.tpdex),
-        )
+        buckets = {}
 
-        if endpoint:
-            query = query.where(SqlTransaction.endpoint == endpoint)
+        def _accumulate(rows):
+            for row in rows:
+                values = _rollup_values(row[1:])
+                if (key := _as_utc(row[0])) in buckets:
+                    values = {name: buckets[key][name] + value for name, value in values.items()}
+                buckets[key] = values
 
-        if start_datetime:
-            query = query.where(SqlTransaction.started_at >= start_datetime.astimezone(UTC))
+        since = start_datetime.astimezone(UTC) if start_datetime else None
+        source = _ROLLUP_SOURCES.get(time_bucket)
 
-        query = query.group_by(s_date).order_by(s_date.asc())
         async with self.begin() as session:
-            result = await session.execute(query)
-            return [
-                TransactionsGroupedByTimeBucket(
-                    datetime=ensure_datetime(row[0], UTC),
-                    count=row[1],
-                    errors=int(row[2]),
-                    cached=int(row[3]),
-                    meanDuration=row[4] if row[4] else 0,
-                    meanTpdex=row[5],
+            watermark = await self._get_rollups_watermark(session) if source else None
+            if watermark is not None:
+                r_date = TruncDatetime(literal(time_bucket), SqlTransactionRollup.bucket).label("tb")
+                query = select(r_date, *_rollup_aggregates()).where(SqlTransactionRollup.granularity == source.value)
+                if endpoint:
+                    query = query.where(SqlTransactionRollup.endpoint == endpoint)
+                if since:
+                    query = query.where(SqlTransactionRollup.bucket >= _truncate(since, source))
+                _accumulate((await session.execute(query.group_by(r_date))).fetchall())
+                since = max(since, watermark) if since else watermark
+
+            s_date = TruncDatetime(literal(time_bucket), SqlTransaction.started_at).label("tb")
+            query = select(s_date, *_transaction_aggregates())
+            if endpoint:
+                query = query.where(SqlTransaction.endpoint == endpoint)
+            if since:
+                query = query.where(SqlTransaction.started_at >= since)
+            _accumulate((await session.execute(query.group_by(s_date))).fetchall())
+
+        return [
+            TransactionsGroupedByTimeBucket(
+                datetime=key,
+                count=values["count"],
+                errors=values["errors"],
+                cached=values["cached"],
+                meanDuration=values["elapsed_sum"] / values["elapsed_count"] if values["elapsed_count"] else 0,
+                meanTpdex=values["tpdex_sum"] / values["tpdex_count"] if values["tpdex_count"] else None,
+            )
+            for key, values in sorted(buckets.items())
+        ]
+
+    async def refresh_rollups(self, *, now: Optional[datetime] = None):
+        """
+        Incrementally maintains the transaction rollups, for each granularity of :data:`ROLLUP_RETENTIONS
+        <harp_apps.storage.constants.ROLLUP_RETENTIONS>`: minute rollups are recomputed from the transactions started
+        since the latest one (minus :data:`ROLLUP_REFRESH_WINDOW <harp_apps.storage.constants.ROLLUP_REFRESH_WINDOW>`,
+        for late writes), along with the older minutes of transactions finished since then (long running ones, that
+        were rolled up before finishing), then each coarser granularity is recomputed from the previous one, for the
+        buckets that may have changed. Only whole minutes are rolled up, and rollups older than their retention are
+        removed.
+
+        The first run backfills rollups from the oldest stored transaction. Concurrent refreshes (from other workers or
+        hosts sharing the database) run one after the other.
+
+        """
+        until = _truncate(now or datetime.now(UTC), TimeBucket.MINUTE)
+
+        async with self._rollups_lock, self.begin() as session:
+            async with advisory_lock(session, ROLLUPS_LOCK_NAME, dialect=self.engine.dialect.name):
+                await self._refresh_rollups(session, until)
+
+    async def _refresh_rollups(self, session, until: datetime):
+        watermark = await self._get_rollups_watermark(session)
+        late_minutes = set()
+        if watermark is not None:
+            since = watermark - ROLLUP_REFRESH_WINDOW
+            # transactions finished since the latest refresh finished after the watermark (the end of the latest
+            # rolled up minute), but may have started (and been rolled up) long before.
+            late = TruncDatetime(literal(TimeBucket.MINUTE.value), SqlTransaction.started_at)
+            late_minutes = {
+                _as_utc(minute)
+                for minute in await session.scalars(
+                    select(late)
+                    .where(SqlTransaction.finished_at >= since, SqlTransaction.started_at < since)
+                    .distinct()
+                )
+            }
+        elif (oldest := await session.scalar(select(func.min(SqlTransaction.started_at)))) is not None:
+            since = _as_utc(oldest)
+        else:
+            return
+
+        previous = None
+        for granularity in ROLLUP_RETENTIONS:
+            since = _truncate(since, granularity)
+            buckets = {_truncate(minute, granularity) for minute in late_minutes}
+            if previous is None:
+                bucket = TruncDatetime(literal(granularity.value), SqlTransaction.started_at).label("tb")
+                columns = (bucket, SqlTransaction.endpoint, SqlTransaction.x_status_class)
+                query = select(*columns, *_transaction_aggregates()).where(
+                    _refreshed(SqlTransaction.started_at, since, buckets, granularity),
+                    SqlTransaction.started_at < until,
+                )
+            else:
+                bucket = TruncDatetime(literal(granularity.value), SqlTransactionRollup.bucket).label("tb")
+                columns = (bucket, SqlTransactionRollup.endpoint, SqlTransactionRollup.status_class)
+                query = select(*columns, *_rollup_aggregates()).where(
+                    SqlTransactionRollup.granularity == previous.value,
+                    _refreshed(SqlTransactionRollup.bucket, since, buckets, granularity),
                 )
-                for row in result.fetchall()
-            ]
+            rows = (await session.execute(query.group_by(*columns))).fetchall()
+
+            await session.execute(
+                delete(SqlTransactionRollup).where(
+                    SqlTransactionRollup.granularity == granularity.value,
+                    _refreshed(SqlTransactionRollup.bucket, since, buckets, granularity),
+                )
+            )
+            if rows:
+                await session.execute(
+                    insert(SqlTransactionRollup),
+                    [
+                        {
+                            "granularity": granularity.value,
+                            "bucket": _as_utc(row[0]),
+                            "endpoint": row[1],
+                            "status_class": row[2],
+                            **_rollup_values(row[3:]),
+                        }
+                        for row in rows
+                    ],
+                )
+            previous = granularity
+
+        watermark = await self._get_rollups_watermark(session)
+        for granularity, retention in ROLLUP_RETENTIONS.items():
+            if retention and watermark is not None:
+                await session.execute(
+                    delete(SqlTransactionRollup).where(
+                        SqlTransactionRollup.granularity == granularity.value,
+                        SqlTransactionRollup.bucket < watermark - retention,
+                    )
+                )
+
+    async def _get_rollups_watermark(self, session) -> Optional[datetime]:
+        """Returns the end of the latest minute rollup, transactions started before are all rolled up."""
+        latest = await session.scalar(
+            select(func.max(SqlTransactionRollup.bucket)).where(
+                SqlTransactionRollup.granularity == TimeBucket.MINUTE.value
+            )
+        )
+        return _as_utc(latest) + timedelta(minutes=1) if latest is not None else None
 
     async def get_usage(self):
         async with self.begin() as session:
@@ -1,11 +1,25 @@
 from typing import Optional
 
-from .blobs import BlobStorageSettings
+from .blobs import BlobCompressionSettings, BlobDeduplicationSettings, BlobStorageSettings, MemoryBlobStorageSettings
 from .database import DatabaseSettings
 from .redis import RedisSettings
+from .worker import StorageWorkerSettings
 
 
 class StorageSettings(DatabaseSettings):
     migrate: bool = True
     blobs: BlobStorageSettings = BlobStorageSettings()
     redis: Optional[RedisSettings] = None
+    worker: StorageWorkerSettings = StorageWorkerSettings()
+
+
+__all__ = [
+    "BlobCompressionSettings",
+    "BlobDeduplicationSettings",
+    "BlobStorageSettings",
+    "DatabaseSettings",
+    "MemoryBlobStorageSettings",
+    "RedisSettings",
+    "StorageSettings",
+    "StorageWorkerSettings",
+]
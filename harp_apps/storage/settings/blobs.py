@@ -1,7 +1,71 @@
-from typing import Literal
+from typing import Literal, Optional
 
-from harp.config import Service
+from harp.config import Configurable, Service
+
+
+class BlobDeduplicationSettings(Configurable):
+    #: Number of recently stored blob ids remembered exactly, so that storing them again does not hit the underlying
+    #: storage at all. Use 0 to disable.
+    cache_size: int = 10000
+
+    #: Number of blob ids remembered by an (optional) bloom filter, for working sets larger than the cache, using about
+    #: 1.8 bytes per id (at the default error rate). The filter is reset once full. Use 0 (default) to disable.
+    bloom_filter_capacity: int = 0
+
+    #: Probability for the bloom filter to wrongly believe a new blob was already stored, and thus to skip its write
+    #: (the blob would then be missing from the storage).
+    bloom_filter_error_rate: float = 0.001
+
+    #: Time (in seconds) a stored blob id is remembered, whatever its use. Each process remembers its own ids, and the
+    #: janitor of any process may remove blobs that became orphans (using a grace period of 10 minutes for blob
+    #: storages that need a mark-and-sweep), so this must stay below that grace period for skipped writes to always
+    #: reference an existing blob.
+    ttl: float = 300.0
+
+
+class BlobCompressionSettings(Configurable):
+    #: Compression algorithm for new blobs, either ``gzip`` or ``zstd`` (requires the ``zstandard`` package). Disabled
+    #: by default. Compressed blobs are always readable, whatever this setting.
+    algorithm: Optional[Literal["gzip", "zstd"]] = None
+
+    #: Compression level, if not the algorithm's default.
+    level: Optional[int] = None
+
+    #: Blobs smaller than this (in bytes) are stored as is.
+    threshold: int = 1024
+
+    #: Content types to compress (shell-style wildcards allowed). Others are stored as is, as they are most probably
+    #: compressed already (images, archives, ...).
+    content_types: list[str] = [
+        "text/*",
+        "application/json",
+        "application/*+json",
+        "application/xml",
+        "application/*+xml",
+        "application/javascript",
+        "application/x-www-form-urlencoded",
+        "http/headers",
+    ]
+
+
+class MemoryBlobStorageSettings(Configurable):
+    #: Maximum total size (in bytes) of the stored blobs, the least recently used ones being evicted first once full.
+    max_size: int = 64 * 1024 * 1024
+
+    #: Maximum number of stored blobs, if any.
+    max_items: Optional[int] = None
+
+    #: Time (in seconds) after which a blob is removed, since it was last written. Blobs never expire if not set.
+    ttl: Optional[float] = None
 
 
 class BlobStorageSettings(Service):
-    type: Literal["sql", "redis"] = "sql"
+    #: Blob storage implementation. The ``filesystem`` one accepts a ``path`` argument (defaults to ``blobs``, in the
+    #: working directory).
+    type: Literal["sql", "redis", "filesystem"] = "sql"
+
+    #: Skip writes of blobs that were already stored recently (blobs are content addressed).
+    dedup: BlobDeduplicationSettings = BlobDeduplicationSettings()
+
+    #: Compress blobs before storing them.
+    compression: BlobCompressionSettings = BlobCompressionSettings()
@@ -0,0 +1,28 @@
+from typing import Literal
+
+from pydantic import model_validator
+
+from harp.config import Configurable
+
+
+class StorageWorkerSettings(Configurable):
+    #: Number of pending writes above which the storage worker is considered overloaded, and starts applying its drop
+    #: policy.
+    high_watermark: int = 10000
+
+    #: Number of pending writes under which an overloaded storage worker gets back to normal.
+    low_watermark: int = 5000
+
+    #: What to do while overloaded: ``drop_bodies`` (store transactions and headers, but not bodies), ``drop_headers``
+    #: (store transactions, but not their messages), ``sample`` (only store a ratio of the transactions) or ``block``
+    #: (wait until the backlog goes under the low watermark before accepting new writes).
+    drop_policy: Literal["drop_bodies", "drop_headers", "sample", "block"] = "drop_bodies"
+
+    #: Ratio of transactions still stored while overloaded, using the ``sample`` drop policy.
+    sample_rate: float = 0.1
+
+    @model_validator(mode="after")
+    def __validate_watermarks(self):
+        if self.low_watermark > self.high_watermark:
+            raise ValueError("Low watermark must be lower than (or equal to) high watermark.")
+        return self
@@ -4,6 +4,7 @@ import pytest
 
 from harp.config.asdict import asdict
 from harp.utils.testing.applications import BaseTestForApplications
+from harp_apps.storage.settings import BlobCompressionSettings
 
 
 class TestStorageApplication(BaseTestForApplications):
@@ -11,10 +12,25 @@ class TestStorageApplication(BaseTestForApplications):
     config_key = "storage"
 
     expected_defaults = {
-        "blobs": {"type": "sql"},
+        "blobs": {
+            "type": "sql",
+            "dedup": {
+                "cache_size": 10000,
+                "bloom_filter_capacity": 0,
+                "bloom_filter_error_rate": 0.001,
+                "ttl": 300.0,
+            },
+            "compression": asdict(BlobCompressionSettings(), verbose=True),
+        },
         "migrate": True,
         "redis": None,
         "url": "sqlite+aiosqlite:///:memory:?cache=shared",
+        "worker": {
+            "drop_policy": "drop_bodies",
+            "high_watermark": 10000,
+            "low_watermark": 5000,
+            "sample_rate": 0.1,
+        },
     }
 
     @pytest.mark.parametrize(
@@ -25,7 +41,21 @@ class TestStorageApplication(BaseTestForApplications):
             [{"migrate": False}],
             [
                 {
-                    "blobs": {"type": "redis"},
+                    "blobs": {
+                        "type": "redis",
+                        "dedup": {
+                            "cache_size": 1000,
+                            "bloom_filter_capacity": 100000,
+                            "bloom_filter_error_rate": 0.01,
+                            "ttl": 60.0,
+                        },
+                        "compression": {
+                            "algorithm": "gzip",
+                            "level": 9,
+                            "threshold": 0,
+                            "content_types": ["text/*"],
+                        },
+                    },
                     "redis": {"url": "redis://localhost:6379/1"},
                 }
             ],
@@ -1,3 +1,7 @@
+from sqlalchemy import create_engine, inspect
+
+from harp.config import ConfigurationBuilder
+from harp_apps.storage.utils.migrations import migrate_before_workers
 from harp_apps.storage.utils.testing.sql import run_cli_migrate_command
 
 
@@ -6,3 +10,22 @@ async def test_migrations(database_url):
     if result.exit_code != 0:
         print(result.output)
     assert result.exit_code == 0
+
+
+def test_migrations_run_once_before_workers(tmp_path):
+    builder = ConfigurationBuilder({"applications": ["storage"]}, use_default_applications=False)
+    builder.add_values({"storage": {"url": f"sqlite+aiosqlite:///{tmp_path / 'harp.db'}"}})
+
+    migrate_before_workers(builder)
+
+    assert "transactions" in inspect(create_engine(f"sqlite:///{tmp_path / 'harp.db'}")).get_table_names()
+    assert builder.build()["storage"].migrate is False
+
+
+def test_migrations_are_left_to_workers_for_in_memory_databases():
+    builder = ConfigurationBuilder({"applications": ["storage"]}, use_default_applications=False)
+    builder.add_values({"storage": {"url": "sqlite+aiosqlite:///:memory:"}})
+
+    migrate_before_workers(builder)
+
+    assert builder.build()["storage"].migrate is True
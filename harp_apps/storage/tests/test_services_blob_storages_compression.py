@@ -0,0 +1,93 @@
+import asyncio
+import gzip
+
+import pytest
+
+from harp.models import Blob
+from harp_apps.storage.services.blob_storages.compression import CompressingBlobStorage, get_codec
+from harp_apps.storage.services.blob_storages.memory import MemoryBlobStorage
+from harp_apps.storage.settings import BlobCompressionSettings
+
+JSON = b'{"items": [' + b", ".join([b'{"id": 42, "name": "foo"}'] * 100) + b"]}"
+
+
+def create_storage(**settings):
+    backend = MemoryBlobStorage()
+    return CompressingBlobStorage(backend, BlobCompressionSettings(**settings)), backend
+
+
+async def test_compression():
+    storage, backend = create_storage(algorithm="gzip")
+    blob = Blob.from_data(JSON, content_type="application/json")
+
+    assert await storage.put(blob) == blob
+
+    stored = await backend.get(blob.id)
+    assert stored.content_type == "application/json;compression=gzip"
+    assert len(stored.data) < len(JSON) / 5
+    assert gzip.decompress(stored.data) == JSON
+
+    assert await storage.get(blob.id) == blob
+
+
+@pytest.mark.parametrize(
+    ["data", "content_type"],
+    [
+        [b"{}", "application/json"],  # under threshold
+        [JSON, "image/png"],  # not in allowlist
+        [JSON, None],  # unknown content type
+    ],
+)
+async def test_stored_as_is(data, content_type):
+    storage, backend = create_storage(algorithm="gzip")
+    blob = Blob.from_data(data, content_type=content_type)
+
+    await storage.put(blob)
+    assert await backend.get(blob.id) == blob
+    assert await storage.get(blob.id) == blob
+
+
+async def test_incompressible_data_is_stored_as_is():
+    storage, backend = create_storage(algorithm="gzip", threshold=0)
+    blob = Blob.from_data(b"abc", content_type="text/plain")
+
+    await storage.put(blob)
+    assert await backend.get(blob.id) == blob
+
+
+async def test_compressed_blobs_are_readable_when_disabled():
+    storage, backend = create_storage(algorithm="gzip")
+    blob = Blob.from_data(JSON, content_type="application/json")
+    await storage.put(blob)
+
+    assert await CompressingBlobStorage(backend).get(blob.id) == blob
+
+
+async def test_compress_many():
+    storage, _ = create_storage(algorithm="gzip")
+    small, large = (
+        Blob.from_data(b"{}", content_type="application/json"),
+        Blob.from_data(JSON, content_type="text/plain"),
+    )
+
+    stored = await storage.compress_many([small, large])
+    assert stored[0] is small
+    assert stored[1].content_type == "text/plain;compression=gzip"
+    assert storage.decompress(stored[1]) == large
+
+
+def test_unsupported_algorithm():
+    with pytest.raises(ValueError):
+        get_codec("foo")
+
+
+async def test_concurrent_zstd_compression():
+    pytest.importorskip("zstandard")
+    storage, backend = create_storage(algorithm="zstd")
+    blobs = [Blob.from_data(JSON.replace(b"42", str(i).encode()), content_type="application/json") for i in range(50)]
+
+    # puts and gets run the codec in several threads at once
+    await asyncio.gather(*map(storage.put, blobs))
+    stored = await asyncio.gather(*(backend.get(blob.id) for blob in blobs))
+    assert {blob.content_type for blob in stored} == {"application/json;compression=zstd"}
+    assert await asyncio.gather(*(storage.get(blob.id) for blob in blobs)) == blobs
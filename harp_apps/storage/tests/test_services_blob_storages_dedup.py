@@ -0,0 +1,88 @@
+from harp.models import Blob
+from harp_apps.storage.services.blob_storages.dedup import DeduplicatingBlobStorage
+from harp_apps.storage.services.blob_storages.memory import MemoryBlobStorage
+from harp_apps.storage.settings import BlobDeduplicationSettings
+
+
+class CountingBlobStorage(MemoryBlobStorage):
+    def __init__(self):
+        super().__init__()
+        self.puts = 0
+
+    async def put(self, blob: Blob) -> Blob:
+        self.puts += 1
+        return await super().put(blob)
+
+
+def create_storage(**settings):
+    backend = CountingBlobStorage()
+    return DeduplicatingBlobStorage(backend, BlobDeduplicationSettings(**settings)), backend
+
+
+async def test_known_blobs_are_not_written_again():
+    storage, backend = create_storage()
+    blob = Blob.from_data(b"Hello.", content_type="text/plain")
+
+    assert storage.type == "memory"
+    assert await storage.put(blob) == blob
+    assert await storage.put(blob) == blob
+    assert backend.puts == 1
+    assert await storage.exists(blob.id)
+    assert await storage.get(blob.id) == blob
+
+    await storage.delete(blob.id)
+    assert not storage.known(blob.id)
+    await storage.put(blob)
+    assert backend.puts == 2
+
+
+async def test_recent_ids_are_bounded():
+    storage, backend = create_storage(cache_size=1)
+    foo, bar = Blob.from_data(b"foo"), Blob.from_data(b"bar")
+
+    for blob in (foo, bar, foo):
+        await storage.put(blob)
+
+    assert backend.puts == 3
+
+
+async def test_bloom_filter():
+    storage, backend = create_storage(cache_size=0, bloom_filter_capacity=2)
+    foo, bar, baz = Blob.from_data(b"foo"), Blob.from_data(b"bar"), Blob.from_data(b"baz")
+
+    for blob in (foo, bar, foo, bar):
+        await storage.put(blob)
+    assert backend.puts == 2
+
+    # the filter is reset once full
+    await storage.put(baz)
+    assert storage.known(baz.id)
+    assert not storage.known(foo.id)
+
+
+async def test_mutable_blobs_are_always_written():
+    storage, backend = create_storage()
+    blob = Blob(id="cache-key", data=b"...", content_type="cache/meta")
+
+    await storage.put(blob)
+    await storage.put(blob)
+    assert backend.puts == 2
+    assert not storage.known(blob.id)
+
+
+async def test_ids_are_forgotten_after_ttl(monkeypatch):
+    storage, backend = create_storage(bloom_filter_capacity=10, ttl=60.0)
+    blob = Blob.from_data(b"Hello.")
+    clock = [storage._filter_started_at]
+    monkeypatch.setattr("harp_apps.storage.services.blob_storages.dedup.time.monotonic", lambda: clock[0])
+
+    await storage.put(blob)
+    clock[0] += 30.0
+    await storage.put(blob)
+    assert backend.puts == 1
+
+    # neither the recent ids nor the bloom filter remember it anymore
+    clock[0] += 31.0
+    assert not storage.known(blob.id)
+    await storage.put(blob)
+    assert backend.puts == 2
@@ -0,0 +1,77 @@
+import os
+import time
+
+from harp.config import ConfigurationBuilder
+from harp.models import Blob
+from harp_apps.storage.services.blob_storages import filesystem, find_blob_storage
+from harp_apps.storage.services.blob_storages.filesystem import FilesystemBlobStorage
+
+
+async def test_basics(filesystem_blob_storage: FilesystemBlobStorage):
+    _storage = filesystem_blob_storage
+    blob = Blob.from_data(b"bar", content_type="text/plain")
+
+    assert _storage.type == "filesystem"
+    assert await _storage.get(blob.id) is None
+    assert not await _storage.exists(blob.id)
+
+    assert await _storage.put(blob) == blob
+    assert await _storage.get(blob.id) == blob
+    assert await _storage.exists(blob.id)
+
+    # sharded by id, and no temporary file left behind
+    directory = os.path.join(_storage.path, blob.id[0:2], blob.id[2:4])
+    assert os.listdir(directory) == [blob.id]
+
+    assert await _storage.delete(blob.id) is None
+    assert not await _storage.exists(blob.id)
+    assert await _storage.get(blob.id) is None
+
+
+async def test_without_content_type(filesystem_blob_storage: FilesystemBlobStorage):
+    blob = Blob.from_data(b"foo\nbar")
+    await filesystem_blob_storage.put(blob)
+    assert await filesystem_blob_storage.get(blob.id) == blob
+
+
+async def test_large_blobs_are_memory_mapped(filesystem_blob_storage: FilesystemBlobStorage, monkeypatch):
+    monkeypatch.setattr(filesystem, "MMAP_THRESHOLD", 16)
+    blob = Blob.from_data(b"Hello, world!\n" * 10, content_type="text/plain")
+
+    await filesystem_blob_storage.put(blob)
+    assert await filesystem_blob_storage.get(blob.id) == blob
+
+
+async def test_overwrite(filesystem_blob_storage: FilesystemBlobStorage):
+    await filesystem_blob_storage.put(Blob(id="cache-key", data=b"foo", content_type="cache/meta"))
+    await filesystem_blob_storage.put(Blob(id="cache-key", data=b"bar", content_type="cache/meta"))
+    assert (await filesystem_blob_storage.get("cache-key")).data == b"bar"
+
+
+async def test_sweep(filesystem_blob_storage: FilesystemBlobStorage):
+    used, unused = Blob.from_data(b"used"), Blob.from_data(b"unused")
+    await filesystem_blob_storage.put(used)
+    await filesystem_blob_storage.put(unused)
+
+    # recently written blobs are kept
+    assert await filesystem_blob_storage.sweep({used.id}, before=time.time() - 60) == 0
+
+    assert await filesystem_blob_storage.sweep({used.id}, before=time.time() + 1) == 1
+    assert await filesystem_blob_storage.exists(used.id)
+    assert not await filesystem_blob_storage.exists(unused.id)
+
+
+async def test_load_filesystem_blob_storage_service(tmp_path):
+    system = await ConfigurationBuilder(
+        {
+            "applications": ["storage"],
+            "storage": {"blobs": {"type": "filesystem", "path": str(tmp_path / "blobs")}},
+        },
+        use_default_applications=False,
+    ).abuild_system()
+    try:
+        blob_storage = system.provider.get("storage.blobs")
+        assert blob_storage.type == "filesystem"
+        assert find_blob_storage(blob_storage, FilesystemBlobStorage).path == str(tmp_path / "blobs")
+    finally:
+        await system.dispose()
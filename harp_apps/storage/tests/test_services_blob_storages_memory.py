@@ -0,0 +1,71 @@
+from harp.models import Blob
+from harp_apps.storage.services.blob_storages import memory
+from harp_apps.storage.services.blob_storages.memory import MemoryBlobStorage
+from harp_apps.storage.settings import MemoryBlobStorageSettings
+
+
+def create_blob(data: bytes):
+    return Blob.from_data(data, content_type="text/plain")
+
+
+async def test_basics():
+    storage = MemoryBlobStorage()
+    blob = create_blob(b"Hello.")
+
+    assert not await storage.exists(blob.id)
+    assert await storage.put(blob) == blob
+    assert await storage.exists(blob.id)
+    assert await storage.get(blob.id) == blob
+
+    await storage.delete(blob.id)
+    await storage.delete(blob.id)
+    assert await storage.get(blob.id) is None
+    assert (len(storage), storage.size) == (0, 0)
+    assert storage.stats == {"hits": 1, "misses": 1}
+
+
+async def test_least_recently_used_blobs_are_evicted():
+    storage = MemoryBlobStorage(MemoryBlobStorageSettings(max_size=20))
+    foo, bar, baz = (create_blob(data * 10) for data in (b"a", b"b", b"c"))
+
+    await storage.put(foo)
+    await storage.put(bar)
+    await storage.get(foo.id)
+    await storage.put(baz)
+
+    assert list(storage._blobs) == [foo.id, baz.id]
+    assert storage.size == 20
+    assert storage.stats["evictions"] == 1
+
+    # blobs larger than the whole storage are not kept
+    await storage.put(create_blob(b"x" * 21))
+    assert list(storage._blobs) == [foo.id, baz.id]
+
+
+async def test_max_items():
+    storage = MemoryBlobStorage(MemoryBlobStorageSettings(max_items=2))
+    blobs = [create_blob(data) for data in (b"foo", b"bar", b"baz")]
+    for blob in blobs:
+        await storage.put(blob)
+
+    assert list(storage._blobs) == [blobs[1].id, blobs[2].id]
+
+
+async def test_ttl(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(memory.time, "monotonic", lambda: now)
+    storage = MemoryBlobStorage(MemoryBlobStorageSettings(ttl=60))
+    foo, bar = create_blob(b"foo"), create_blob(b"bar")
+
+    await storage.put(foo)
+    now += 30
+    await storage.put(bar)
+    now += 30
+    assert not await storage.exists(foo.id)
+    assert await storage.get(bar.id) == bar
+
+    # expired blobs are also purged on writes, even if never read again
+    now += 30
+    await storage.put(create_blob(b"baz"))
+    assert bar.id not in storage._blobs
+    assert storage.stats["expirations"] == 2
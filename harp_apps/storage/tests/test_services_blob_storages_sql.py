@@ -30,3 +30,21 @@ async def test_basics(sql_blob_storage: SqlBlobStorage):
     assert await _storage.get("foo") is None
     async with _storage.engine.connect() as conn:
         assert (await conn.execute(text("SELECT * FROM blobs WHERE id = 'foo'"))).fetchone() is None
+
+
+async def test_put_existing_blob(sql_blob_storage: SqlBlobStorage):
+    blob = Blob.from_data(b"bar", content_type="text/plain")
+
+    assert await sql_blob_storage.put(blob) == blob
+    assert await sql_blob_storage.put(blob) == blob
+    assert await sql_blob_storage.get(blob.id) == blob
+
+
+async def test_put_existing_mutable_blob(sql_blob_storage: SqlBlobStorage):
+    await sql_blob_storage.put(Blob(id="key", data=b"v1", content_type="cache/meta"))
+    await sql_blob_storage.put(Blob(id="key", data=b"v2", content_type="cache/meta"))
+    assert await sql_blob_storage.get("key") == Blob(id="key", data=b"v2", content_type="cache/meta")
+
+    # content addressed blobs are never rewritten
+    await sql_blob_storage.put(Blob(id="key", data=b"v3", content_type="text/plain"))
+    assert (await sql_blob_storage.get("key")).data == b"v2"
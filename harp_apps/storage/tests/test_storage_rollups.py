@@ -0,0 +1,114 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import func, select, update
+
+from harp_apps.storage.constants import ROLLUP_REFRESH_WINDOW, ROLLUP_RETENTIONS, TimeBucket
+from harp_apps.storage.models import Transaction as SqlTransaction
+from harp_apps.storage.models import TransactionRollup
+from harp_apps.storage.services.sql import SqlStorage
+from harp_apps.storage.utils.testing.mixins import StorageTestFixtureMixin
+
+NOW = datetime(2024, 6, 21, 12, 30, 15, tzinfo=UTC)
+
+
+class TestStorageRollups(StorageTestFixtureMixin):
+    async def create_transactions(self, sql_storage: SqlStorage, *offsets: timedelta, **kwargs):
+        for offset in offsets:
+            await self.create_transaction(
+                sql_storage,
+                started_at=NOW - offset,
+                elapsed=10.0,
+                tpdex=100,
+                extras={"status_class": "2xx"},
+                **kwargs,
+            )
+
+    async def get_overview(self, sql_storage: SqlStorage, time_bucket, **kwargs):
+        return await sql_storage.transactions_grouped_by_time_bucket(
+            time_bucket=time_bucket, start_datetime=NOW - timedelta(days=3), **kwargs
+        )
+
+    async def count_rollups(self, sql_storage: SqlStorage, granularity: TimeBucket):
+        async with sql_storage.begin() as session:
+            return await session.scalar(select(func.count()).where(TransactionRollup.granularity == granularity.value))
+
+    async def test_rollups_match_raw_aggregates(self, sql_storage: SqlStorage):
+        await self.create_transactions(
+            sql_storage, timedelta(minutes=1), timedelta(minutes=2), timedelta(hours=3), endpoint="foo"
+        )
+        await self.create_transactions(sql_storage, timedelta(hours=3), timedelta(days=1), endpoint="bar")
+        await self.create_transaction(
+            sql_storage, started_at=NOW - timedelta(hours=3), endpoint="bar", extras={"status_class": "5xx"}
+        )
+
+        expected = {
+            time_bucket: await self.get_overview(sql_storage, time_bucket) for time_bucket in ("hour", "day", "month")
+        }
+        expected_foo = await self.get_overview(sql_storage, "hour", endpoint="foo")
+
+        await sql_storage.refresh_rollups(now=NOW)
+        assert await self.count_rollups(sql_storage, TimeBucket.MINUTE) == 6
+        assert await self.count_rollups(sql_storage, TimeBucket.HOUR) == 5
+
+        for time_bucket, result in expected.items():
+            assert await self.get_overview(sql_storage, time_bucket) == result
+        assert await self.get_overview(sql_storage, "hour", endpoint="foo") == expected_foo
+
+        (last_hour,) = [
+            bucket for bucket in expected["hour"] if bucket["datetime"] == datetime(2024, 6, 21, 9, tzinfo=UTC)
+        ]
+        assert (last_hour["count"], last_hour["errors"], last_hour["meanDuration"]) == (3, 1, 10.0)
+
+    async def test_concurrent_refreshes_do_not_duplicate_rollups(self, sql_storage: SqlStorage):
+        await self.create_transactions(sql_storage, timedelta(minutes=5), timedelta(hours=3))
+        expected = await self.get_overview(sql_storage, "hour")
+
+        await asyncio.gather(*(sql_storage.refresh_rollups(now=NOW) for _ in range(3)))
+        assert await self.count_rollups(sql_storage, TimeBucket.MINUTE) == 2
+        assert await self.count_rollups(sql_storage, TimeBucket.HOUR) == 2
+        assert await self.get_overview(sql_storage, "hour") == expected
+
+    async def test_transactions_after_rollups_are_counted_once(self, sql_storage: SqlStorage):
+        await self.create_transactions(sql_storage, timedelta(minutes=5))
+        await sql_storage.refresh_rollups(now=NOW)
+
+        # started in the current minute, not rolled up yet, then written late in an already rolled up minute
+        await self.create_transactions(sql_storage, timedelta(seconds=5), timedelta(minutes=5, seconds=10))
+
+        (bucket,) = await self.get_overview(sql_storage, "hour")
+        assert bucket["count"] == 2
+
+        await sql_storage.refresh_rollups(now=NOW + timedelta(minutes=1))
+        (bucket,) = await self.get_overview(sql_storage, "hour")
+        assert bucket["count"] == 3
+
+    async def test_transactions_finished_late_are_rolled_up(self, sql_storage: SqlStorage):
+        started_at = NOW - ROLLUP_REFRESH_WINDOW - timedelta(hours=2)
+        await self.create_transactions(sql_storage, timedelta(minutes=1))
+        transaction = await self.create_transaction(sql_storage, started_at=started_at)
+        await sql_storage.refresh_rollups(now=NOW)
+
+        # a long running transaction, rolled up while running, finishes (out of the refresh window)
+        async with sql_storage.begin() as session:
+            await session.execute(
+                update(SqlTransaction)
+                .where(SqlTransaction.id == transaction.id)
+                .values(finished_at=NOW, elapsed=30.0, x_status_class="5xx")
+            )
+        await sql_storage.refresh_rollups(now=NOW + timedelta(minutes=1))
+
+        late_hour, _ = await self.get_overview(sql_storage, "hour")
+        assert late_hour["datetime"] == datetime(2024, 6, 21, 10, tzinfo=UTC)
+        assert (late_hour["count"], late_hour["errors"], late_hour["meanDuration"]) == (1, 1, 30.0)
+        (day,) = await self.get_overview(sql_storage, "day")
+        assert (day["count"], day["errors"], day["meanDuration"]) == (2, 1, 20.0)
+
+    async def test_old_rollups_are_removed(self, sql_storage: SqlStorage):
+        await self.create_transactions(sql_storage, ROLLUP_RETENTIONS[TimeBucket.MINUTE] + timedelta(hours=1))
+        await self.create_transactions(sql_storage, timedelta(minutes=1))
+
+        await sql_storage.refresh_rollups(now=NOW)
+        assert await self.count_rollups(sql_storage, TimeBucket.MINUTE) == 1
+        assert await self.count_rollups(sql_storage, TimeBucket.HOUR) == 2
+        assert await self.count_rollups(sql_storage, TimeBucket.DAY) == 2
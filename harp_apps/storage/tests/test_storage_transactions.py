@@ -1,3 +1,9 @@
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from harp.settings import PAGE_SIZE
+from harp_apps.storage.services import sql
 from harp_apps.storage.services.sql import SqlStorage
 from harp_apps.storage.utils.testing.mixins import StorageTestFixtureMixin
 
@@ -53,3 +59,55 @@ class TestStorageTransactions(StorageTestFixtureMixin):
             username="anonymous", with_messages=True, text_search="ba"
         )
         assert len(transactions_ba) == 3
+
+    async def test_get_transaction_list_pagination(self, sql_storage: SqlStorage):
+        started_at = datetime(2024, 1, 1, 12, tzinfo=UTC)
+        # pairs of transactions share the same start time, to check the id is used as a tie breaker
+        transactions = [
+            await self.create_transaction(
+                sql_storage, id=f"t{i:03d}", started_at=started_at + timedelta(seconds=i // 2)
+            )
+            for i in range(PAGE_SIZE * 2 + 5)
+        ]
+        expected = [transaction.id for transaction in reversed(transactions)]
+
+        first = await sql_storage.get_transaction_list(username="anonymous")
+        assert [transaction.id for transaction in first] == expected[:PAGE_SIZE]
+        assert first.meta["prev"] is None
+        assert "total" not in first.meta
+
+        second = await sql_storage.get_transaction_list(username="anonymous", cursor=first.meta["next"])
+        assert [transaction.id for transaction in second] == expected[PAGE_SIZE : PAGE_SIZE * 2]
+
+        third = await sql_storage.get_transaction_list(username="anonymous", cursor=second.meta["next"])
+        assert [transaction.id for transaction in third] == expected[PAGE_SIZE * 2 :]
+        assert third.meta["next"] is None
+
+        back = await sql_storage.get_transaction_list(username="anonymous", cursor=third.meta["prev"])
+        assert [transaction.id for transaction in back] == expected[PAGE_SIZE : PAGE_SIZE * 2]
+        assert back.meta["next"] == second.meta["next"]
+
+        back = await sql_storage.get_transaction_list(username="anonymous", cursor=back.meta["prev"])
+        assert [transaction.id for transaction in back] == expected[:PAGE_SIZE]
+        assert back.meta["prev"] is None
+
+    async def test_get_transaction_list_total(self, sql_storage: SqlStorage, monkeypatch):
+        for endpoint in ("foo", "foo", "bar"):
+            await self.create_transaction(sql_storage, endpoint=endpoint)
+
+        result = await sql_storage.get_transaction_list(username="anonymous", with_total=True)
+        assert (result.meta["total"], result.meta["total_relation"]) == (3, "eq")
+
+        result = await sql_storage.get_transaction_list(
+            username="anonymous", filters={"endpoint": ["foo"]}, with_total=True
+        )
+        assert (result.meta["total"], result.meta["total_relation"]) == (2, "eq")
+
+        monkeypatch.setattr(sql, "TOTAL_COUNT_LIMIT", 2)
+        result = await sql_storage.get_transaction_list(username="anonymous", with_total=True)
+        assert (result.meta["total"], result.meta["total_relation"]) == (2, "gte")
+        assert len(result) == 3
+
+    async def test_get_transaction_list_invalid_cursor(self, sql_storage: SqlStorage):
+        with pytest.raises(ValueError):
+            await sql_storage.get_transaction_list(username="anonymous", cursor="not-a-cursor")
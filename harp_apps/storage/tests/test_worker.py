@@ -0,0 +1,198 @@
+import asyncio
+from datetime import UTC, datetime
+
+from harp.http import HttpRequest
+from harp.models import Blob, Transaction
+from harp.utils.guids import generate_transaction_id_ksuid
+from harp_apps.proxy.events import HttpMessageEvent, TransactionEvent
+from harp_apps.storage.services.blob_storages.compression import CompressingBlobStorage
+from harp_apps.storage.services.blob_storages.dedup import DeduplicatingBlobStorage
+from harp_apps.storage.services.blob_storages.sql import SqlBlobStorage
+from harp_apps.storage.services.sql import SqlStorage
+from harp_apps.storage.settings import BlobCompressionSettings, StorageSettings
+from harp_apps.storage.types import IBlobStorage
+from harp_apps.storage.worker import StorageAsyncWorkerQueue
+
+
+def create_transaction(**kwargs):
+    return Transaction(
+        id=generate_transaction_id_ksuid(),
+        type="http",
+        endpoint="api",
+        started_at=datetime.now(UTC),
+        extras={"method": "GET"},
+        **kwargs,
+    )
+
+
+def end_transaction(transaction: Transaction):
+    transaction.finished_at = datetime.now(UTC)
+    transaction.elapsed = 42.0
+    transaction.tpdex = 100
+    transaction.extras["status_class"] = "2xx"
+
+
+class TestStorageAsyncWorkerQueue:
+    async def test_batch_is_written_at_once(self, sql_storage: SqlStorage, blob_storage: IBlobStorage):
+        worker = StorageAsyncWorkerQueue(sql_storage.engine, sql_storage, blob_storage)
+
+        transactions = [create_transaction(tags={"env": "prod"}) for _ in range(3)]
+        for transaction in transactions:
+            await worker.on_transaction_started(TransactionEvent(transaction))
+            await worker.on_transaction_message(HttpMessageEvent(transaction, HttpRequest(body=b"Hello.")))
+            end_transaction(transaction)
+            await worker.on_transaction_ended(TransactionEvent(transaction))
+
+        # end of transactions were folded into the insertions, and blobs are deduplicated
+        (batch,) = worker._batches
+        assert len(batch.transactions) == 3
+        assert len(batch.updates) == 0
+        assert len(batch.messages) == 3
+        assert len(batch.blobs) == 2
+
+        await worker.wait_until_empty()
+        assert not any(map(len, worker._batches))
+
+        stored = await sql_storage.get_transaction_list(username="anonymous", with_messages=True)
+        assert {transaction.id for transaction in stored} == {transaction.id for transaction in transactions}
+        for transaction in stored:
+            assert transaction.elapsed == 42.0
+            assert transaction.tpdex == 100
+            assert transaction.extras["status_class"] == "2xx"
+            assert transaction.tags == {"env": "prod"}
+            assert len(transaction.messages) == 1
+            assert (await blob_storage.get(transaction.messages[0].body)).data == b"Hello."
+
+    async def test_end_of_transaction_in_later_batch(self, sql_storage: SqlStorage, blob_storage: IBlobStorage):
+        worker = StorageAsyncWorkerQueue(sql_storage.engine, sql_storage, blob_storage)
+
+        transaction = create_transaction()
+        await worker.on_transaction_started(TransactionEvent(transaction))
+        await worker.wait_until_empty()
+
+        end_transaction(transaction)
+        await worker.on_transaction_ended(TransactionEvent(transaction))
+        assert len(worker._batches[0].updates) == 1
+        await worker.wait_until_empty()
+
+        stored = await sql_storage.get_transaction(transaction.id, username="anonymous")
+        assert stored.elapsed == 42.0
+        assert stored.extras["status_class"] == "2xx"
+
+    async def test_faulty_transactions_do_not_fail_the_batch(self, sql_storage: SqlStorage, blob_storage: IBlobStorage):
+        worker = StorageAsyncWorkerQueue(sql_storage.engine, sql_storage, blob_storage)
+
+        # already stored (by another process, for example), so that inserting it again fails
+        duplicate = create_transaction()
+        await sql_storage.transactions.create(duplicate)
+
+        transactions = [create_transaction(), duplicate, create_transaction()]
+        for transaction in transactions:
+            await worker.on_transaction_started(TransactionEvent(transaction))
+            await worker.on_transaction_message(HttpMessageEvent(transaction, HttpRequest(body=b"Hello.")))
+        await worker.wait_until_empty()
+
+        assert worker.failed == 1
+        for transaction in (transactions[0], transactions[2]):
+            stored = await sql_storage.get_transaction(transaction.id, username="anonymous")
+            assert len(stored.messages) == 1
+
+    async def test_known_blobs_are_skipped(self, sql_storage: SqlStorage, sql_blob_storage: SqlBlobStorage):
+        blob_storage = DeduplicatingBlobStorage(sql_blob_storage)
+        worker = StorageAsyncWorkerQueue(sql_storage.engine, sql_storage, blob_storage)
+
+        body = Blob.from_data(b"Hello.")
+        for _ in range(2):
+            transaction = create_transaction()
+            await worker.on_transaction_started(TransactionEvent(transaction))
+            await worker.on_transaction_message(HttpMessageEvent(transaction, HttpRequest(body=b"Hello.")))
+            await worker.wait_until_empty()
+            assert blob_storage.known(body.id)
+
+        stored = await sql_storage.get_transaction(transaction.id, username="anonymous")
+        assert (await blob_storage.get(stored.messages[0].body)).data == b"Hello."
+
+    async def test_blobs_are_compressed(self, sql_storage: SqlStorage, sql_blob_storage: SqlBlobStorage):
+        blob_storage = CompressingBlobStorage(sql_blob_storage, BlobCompressionSettings(algorithm="gzip", threshold=0))
+        worker = StorageAsyncWorkerQueue(sql_storage.engine, sql_storage, blob_storage)
+
+        transaction = create_transaction()
+        await worker.on_transaction_started(TransactionEvent(transaction))
+        await worker.on_transaction_message(
+            HttpMessageEvent(transaction, HttpRequest(body=b"Hello, " * 10, headers={"content-type": "text/plain"}))
+        )
+        await worker.wait_until_empty()
+
+        stored = await sql_storage.get_transaction(transaction.id, username="anonymous")
+        assert (await sql_blob_storage.get(stored.messages[0].body)).content_type == "text/plain;compression=gzip"
+        assert (await blob_storage.get(stored.messages[0].body)).data == b"Hello, " * 10
+
+
+class TestStorageAsyncWorkerQueueDropPolicies:
+    def create_worker(self, sql_storage: SqlStorage, blob_storage: IBlobStorage, **settings):
+        return StorageAsyncWorkerQueue(
+            sql_storage.engine,
+            sql_storage,
+            blob_storage,
+            StorageSettings(worker={"high_watermark": 3, "low_watermark": 0, **settings}),
+        )
+
+    async def store_transaction(self, worker: StorageAsyncWorkerQueue, transaction: Transaction):
+        await worker.on_transaction_started(TransactionEvent(transaction))
+        await worker.on_transaction_message(HttpMessageEvent(transaction, HttpRequest(body=b"Hello.")))
+        end_transaction(transaction)
+        await worker.on_transaction_ended(TransactionEvent(transaction))
+
+    async def test_drop_bodies(self, sql_storage: SqlStorage, blob_storage: IBlobStorage):
+        worker = self.create_worker(sql_storage, blob_storage, drop_policy="drop_bodies")
+        first, second = create_transaction(), create_transaction()
+        await self.store_transaction(worker, first)
+        await self.store_transaction(worker, second)
+
+        assert worker.overloaded
+        assert worker.dropped == {"blobs": 1}
+
+        await worker.wait_until_empty()
+        assert not worker.overloaded
+
+        stored = await sql_storage.get_transaction(second.id, username="anonymous")
+        assert stored.messages[0].headers is not None
+        assert stored.messages[0].body is None
+
+    async def test_drop_headers(self, sql_storage: SqlStorage, blob_storage: IBlobStorage):
+        worker = self.create_worker(sql_storage, blob_storage, drop_policy="drop_headers")
+        first, second = create_transaction(), create_transaction()
+        await self.store_transaction(worker, first)
+        await self.store_transaction(worker, second)
+
+        assert worker.dropped == {"messages": 1, "blobs": 2}
+
+        await worker.wait_until_empty()
+        stored = await sql_storage.get_transaction(second.id, username="anonymous")
+        assert stored.elapsed == 42.0
+        assert stored.messages == []
+
+    async def test_sample(self, sql_storage: SqlStorage, blob_storage: IBlobStorage):
+        worker = self.create_worker(sql_storage, blob_storage, drop_policy="sample", sample_rate=0.0)
+        first, second = create_transaction(), create_transaction()
+        await self.store_transaction(worker, first)
+        await self.store_transaction(worker, second)
+
+        assert worker.dropped == {"transactions": 1, "messages": 1, "blobs": 2}
+
+        await worker.wait_until_empty()
+        stored = await sql_storage.get_transaction_list(username="anonymous", with_messages=True)
+        assert [transaction.id for transaction in stored] == [first.id]
+
+    async def test_block(self, sql_storage: SqlStorage, blob_storage: IBlobStorage):
+        worker = self.create_worker(sql_storage, blob_storage, drop_policy="block")
+        first, second = create_transaction(), create_transaction()
+        await self.store_transaction(worker, first)
+
+        # waits for the periodic flush to write the backlog before accepting more writes
+        await asyncio.wait_for(self.store_transaction(worker, second), timeout=1.0)
+        assert await sql_storage.get_transaction(first.id, username="anonymous") is not None
+
+        await worker.wait_until_empty()
+        assert worker.dropped == {}
+        assert await sql_storage.get_transaction(second.id, username="anonymous") is not None
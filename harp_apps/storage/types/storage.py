@@ -21,11 +21,17 @@ class IStorage(Protocol):
         username: str,
         with_messages=False,
         filters=None,
-        page: int = 1,
         cursor: str = "",
         text_search: str = "",
+        with_total: bool = False,
     ):
-        """Find transactions, using optional filters, for example to be displayed in the dashboard."""
+        """
+        Find transactions, using optional filters, for example to be displayed in the dashboard. Results are paginated
+        using opaque cursors, the ones to the previous and next pages being available in the result's metadata (``prev``
+        and ``next``). Total count (``total``) is only computed if ``with_total`` is set, and may be capped or
+        approximate (``total_relation`` is one of ``eq``, ``gte`` or ``approx``).
+
+        """
         ...
 
     async def get_transaction(
@@ -0,0 +1,34 @@
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from typing import Literal, NamedTuple
+
+#: Cursor directions, "next" pages go back in time (older transactions), "prev" pages go forward (newer transactions).
+CursorDirection = Literal["next", "prev"]
+
+
+class Cursor(NamedTuple):
+    """
+    Position in a transaction list, as the (started_at, id) key of the row the page starts after, and the direction to
+    read rows in. Cursors are exposed as opaque, url safe strings (see :meth:`encode` and :meth:`decode`).
+
+    """
+
+    direction: CursorDirection
+    started_at: datetime
+    id: str
+
+    def encode(self) -> str:
+        value = json.dumps([self.direction, self.started_at.isoformat(), self.id], separators=(",", ":"))
+        return urlsafe_b64encode(value.encode()).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, value: str) -> "Cursor":
+        try:
+            direction, started_at, id = json.loads(urlsafe_b64decode(value + "=" * (-len(value) % 4)))
+            if direction not in ("next", "prev") or not isinstance(id, str):
+                raise ValueError(direction)
+            return cls(direction, datetime.fromisoformat(started_at), id)
+        except (binascii.Error, TypeError, ValueError) as exc:
+            raise ValueError(f"Invalid cursor: {value!r}") from exc
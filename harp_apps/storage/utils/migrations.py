@@ -1,11 +1,13 @@
 import asyncio
 import os
 from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import Union
 
 from pydantic_core import MultiHostUrl, Url
 from sqlalchemy import URL, make_url, text
 from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 
 from harp import get_logger
 from harp.config import ConfigurationBuilder
@@ -107,3 +109,35 @@ async def do_migrate(engine, *, migrator, reset=False):
     except Exception as e:
         logger.error(f"🛢 [db:migrate] Migrations failed: {e}")
         raise RuntimeError(f"Could not run migrations ({e}).") from e
+
+
+async def upgrade(engine: AsyncEngine):
+    """Upgrade the database to the latest revision."""
+    from alembic import command
+
+    alembic_cfg = create_alembic_config(engine.url.render_as_string(hide_password=False))
+    await do_migrate(engine, migrator=partial(command.upgrade, alembic_cfg, "head"))
+
+
+def migrate_before_workers(builder: ConfigurationBuilder):
+    """Run the storage migrations once, in the supervisor of a multi-process server, and disable them for the
+    workers built from this builder, so that they do not run them concurrently. In-memory sqlite databases are not
+    shared between processes, and are still created by each worker."""
+    if "storage" not in builder.applications:
+        return
+
+    settings = builder.build()["storage"]
+    url = make_url(str(settings.url))
+    if not settings.migrate or (url.get_dialect().name == "sqlite" and url.database in (None, "", ":memory:")):
+        return
+
+    async def _migrate():
+        engine = create_async_engine(url)
+        try:
+            await upgrade(engine)
+        finally:
+            # do not let the forked workers inherit pooled connections
+            await engine.dispose()
+
+    asyncio.run(_migrate())
+    builder.add_values({"storage": {"migrate": False}})
@@ -1,6 +1,8 @@
+import zlib
+from contextlib import asynccontextmanager
 from operator import itemgetter
 
-from sqlalchemy import text
+from sqlalchemy import func, insert, select, text
 
 
 async def run_sql(engine, sql, *, autocommit=True):
@@ -13,6 +15,87 @@ async def run_sql(engine, sql, *, autocommit=True):
     return result
 
 
+def insert_ignore(table, /, *, dialect: str):
+    """
+    Build an insert statement that silently skips rows conflicting with existing ones, using the dialect's native
+    syntax (``ON CONFLICT DO NOTHING`` or ``INSERT IGNORE``). Unknown dialects get a plain insert, and it's up to the
+    caller to handle integrity errors.
+
+    :param table: table or mapped class to insert into
+    :param dialect: sqlalchemy dialect name (for example, ``engine.dialect.name``)
+    """
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+
+        return postgresql_insert(table).on_conflict_do_nothing()
+
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        return sqlite_insert(table).on_conflict_do_nothing()
+
+    if dialect in ("mysql", "mariadb"):
+        return insert(table).prefix_with("IGNORE")
+
+    return insert(table)
+
+
+def upsert(table, values: dict, /, *, dialect: str, key: str = "id"):
+    """
+    Build an insert statement for one row that updates the existing row instead, if one conflicts on ``key``, using
+    the dialect's native syntax (``ON CONFLICT DO UPDATE`` or ``ON DUPLICATE KEY UPDATE``). Unknown dialects get a
+    plain insert, and it's up to the caller to handle integrity errors.
+
+    :param table: table or mapped class to insert into
+    :param values: column values of the row
+    :param dialect: sqlalchemy dialect name (for example, ``engine.dialect.name``)
+    :param key: primary key column name
+    """
+    changes = {name: value for name, value in values.items() if name != key}
+
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+
+        return postgresql_insert(table).values(values).on_conflict_do_update(index_elements=[key], set_=changes)
+
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        return sqlite_insert(table).values(values).on_conflict_do_update(index_elements=[key], set_=changes)
+
+    if dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        return mysql_insert(table).values(values).on_duplicate_key_update(changes)
+
+    return insert(table).values(values)
+
+
+@asynccontextmanager
+async def advisory_lock(session, name: str, /, *, dialect: str):
+    """
+    Hold a database wide lock named ``name`` in a session's transaction, so that transactions using the same lock name
+    (from any process or host sharing the database) run one after the other. Uses the dialect's native advisory locks
+    (``pg_advisory_xact_lock``, held until the transaction ends, or ``GET_LOCK``). SQLite serializes writing
+    transactions by itself, and other dialects get no lock at all.
+
+    :param session: sqlalchemy async session, within a transaction
+    :param name: lock name
+    :param dialect: sqlalchemy dialect name (for example, ``engine.dialect.name``)
+    """
+    if dialect == "postgresql":
+        await session.execute(select(func.pg_advisory_xact_lock(zlib.crc32(name.encode()))))
+        yield
+    elif dialect in ("mysql", "mariadb"):
+        await session.execute(select(func.get_lock(name, -1)))
+        try:
+            yield
+        finally:
+            await session.execute(select(func.release_lock(name)))
+    else:
+        yield
+
+
 _get0 = itemgetter(0)
 
 
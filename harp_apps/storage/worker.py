@@ -1,13 +1,19 @@
+import asyncio
+import random
+from collections import Counter, defaultdict
 from datetime import UTC
-from functools import partial
-from math import log10
+from math import ceil
+from typing import Iterable, Optional
 
-from sqlalchemy import insert, update
-from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy import bindparam, insert, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
 from whistle import IAsyncEventDispatcher
 
+from harp import get_logger
 from harp.http import get_serializer_for
 from harp.models import Blob
+from harp.settings import USE_PROMETHEUS
 from harp.utils.background import AsyncWorkerQueue
 from harp_apps.proxy.events import (
     EVENT_TRANSACTION_ENDED,
@@ -16,20 +22,131 @@ from harp_apps.proxy.events import (
     HttpMessageEvent,
     TransactionEvent,
 )
+from harp_apps.storage.models import Blob as SqlBlob
 from harp_apps.storage.models import Message as SqlMessage
+from harp_apps.storage.models import Tag as SqlTag
+from harp_apps.storage.models import TagValue as SqlTagValue
 from harp_apps.storage.models import Transaction as SqlTransaction
+from harp_apps.storage.models.transactions import transaction_tag_values_association_table
+from harp_apps.storage.services.blob_storages import find_blob_storage
+from harp_apps.storage.services.blob_storages.compression import CompressingBlobStorage
+from harp_apps.storage.services.blob_storages.dedup import DeduplicatingBlobStorage
+from harp_apps.storage.services.blob_storages.sql import SqlBlobStorage
+from harp_apps.storage.settings import StorageSettings, StorageWorkerSettings
 from harp_apps.storage.types import IBlobStorage, IStorage
+from harp_apps.storage.utils.sql import insert_ignore
+
+logger = get_logger(__name__)
 
 SKIP_STORAGE = "skip-storage"
 
+#: Number of pending writes that triggers a flush of the storage worker buffer.
+BATCH_SIZE = 100
+
+#: How many seconds pending writes can wait in the storage worker buffer before being flushed.
+BATCH_INTERVAL = 0.1
+
+StorageWorkerDropped = None
+if USE_PROMETHEUS:
+    from prometheus_client import Counter as PrometheusCounter
+
+    StorageWorkerDropped = PrometheusCounter(
+        "storage_worker_dropped",
+        "Items not stored by the storage worker because it was overloaded.",
+        ["kind"],
+    )
+
+
+def get_write_concurrency(engine: AsyncEngine) -> int:
+    """Number of concurrent writers that makes sense for the given engine, which is its connection pool size, except
+    for sqlite that serializes writes anyway."""
+    if engine.dialect.name == "sqlite":
+        return 1
+    size = getattr(engine.pool, "size", None)
+    return max(1, size()) if callable(size) else 1
+
+
+class StorageBatch:
+    """Pending writes accumulated by the storage worker, to be flushed to the database together."""
+
+    def __init__(self):
+        #: transactions to insert, by id (including their tags, and the end of transaction data if already known)
+        self.transactions: dict[str, dict] = {}
+
+        #: end of transaction data for transactions inserted by a previous batch, by id
+        self.updates: dict[str, dict] = {}
+
+        #: messages to insert, in order
+        self.messages: list[dict] = []
+
+        #: blobs to store, by id
+        self.blobs: dict[str, Blob] = {}
+
+    def __len__(self):
+        return len(self.transactions) + len(self.updates) + len(self.messages) + len(self.blobs)
+
+    def split(self) -> dict[str, "StorageBatch"]:
+        """Splits the batch into one batch per transaction (with its messages), by transaction id. Blobs are left
+        aside."""
+        batches = defaultdict(StorageBatch)
+        for transaction_id, values in self.transactions.items():
+            batches[transaction_id].transactions[transaction_id] = values
+        for transaction_id, values in self.updates.items():
+            batches[transaction_id].updates[transaction_id] = values
+        for message in self.messages:
+            batches[message["transaction_id"]].messages.append(message)
+        return dict(batches)
+
 
 class StorageAsyncWorkerQueue(AsyncWorkerQueue):
-    def __init__(self, engine: AsyncEngine, storage: IStorage, blob_storage: IBlobStorage):
+    """Writes transactions, messages and blobs to the storage, in the background.
+
+    Events are not written one by one, but accumulated in a :class:`StorageBatch` that is flushed as one queue item
+    either when it reaches ``batch_size`` pending writes or after ``batch_interval`` seconds. Each flush uses
+    multi-row inserts within a single database transaction.
+
+    Transactions are spread across one batch per consumer (the concurrency follows the database connection pool
+    size), and each batch is pushed with its own ordering key: writes related to a given transaction stay ordered,
+    while different transactions are written in parallel.
+
+    The number of pending writes (buffered or queued) is tracked on each write. Once it reaches the configured high
+    watermark, the worker is overloaded and applies its drop policy (see :class:`StorageWorkerSettings
+    <harp_apps.storage.settings.StorageWorkerSettings>`) until it gets back under the low watermark. What was not
+    stored is counted in :attr:`dropped` (and in prometheus, if enabled).
+
+    Batches that cannot be written because of integrity errors, even once retried, are written again one transaction
+    at a time, and the transactions that still fail are logged and counted in :attr:`failed`.
+
+    """
+
+    batch_size = BATCH_SIZE
+    batch_interval = BATCH_INTERVAL
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        storage: IStorage,
+        blob_storage: IBlobStorage,
+        settings: StorageSettings = None,
+    ):
         self.engine = engine
         self.storage = storage
         self.blob_storage = blob_storage
-        super().__init__()
+        self.settings = settings.worker if settings else StorageWorkerSettings()
+        super().__init__(
+            concurrency=get_write_concurrency(engine),
+            # hard limit, the drop policies are expected to keep the backlog way under it
+            maxsize=ceil(2 * self.settings.high_watermark / self.batch_size),
+        )
         self.seen = set()
+        self.dropped = Counter()
+        self.failed = 0
+        self.overloaded = False
+        self._relieved = asyncio.Event()
+        self._relieved.set()
+        self._queued_writes = 0
+        self._batches = [StorageBatch() for _ in range(self.concurrency)]
+        self._flusher = asyncio.create_task(self._flush_periodically())
 
     def register_events(self, dispatcher: IAsyncEventDispatcher):
         dispatcher.add_listener(EVENT_TRANSACTION_STARTED, self.on_transaction_started)
@@ -41,62 +158,67 @@ class StorageAsyncWorkerQueue(AsyncWorkerQueue):
 
     @property
     def pressure(self):
-        if self._pressure <= 1:
-            return 0
-        return int(log10(self._pressure))
+        """Number of pending writes, either buffered or queued."""
+        return self._queued_writes + sum(map(len, self._batches))
 
     async def on_transaction_started(self, event: TransactionEvent):
         """Event handler to store the transaction in the database."""
 
-        if self.pressure >= 4:
-            event.transaction.markers.add(SKIP_STORAGE)
-            return
+        if await self._is_overloaded() and self.settings.drop_policy == "sample":
+            if random.random() >= self.settings.sample_rate:
+                event.transaction.markers.add(SKIP_STORAGE)
+                self._drop("transactions")
+                return
 
-        # Copy fields into a dict that won't change before the task is handled
+        # Copy fields into a dict that won't change before the batch is flushed
         transaction_data = event.transaction.as_storable_dict(with_tags=True)
-
-        async def create_transaction():
-            return await self.storage.transactions.create(transaction_data)
-
-        # Schedule
-        await self.push(create_transaction)
+        shard = self._get_shard(event.transaction.id)
+        self._batches[shard].transactions[transaction_data["id"]] = transaction_data
+        await self._flush_if_full(shard)
 
     async def on_transaction_message(self, event: HttpMessageEvent):
-        if SKIP_STORAGE in event.transaction.markers or self.pressure >= 3:
+        if SKIP_STORAGE in event.transaction.markers:
+            self._drop("messages")
+            self._drop("blobs", 2)
+            return
+
+        overloaded = await self._is_overloaded()
+        if overloaded and self.settings.drop_policy == "drop_headers":
+            self._drop("messages")
+            self._drop("blobs", 2)
             return
 
         await event.message.aread()
         serializer = get_serializer_for(event.message)
 
+        shard = self._get_shard(event.transaction.id)
         message_data = {
             "transaction_id": event.transaction.id,
             "kind": event.message.kind,
             "summary": serializer.summary,
             "created_at": event.message.created_at,
+            "headers": None,
+            "body": None,
         }
 
-        # Eventually store the headers blob (later)
-        if self.pressure <= 2:
-            headers_blob = Blob.from_data(serializer.headers, content_type="http/headers")
-            await self.push(partial(self.blob_storage.put, headers_blob), ignore_errors=True)
-            message_data["headers"] = headers_blob.id
+        headers_blob = Blob.from_data(serializer.headers, content_type="http/headers")
+        self._batches[shard].blobs[headers_blob.id] = headers_blob
+        message_data["headers"] = headers_blob.id
 
-        # Eventually store the content blob (later)
-        if self.pressure <= 1:
+        if overloaded and self.settings.drop_policy == "drop_bodies":
+            self._drop("blobs")
+        else:
             content_blob = Blob.from_data(serializer.body, content_type=event.message.headers.get("content-type"))
-            await self.push(partial(self.blob_storage.put, content_blob), ignore_errors=True)
+            self._batches[shard].blobs[content_blob.id] = content_blob
             message_data["body"] = content_blob.id
 
-        async def create_message():
-            async with self.engine.connect() as conn:
-                await conn.execute(insert(SqlMessage).values(**message_data))
-                await conn.commit()
-
-        await self.push(create_message)
+        self._batches[shard].messages.append(message_data)
+        await self._flush_if_full(shard)
 
     async def on_transaction_ended(self, event: TransactionEvent):
         if SKIP_STORAGE in event.transaction.markers:
             return
+        await self._is_overloaded()
 
         transaction_id = event.transaction.id
         transaction_data = {
@@ -107,15 +229,216 @@ class StorageAsyncWorkerQueue(AsyncWorkerQueue):
             "x_cached": event.transaction.extras.get("cached"),
         }
 
-        async def update_transaction():
-            async with self.engine.connect() as conn:
-                await conn.execute(
-                    update(SqlTransaction)
-                    .where(
-                        SqlTransaction.id == transaction_id,
-                    )
-                    .values(**transaction_data)
+        # if the transaction was not inserted yet, we can fold the end data into its insertion row
+        shard = self._get_shard(transaction_id)
+        batch = self._batches[shard]
+        if transaction_id in batch.transactions:
+            batch.transactions[transaction_id].update(transaction_data)
+        else:
+            batch.updates[transaction_id] = transaction_data
+        await self._flush_if_full(shard)
+
+    async def flush(self, shard: Optional[int] = None):
+        """Schedule the pending writes to be written to the database, as one queue item per non-empty batch (or only
+        for the given shard's batch)."""
+        for _shard in range(len(self._batches)) if shard is None else (shard,):
+            if not len(self._batches[_shard]):
+                continue
+            batch, self._batches[_shard] = self._batches[_shard], StorageBatch()
+            self._queued_writes += len(batch)
+
+            async def write_batch(batch=batch):
+                try:
+                    await self._write_batch(batch)
+                finally:
+                    self._queued_writes -= len(batch)
+                    self._update_overload_state()
+
+            await self.push(write_batch, key=_shard)
+
+    async def wait_until_empty(self):
+        await self.flush()
+        await super().wait_until_empty()
+
+    async def close(self):
+        await self.flush()
+        self._flusher.cancel()
+        await super().close()
+
+    def _update_overload_state(self) -> bool:
+        pressure = self.pressure
+        if self.overloaded and pressure <= self.settings.low_watermark:
+            self.overloaded = False
+            self._relieved.set()
+            logger.info(f"Storage worker is not overloaded anymore ({pressure} pending writes).")
+        elif not self.overloaded and pressure >= self.settings.high_watermark:
+            self.overloaded = True
+            self._relieved.clear()
+            logger.warning(
+                f"Storage worker is overloaded ({pressure} pending writes), applying «{self.settings.drop_policy}» "
+                "drop policy."
+            )
+        return self.overloaded
+
+    async def _is_overloaded(self) -> bool:
+        """Returns whether the drop policy should be applied, after waiting for the backlog to drain if the policy is
+        to block."""
+        if self._update_overload_state() and self.settings.drop_policy == "block":
+            await self._relieved.wait()
+            return False
+        return self.overloaded
+
+    def _drop(self, kind: str, count: int = 1):
+        self.dropped[kind] += count
+        if StorageWorkerDropped:
+            StorageWorkerDropped.labels(kind).inc(count)
+
+    def _get_shard(self, transaction_id: str) -> int:
+        return hash(transaction_id) % len(self._batches)
+
+    async def _flush_if_full(self, shard: int):
+        if len(self._batches[shard]) >= self.batch_size:
+            await self.flush(shard)
+
+    async def _flush_periodically(self):
+        while self._running:
+            await asyncio.sleep(self.batch_interval)
+            try:
+                await self.flush()
+            except RuntimeError:
+                # queue is closed
+                break
+
+    async def _write_batch(self, batch: StorageBatch):
+        # blobs can be written within the same database transaction only if they are stored in the same database
+        backend = find_blob_storage(self.blob_storage, SqlBlobStorage)
+        blobs_in_database = backend is not None and backend.engine is self.engine
+        dedup = find_blob_storage(self.blob_storage, DeduplicatingBlobStorage)
+
+        blobs = []
+        if blobs_in_database:
+            # skip known blobs, and compress the others (if enabled) before the database transaction starts
+            blobs = [blob for blob in batch.blobs.values() if not (dedup and dedup.known(blob.id))]
+            if compression := find_blob_storage(self.blob_storage, CompressingBlobStorage):
+                blobs = await compression.compress_many(blobs)
+        else:
+            await self._put_blobs(batch.blobs.values())
+
+        try:
+            async with self.engine.begin() as conn:
+                await self._write_batch_using_connection(conn, batch, blobs=blobs)
+        except IntegrityError:
+            # some tags (or blobs, for dialects without native upserts) were probably written concurrently (by another
+            # consumer or process), retry once, with blobs written one by one as it is tolerant to duplicates, and tags
+            # that will now be found.
+            if blobs_in_database:
+                await self._put_blobs(batch.blobs.values())
+            try:
+                async with self.engine.begin() as conn:
+                    await self._write_batch_using_connection(conn, batch)
+            except IntegrityError:
+                # probably one faulty transaction, that should not take the others down with it
+                await self._write_batch_by_transaction(batch)
+        else:
+            if blobs_in_database and dedup:
+                dedup.remember(batch.blobs.keys())
+
+    async def _write_batch_by_transaction(self, batch: StorageBatch):
+        """Writes the batch content (blobs excepted, written already) one transaction at a time."""
+        for transaction_id, transaction_batch in batch.split().items():
+            try:
+                async with self.engine.begin() as conn:
+                    await self._write_batch_using_connection(conn, transaction_batch)
+            except IntegrityError as exc:
+                self.failed += 1
+                logger.error(f"Could not store transaction {transaction_id}: {exc}")
+
+    async def _write_batch_using_connection(
+        self, conn: AsyncConnection, batch: StorageBatch, /, *, blobs: Iterable[Blob] = ()
+    ):
+        """Writes the batch content, using the given connection. Blobs are not taken from the batch, but given as an
+        argument, as they may need to be written elsewhere, skipped or transformed."""
+        if rows := [{"id": blob.id, "data": blob.data, "content_type": blob.content_type} for blob in blobs]:
+            await conn.execute(insert_ignore(SqlBlob, dialect=conn.dialect.name), rows)
+
+        if batch.transactions:
+            tags = {}
+            rows = []
+            for transaction_id, values in batch.transactions.items():
+                values = dict(values)
+                tags[transaction_id] = values.pop("tags", None) or {}
+                rows.append(values)
+            await conn.execute(insert(SqlTransaction), rows)
+            await self._insert_tags(conn, tags)
+
+        if batch.updates:
+            await conn.execute(
+                update(SqlTransaction)
+                .where(SqlTransaction.id == bindparam("_id"))
+                .values(
+                    finished_at=bindparam("finished_at"),
+                    elapsed=bindparam("elapsed"),
+                    tpdex=bindparam("tpdex"),
+                    x_status_class=bindparam("x_status_class"),
+                    x_cached=bindparam("x_cached"),
                 )
-                await conn.commit()
+                .execution_options(synchronize_session=None),
+                [{"_id": transaction_id, **values} for transaction_id, values in batch.updates.items()],
+            )
+
+        if batch.messages:
+            await conn.execute(insert(SqlMessage), batch.messages)
+
+    async def _insert_tags(self, conn: AsyncConnection, tags: dict[str, dict]):
+        pairs = {(name, value) for transaction_tags in tags.values() for name, value in transaction_tags.items()}
+        if not pairs:
+            return
+
+        # find or create tags
+        names = {name for name, _ in pairs}
+        tag_ids = await self._find_or_create_many(
+            conn,
+            select(SqlTag.name, SqlTag.id).where(SqlTag.name.in_(names)),
+            lambda missing: (insert(SqlTag), [{"name": name} for name in missing]),
+            names,
+        )
+
+        # find or create tag values
+        value_keys = {(tag_ids[name], value) for name, value in pairs}
+        value_ids = await self._find_or_create_many(
+            conn,
+            select(SqlTagValue.tag_id, SqlTagValue.value, SqlTagValue.id).where(
+                tuple_(SqlTagValue.tag_id, SqlTagValue.value).in_(value_keys)
+            ),
+            lambda missing: (insert(SqlTagValue), [{"tag_id": tag_id, "value": value} for tag_id, value in missing]),
+            value_keys,
+        )
+
+        await conn.execute(
+            insert(transaction_tag_values_association_table),
+            [
+                {"transaction_id": transaction_id, "value_id": value_ids[(tag_ids[name], value)]}
+                for transaction_id, transaction_tags in tags.items()
+                for name, value in transaction_tags.items()
+            ],
+        )
+
+    async def _find_or_create_many(self, conn: AsyncConnection, query, create, keys: set) -> dict:
+        """Returns a key -> id mapping for all given keys, inserting missing rows using one multi-row insert. The
+        query must select the key column(s) followed by the id column."""
+
+        def _as_dict(rows):
+            return {(tuple(row[:-1]) if len(row) > 2 else row[0]): row[-1] for row in rows}
+
+        ids = _as_dict(await conn.execute(query))
+        if missing := keys - ids.keys():
+            await conn.execute(*create(missing))
+            ids = _as_dict(await conn.execute(query))
+        return ids
 
-        await self.push(update_transaction)
+    async def _put_blobs(self, blobs):
+        for blob in blobs:
+            try:
+                await self.blob_storage.put(blob)
+            except Exception as exc:
+                logger.warning(f"Error while storing blob {blob.id}: {exc}")